@@ -1,9 +1,15 @@
 from lsdo_modules.utils.parameters import Parameters
+from lsdo_modules.utils.arrays import as_input_array
 from abc import ABC, abstractmethod
 
 
 # NOTE Unpack kwarg dictionary 
 class Module(ABC):
+    # Backend of 'evaluate' and limit on the number of evaluations submitted at a time
+    evaluator = None
+    max_concurrent_evaluations = None
+    _semaphore = None
+
     def __init__(self, **kwargs) -> None:
         self.parameters = Parameters()
         self.initialize(kwargs)
@@ -19,10 +25,15 @@ class Module(ABC):
         raise NotImplementedError
 
     def set_module_input(self, name, val, units='',
-                    dv_flag=False, lower=None, upper=None, scaler=None):
-        
+                    dv_flag=False, lower=None, upper=None, scaler=None,
+                    copy=False, read_only=False):
+        """
+        Arrays are stored without copying unless `copy=True`. With
+        `read_only=True`, a non-writeable view is stored. A `MemmapSource`
+        is kept as it is and only mapped when the module uses the value.
+        """
         self.inputs[name] = dict(
-            val=val,
+            val=as_input_array(val, copy=copy, read_only=read_only),
             units=units,
             dv_flag=dv_flag,
             lower=lower,
@@ -32,6 +43,57 @@ class Module(ABC):
 
     def connect(self): pass
 
+    def set_evaluator(self, evaluator, max_concurrent=None):
+        """
+        Set the backend of `evaluate`: a Simulator of the module, which is
+        run in a background thread, or an object with the `submit` method
+        of `ModuleWorkerPool`, e.g., a pool of worker processes. At most
+        `max_concurrent` evaluations of this module are submitted at a
+        time (default: no limit); further ones wait in the event loop.
+        """
+        if not hasattr(evaluator, 'submit'):
+            from lsdo_modules.utils.worker_pool import SimulatorExecutor
+            evaluator = SimulatorExecutor(evaluator)
+        self.evaluator = evaluator
+        self.max_concurrent_evaluations = max_concurrent
+        self._semaphore = None
+
+    async def evaluate(self, inputs=None, outputs=(), of=None, wrt=None):
+        """
+        Evaluate the module with the values set with `set_module_input`,
+        updated with the values in `inputs`, without blocking the event
+        loop. Returns a dictionary with the values of the `outputs` and, if
+        `wrt` is given, the total derivatives of `of` (default: `outputs`)
+        with respect to `wrt`.
+
+        Cancelling the awaiting task cancels the evaluation if it has not
+        started yet; a running evaluation is finished by the evaluator and
+        its result is discarded.
+        """
+        import asyncio
+
+        if self.evaluator is None:
+            raise RuntimeError(f'No evaluator set for {type(self).__name__}; call set_evaluator first')
+        values = {name: value['val'] for name, value in self.inputs.items()}
+        values.update(inputs or {})
+
+        if self.max_concurrent_evaluations is None:
+            return await asyncio.wrap_future(self.evaluator.submit(values, outputs, of=of, wrt=wrt))
+        # Semaphores are bound to the event loop they are first used in
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore[0] is not loop:
+            self._semaphore = (loop, asyncio.Semaphore(self.max_concurrent_evaluations))
+        async with self._semaphore[1]:
+            return await asyncio.wrap_future(self.evaluator.submit(values, outputs, of=of, wrt=wrt))
+
+    def __getstate__(self):
+        # Evaluators hold threads or processes and semaphores belong to an
+        # event loop, so they are not pickled
+        state = self.__dict__.copy()
+        state.pop('evaluator', None)
+        state.pop('_semaphore', None)
+        return state
+
     
 
 
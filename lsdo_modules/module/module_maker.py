@@ -17,14 +17,19 @@ from csdl.utils.collect_terminals import collect_terminals
 
 # from lsdo_modules.module.implicit_module import ImplicitModule
 from lsdo_modules.utils.parameters import Parameters
+from lsdo_modules.utils.logger import logger
+from lsdo_modules.utils.trace import traced, trace_span
+from lsdo_modules.utils.module_stats import module_maker_stats
 from csdl import Model
 import numpy as np
 from copy import copy
+from collections import deque
 
-from lsdo_modules.utils.unpack_module import unpack_module
-from json2html import *
+from lsdo_modules.utils.arrays import resolve_input
+from lsdo_modules.utils.dataflow import module_maker_graph, submodule_entry_name, submodule_promotes, \
+    promoted_path_name, _maker_interface
+from lsdo_modules.utils.fingerprint import module_maker_fingerprint, count_module_tree
 import os 
-import webbrowser
 
 def _to_array(
     x: Union[int, float, np.ndarray, Variable]
@@ -33,7 +38,158 @@ def _to_array(
         x = np.array(x)
     return x
 
+def _input_val(val):
+    # Arrays are passed on as they are so that large meshes are not copied,
+    # other values are checked by csdl
+    if isinstance(val, np.ndarray):
+        return val
+    return check_default_val_type(val)
+
+def _defines_problem(module_maker):
+    # Whether a module or any of its submodules registers an objective,
+    # constraints or design variables
+    stack = [module_maker]
+    while stack:
+        module_maker = stack.pop()
+        if module_maker.objective or module_maker.constraints or module_maker.design_variables:
+            return True
+        stack.extend(entry['sub_module'] for entry in module_maker.module_info if isinstance(entry, dict))
+    return False
+
+def _new_solver(solver):
+    # Solver instance, or a function that returns a new solver
+    if isinstance(solver, (NonlinearSolver, LinearSolver)):
+        return solver
+    return solver()
+
+def _add_submodule(model, entry, all_promoted_vars):
+    csdl_submodel = entry['csdl_model']
+    name = entry['name']
+    promotes = submodule_promotes(entry, all_promoted_vars)
+    if promotes is not None:
+        logger.debug('PROMOTES= %s', promotes)
+    model.add(csdl_submodel, name, promotes)
+
+def _add_objective(model, name, objective):
+    model.add_objective(
+        name=name,
+        # ref=objective[name]['ref'],
+        ref0=objective[name]['ref0'],
+        index=objective[name]['index'],
+        units=objective[name]['units'],
+        adder=objective[name]['adder'],
+        scaler=objective[name]['scaler'],
+        parallel_deriv_color=objective[name]['parallel_deriv_color'],
+        cache_linear_solution=objective[name]['cache_linear_solution'],
+    )
+
+class CSDLModel(Model):
+    """
+    csdl `Model` built by `ModuleMaker.assemble_csdl` from the `module_info`
+    of a module. All state is passed as parameters, so assembled models
+    (and the ModuleMakers holding them) can be pickled, e.g., to send them
+    to worker processes. Coupled solvers given as functions must then be
+    importable, i.e., not lambdas.
+    """
+    def initialize(self):
+        self.parameters.declare('module_name', types=str)
+        self.parameters.declare('module_info', types=list)
+        self.parameters.declare('promoted_vars', types=list)
+        self.parameters.declare('design_variables', types=dict)
+        self.parameters.declare('objective', types=dict)
+        # Positions in 'module_info' of the submodules that are not added
+        self.parameters.declare('skipped', types=set)
+        # Positions in 'module_info' of the submodules of each coupled group
+        self.parameters.declare('coupled_groups', types=list)
+        # (source, target) pairs of variables to connect, e.g., outputs of
+        # shared submodules to the consumers of their dropped duplicates
+        self.parameters.declare('connections', types=list)
+        self.parameters.declare('nonlinear_solver', default=None, allow_none=True)
+        self.parameters.declare('linear_solver', default=None, allow_none=True)
+
+    @traced('define', label=lambda self: self.parameters['module_name'])
+    def define(self):
+        module_info = self.parameters['module_info']
+        all_promoted_vars = self.parameters['promoted_vars']
+        design_variables = self.parameters['design_variables']
+        objective = self.parameters['objective']
+        skipped = self.parameters['skipped']
+        coupled_groups = self.parameters['coupled_groups']
+        connections = self.parameters['connections']
+        nonlinear_solver = self.parameters['nonlinear_solver']
+        linear_solver = self.parameters['linear_solver']
+        group_of = {position: k for k, positions in enumerate(coupled_groups) for position in positions}
+
+        added_groups = set()
+        for position, entry in enumerate(module_info):
+
+            # Inputs
+            if isinstance(entry, DeclaredVariable):
+                self.declare_variable(name=entry.name, val=entry.val, shape=entry.shape)
+
+            elif isinstance(entry, Input):
+                name = entry.name
+                self.create_input(name=name, val=entry.val, shape=entry.shape)
+                if name in design_variables:
+                    dv = design_variables[name]
+                    self.add_design_variable(
+                        dv_name=name,
+                        lower=dv['lower'],
+                        upper=dv['upper'],
+                        scaler=dv['scaler'],
+                    )
+
+            # Outputs
+            elif isinstance(entry, (Output, Concatenation)):
+                name = entry.name
+                self.register_output(name=name, var=entry)
+                if name in objective:
+                    _add_objective(self, name, objective)
+
+            # Submodel that is not needed
+            elif isinstance(entry, dict) and position in skipped:
+                continue
+
+            # Adding submodel in a feedback loop: all submodules of the
+            # loop are added to one group with its own solvers
+            elif isinstance(entry, dict) and position in group_of:
+                k = group_of[position]
+                if k in added_groups:
+                    continue
+                added_groups.add(k)
+                group = Model()
+                for group_position in coupled_groups[k]:
+                    _add_submodule(group, module_info[group_position], all_promoted_vars)
+                if nonlinear_solver is not None:
+                    group.nonlinear_solver = _new_solver(nonlinear_solver)
+                if linear_solver is not None:
+                    group.linear_solver = _new_solver(linear_solver)
+                self.add(group, f'coupled_group_{k}')
+
+            # Adding submodel
+            elif isinstance(entry, dict):
+                _add_submodule(self, entry, all_promoted_vars)
+
+            # Implicit operation
+            elif isinstance(entry, ImplicitOperationFactory):
+                logger.debug('IMPLICIT')
+                self.create_implicit_operation(entry.model)
+
+            else:
+                raise NotImplementedError
+
+        for source, target in connections:
+            self.connect(source, target)
+
 class ModuleMaker:
+    # Reorder submodules by their data dependencies in 'assemble_csdl'; off
+    # by default because it changes the order of the submodels in csdl
+    auto_sort_sub_modules = False
+    # Add submodules in feedback loops to a group with the coupled solvers
+    # in 'assemble_csdl'; off by default because it renames the unpromoted
+    # variables of the grouped submodules
+    group_coupled_sub_modules = False
+
     def __init__(self, module=None, **kwargs) -> None:
         self.declared_variables = list()
         self.inputs = list()
@@ -43,12 +199,22 @@ class ModuleMaker:
         self.module_info = list()
         self.module_inputs = list()
         self.module_outputs = list()
+        self.module_output_importance = dict()
         self.promoted_vars = list()
         self.design_variables = dict()
         self.objective = dict()
         self.constraints = dict()
         self.module = module #kwargs['module']
 
+        # Solvers of the groups of coupled submodules created in 'assemble_csdl';
+        # solver instances or functions that return a new solver for each group
+        self.coupled_nonlinear_solver = None
+        self.coupled_linear_solver = None
+        self.coupled_groups = list()
+        self.pruned_sub_modules = list()
+        self.shared_sub_modules = dict()
+        self.sharing_report = dict(evaluations=0, variables=0)
+
         # NOTE 
         self.parameters: Parameters = Parameters()
         self.initialize_module()
@@ -104,7 +270,7 @@ class ModuleMaker:
             # print('NO MODULE')
             v = DeclaredVariable(
                 name,
-                val=check_default_val_type(val),
+                val=_input_val(val),
                 shape=shape,
                 src_indices=src_indices,
                 flat_src_indices=flat_src_indices,
@@ -124,7 +290,7 @@ class ModuleMaker:
             if name not in self.module.inputs:
                 v = DeclaredVariable(
                     name,
-                    val=check_default_val_type(val),
+                    val=_input_val(val),
                     shape=shape,
                     src_indices=src_indices,
                     flat_src_indices=flat_src_indices,
@@ -142,7 +308,8 @@ class ModuleMaker:
             else:
                 mod_var = self.module.inputs[name]
                 mod_var_units = mod_var['units']
-                mod_var_val = mod_var['val']
+                # Memory-mapped inputs are mapped here, when the value is needed
+                mod_var_val = resolve_input(mod_var['val'])
                 if isinstance(mod_var_val, (int, float)):
                     mod_var_shape = (1, )
                 else:
@@ -153,7 +320,7 @@ class ModuleMaker:
             if mod_var['computed_upstream'] is False and mod_var['dv_flag'] is False:
                 i = Input(
                     name,
-                    val=check_default_val_type(mod_var_val),
+                    val=_input_val(mod_var_val),
                     shape=mod_var_shape,
                     units=mod_var_units,
                     desc=desc,
@@ -169,7 +336,7 @@ class ModuleMaker:
             elif mod_var['computed_upstream'] is False and mod_var['dv_flag'] is True:
                 i = Input(
                     name,
-                    val=check_default_val_type(mod_var_val),
+                    val=_input_val(mod_var_val),
                     shape=mod_var_shape,
                     units=mod_var_units,
                     desc=desc,
@@ -190,7 +357,7 @@ class ModuleMaker:
             elif mod_var['computed_upstream'] is True:
                 v = DeclaredVariable(
                     name,
-                    val=check_default_val_type(mod_var_val),
+                    val=_input_val(mod_var_val),
                     shape=mod_var_shape,
                     src_indices=src_indices,
                     flat_src_indices=flat_src_indices,
@@ -226,7 +393,8 @@ class ModuleMaker:
         shape_by_conn=False,
         copy_shape=None,
         distributed=None,
-        promotes: bool = False
+        promotes: bool = False,
+        importance=0,
     ):  
         """
         General method for registering outputs that mirrors the following 
@@ -238,6 +406,9 @@ class ModuleMaker:
         return a CSDL variable of type `Concatenation` (i.e., it will call
         CSDL's `create_outpu`). Otherwise it will return a CSDL variable of 
         type `Output`.
+
+        `importance` ranks the output (1 is the most important, 0 means
+        unranked); see `assemble_csdl(importance=...)`.
         """ 
         
         if shape and var:
@@ -247,7 +418,7 @@ class ModuleMaker:
         if shape:
             c = Concatenation(
             name,
-            val=check_default_val_type(val),
+            val=_input_val(val),
             shape=shape,
             units=units,
             desc=desc,
@@ -265,6 +436,7 @@ class ModuleMaker:
             # self.register_output(name, c)
             self.module_info.append(c)
             self.module_outputs.append(name)
+            self.module_output_importance[name] = importance
             if promotes is True:
                 self.promoted_vars.append(name)
 
@@ -295,6 +467,7 @@ class ModuleMaker:
             var.name = name
             self.module_info.append(var)
             self.module_outputs.append(name)
+            self.module_output_importance[name] = importance
             if promotes is True:
                 self.promoted_vars.append(name)
 
@@ -330,7 +503,7 @@ class ModuleMaker:
             parallel_deriv_color=parallel_deriv_color,
             cache_linear_solution=cache_linear_solution,
         )
-        print('objective', self.objective)
+        logger.debug('objective %s', self.objective)
 
     def register_constraint(
         self,
@@ -379,6 +552,7 @@ class ModuleMaker:
                 cache_linear_solution=cache_linear_solution,
             )
 
+    @traced('add_module', label=lambda self, submodule, name=None, *args, **kwargs: name)
     def add_module(
         self,
         submodule,
@@ -400,178 +574,307 @@ class ModuleMaker:
         
         return sub_module_info
 
-    def generate_html(self, sim=None):
-        # self.define_module()
-        module_info = self.module_info
-        module_dict = unpack_module(module_info)
-        def recursive_items(dictionary):
-            for key, value in dictionary.items():
-                if type(value) is dict:
-                    yield (key, value)
-                    yield from recursive_items(value)
-                else:
-                    yield (key, value)
-        
-        def append_value_to_key(nested_dict, key_value_pair, new_value):
-            # Loop through the dictionary to find the key-value pair
-            for key, value in nested_dict.items():
-                if isinstance(value, dict):
-                    # If the current value is a dictionary, call the function recursively
-                    nested_dict[key] = append_value_to_key(value, key_value_pair, new_value)
-                elif key == key_value_pair[0] and value == key_value_pair[1]:
-                    # If we find the key-value pair, modify the key by appending the new value
-                    
-                    # Update the dictionary with the new key and the same value
-                    nested_dict['value'] = new_value
-                else:
-                    print(key_value_pair)
-            return nested_dict
-        
-        
-        # def append_to_dict(d, key1, key2, value):
-        #     """
-        #     Appends a value to a key in an arbitrarily nested dictionary.
-        #     """
-        #     for k, v in d.items():
-        #         if k == key:
-        #             d[k]['Inputs']['value'] = value
-        #             d[k]['Outputs']['value'] = value
-        #             # if isinstance(v, list):
-        #             #     print(d[k])
-        #             #     d[k]['value'] = value
-        #             # else:
-        #             #     d[k] = [v, value]
-        #         elif isinstance(v, dict):
-        #             append_to_dict(v, key, value)
-        #     return d
-        
-        if sim:            
-            # inputs = []
-            # outputs = []
-            # for key, value in recursive_items(module_dict):
-            #     if key is 'Inputs':
-            #         inputs += list(value.keys())
-            #     elif key is 'Outputs':
-            #         outputs += list(value.keys())
-            # for input in inputs:
-            #     val = sim[input]
-            #     append_value_to_key(module_dict, ('Inputs', input), val)
-            # for output in outputs:
-            #     val = sim[output]
-            #     append_value_to_key(module_dict, ('Outputs', output), val)
-            pass
-        # exit()
-        # print('dict_keys', module_dict.keys())
-        html = json2html.convert(json=module_dict)
-        open('module_test.html', 'w').write(html)
-        filename = 'file:///' + os.getcwd()+'/' + 'module_test.html'
-        webbrowser.open_new_tab(filename)
+    def stats(self, name='module'):
+        """
+        Per-module and cumulative counts of inputs, declared variables,
+        outputs, promoted variables, implicit operations and array
+        elements/bytes, plus tree depth and fan-out. Requires
+        `module_info` to be populated, i.e., call after `assemble_csdl`.
+        See `lsdo_modules.utils.module_stats.format_stats` for a text report.
+        """
+        return module_maker_stats(self, name=name)
+
+    def generate_html(self, sim=None, file_name='module_test.html', headless=False, max_elements=10):
+        """
+        Write an HTML report of the module tree to `file_name`.
+
+        The report is written incrementally while the tree is traversed and
+        submodules are collapsible and rendered lazily by the browser. If
+        `headless` is True, the browser is not opened (e.g., on cluster nodes).
+
+        If a Simulator `sim` is provided, the values of all variables are
+        read once each, summarized (arrays with more than
+        `max_elements` entries by shape, min, max and norm), shown in the
+        report and written to the JSON sidecar '<file_name>_values.json'.
+        """
+        # Report-only modules are imported on first use
+        import webbrowser
+        from lsdo_modules.utils.html_report import write_module_html
+        from lsdo_modules.utils.value_report import fetch_values, write_value_sidecar
+
+        values = None
+        if sim is not None:
+            values = fetch_values(sim, self.module_info, max_elements=max_elements,
+                                  promoted_vars=self.promoted_vars)
+            write_value_sidecar(values, os.path.splitext(file_name)[0] + '_values.json')
+
+        write_module_html(self, file_name=file_name, values=values)
+        if not headless:
+            webbrowser.open_new_tab('file://' + os.path.abspath(file_name))
+        return file_name
         
     
-    def assemble_csdl(self): 
-        self.define_module()
-        all_promoted_vars = self.promoted_vars
-        design_variables = self.design_variables
-        objective = self.objective
-        module_info = self.module_info
+    def dataflow_graph(self):
+        """
+        Dataflow graph (`ModuleGraph`) of the submodules added with
+        `add_module`, built from their inputs and outputs.
+        """
+        return module_maker_graph(self)
+
+    def sort_sub_modules(self):
+        """
+        Reorder the submodules in `module_info` so that each one comes
+        after the modules it depends on. The order is stable, modules in
+        feedback loops are kept together and all other entries stay in
+        place. Called automatically by `assemble_csdl` if
+        `auto_sort_sub_modules` is True.
+
+        Returns the feedback loops (lists of submodule names) that remain.
+        """
+        slots = [i for i, entry in enumerate(self.module_info) if isinstance(entry, dict)]
+        if len(slots) < 2:
+            return []
+        components = self.dataflow_graph().strongly_connected_components()
+        order = [name for component in components for name in component]
+        position = {name: i for i, name in enumerate(order)}
+        sorted_slots = sorted(slots, key=lambda i: position[submodule_entry_name(self.module_info[i])])
+        if sorted_slots != slots:
+            logger.debug('reordering submodules of %s: %s', type(self).__name__, order)
+            entries = [self.module_info[i] for i in sorted_slots]
+            for i, entry in zip(slots, entries):
+                self.module_info[i] = entry
+        return [component for component in components if len(component) > 1]
+
+    def unused_sub_modules(self, keep_outputs=None):
+        """
+        Names of the submodules whose outputs are not needed to compute the
+        objective, the constraints, the outputs in `keep_outputs` or the
+        variables declared by this module itself.
+
+        Submodules that register an objective, constraints or design
+        variables themselves (at any depth) are always needed.
+        """
+        graph = self.dataflow_graph()
+        needed = set(self.objective) | set(self.constraints) | set(keep_outputs or ())
+        needed |= {entry.name for entry in self.module_info if isinstance(entry, DeclaredVariable)}
+
+        seeds = []
+        for entry in self.module_info:
+            if isinstance(entry, dict):
+                name = submodule_entry_name(entry)
+                if graph.produces[name] & needed or _defines_problem(entry['sub_module']):
+                    seeds.append(name)
+        needed_modules = graph.ancestors(seeds)
+        return [name for name in graph.names if name not in needed_modules]
+
+    def duplicate_sub_modules(self):
+        """
+        Map from the path ('<submodule>.<submodule>...') of each submodule
+        in the tree of this module that duplicates an earlier one to the
+        path of the earlier submodule.
+
+        Two submodules are duplicates if they have the same fingerprint
+        (class, parameters, module inputs and variables, see
+        `module_maker_fingerprint`) and their inputs, by their promoted
+        names in this module, are the same variables; e.g., a repeat whose
+        inputs are not promoted is not a duplicate of one whose inputs are.
+        Submodules are compared across the whole tree, level by level and
+        in the order they are added, so the shallowest copy is kept; the
+        submodules of a duplicate are not searched.
+        Submodules in feedback loops (at any level), that register an
+        objective, constraints or design variables, or whose parameters
+        cannot be hashed by content (e.g., lambdas) are not considered.
+
+        State of a submodule that is not in its `parameters` (e.g.,
+        attributes set in its `__init__`) is not part of the fingerprint;
+        such submodules must not be shared.
+        """
+        duplicates, _ = self._find_duplicate_sub_modules()
+        return {'.'.join(name for name, _ in chain): '.'.join(name for name, _ in original_chain)
+                for _, chain, original_chain in duplicates}
+
+    def _find_duplicate_sub_modules(self, exclude=()):
+        # Duplicates as (entries from this module down, chain, chain of the
+        # original) with the '(name, promotes)' chains of 'promoted_path_name',
+        # and the connections from the outputs of the originals to the
+        # consumers of the outputs of the duplicates, by their names in this
+        # module. Direct submodules named in 'exclude' are left out.
+        memo = dict()
+        first = dict()
+        duplicates = []
+        consumed = set()
+        # Level by level, so that the shallowest copy is kept
+        queue = deque([(self, (), (), False)])
+        while queue:
+            module_maker, entries, chain, in_loop = queue.popleft()
+            in_loops = {name for loop in module_maker_graph(module_maker).cycles() for name in loop}
+            for entry in module_maker.module_info:
+                if isinstance(entry, DeclaredVariable):
+                    consumed.add(promoted_path_name(entry.name, chain))
+                if not isinstance(entry, dict):
+                    continue
+                name = submodule_entry_name(entry)
+                if not entries and name in exclude:
+                    continue
+                submodule = entry['sub_module']
+                sub_entries = entries + (entry, )
+                sub_chain = chain + ((name, submodule_promotes(entry, module_maker.promoted_vars)), )
+                sub_in_loop = in_loop or name in in_loops
+                fingerprint = None
+                if not sub_in_loop and not _defines_problem(submodule):
+                    try:
+                        fingerprint = module_maker_fingerprint(submodule, memo)
+                    except TypeError:
+                        # Parameters that cannot be hashed by content, e.g., lambdas
+                        logger.debug('submodule %s cannot be fingerprinted, not shared', name)
+                if fingerprint is not None:
+                    sub_consumed, _ = _maker_interface(submodule)
+                    sources = tuple(sorted((var, promoted_path_name(var, sub_chain)) for var in sub_consumed))
+                    key = (fingerprint, sources)
+                    if key in first:
+                        duplicates.append((sub_entries, sub_chain, first[key]))
+                        continue
+                    first[key] = sub_chain
+                queue.append((submodule, sub_entries, sub_chain, sub_in_loop))
+
+        connections = []
+        for entries, chain, original_chain in duplicates:
+            _, produced = _maker_interface(entries[-1]['sub_module'])
+            for var in sorted(produced):
+                target = promoted_path_name(var, chain)
+                if target in consumed:
+                    connections.append((promoted_path_name(var, original_chain), target))
+        return duplicates, connections
+
+    def important_outputs(self, importance):
+        """
+        Names of the outputs of this module and all its submodules with an
+        importance in `(0, importance]`.
+        """
+        outputs = []
+        stack = [self]
+        while stack:
+            module_maker = stack.pop()
+            outputs += [name for name, output_importance in module_maker.module_output_importance.items()
+                        if 0 < output_importance <= importance]
+            stack.extend(entry['sub_module'] for entry in reversed(module_maker.module_info)
+                         if isinstance(entry, dict))
+        return outputs
+
+    @traced('assemble_csdl')
+    def assemble_csdl(self, prune=False, keep_outputs=None, importance=None, share_duplicates=False): 
+        """
+        Build the csdl `Model` of the module.
+
+        If `auto_sort_sub_modules` is True, submodules are ordered by their
+        data dependencies (see `sort_sub_modules`). If
+        `group_coupled_sub_modules` is True, submodules in a feedback loop
+        are added to a group model ('coupled_group_<k>') with
+        `coupled_nonlinear_solver` and `coupled_linear_solver`, so solver
+        iterations only cover the coupled part; the other submodules form a
+        feed-forward chain. Promoted variables keep their names, but the
+        unpromoted variables of a grouped submodule are then accessed as
+        'coupled_group_<k>.<submodule>.<name>'. A ValueError is raised if
+        there are feedback loops to group but no `coupled_nonlinear_solver`.
+
+        If `prune` is True, submodules that are not needed for the objective,
+        the constraints or the outputs in `keep_outputs` are not added (see
+        `unused_sub_modules`). Only the direct submodules are pruned.
+
+        If `importance` is given, a reduced model is assembled that only
+        computes the outputs with an importance in `(0, importance]` (see
+        `register_module_output`), the objective and the constraints, i.e.,
+        the model is pruned with these outputs added to `keep_outputs`.
+
+        If `share_duplicates` is True, submodules anywhere in the tree that
+        compute the same as an earlier submodule (see
+        `duplicate_sub_modules`) are not added. The outputs of the earlier
+        submodule are connected to the variables that read the outputs of
+        a dropped duplicate, so consumers get the same values; outputs of a
+        duplicate that nothing reads are not available in the model.
+        """
+        module_name = type(self).__name__
+        with trace_span('define_module', module_name):
+            self.define_module()
+        if importance is not None:
+            prune = True
+            keep_outputs = list(keep_outputs or ()) + self.important_outputs(importance)
+        loops = self.sort_sub_modules() if self.auto_sort_sub_modules else self.dataflow_graph().cycles()
+
+        # Entries of submodules that are not added to the model
+        pruned = set()
+        self.pruned_sub_modules = []
+        if prune:
+            self.pruned_sub_modules = self.unused_sub_modules(keep_outputs=keep_outputs)
+            pruned_names = set(self.pruned_sub_modules)
+            pruned = {id(entry) for entry in self.module_info
+                      if isinstance(entry, dict) and submodule_entry_name(entry) in pruned_names}
+            loops = [group for group in loops if not pruned_names.issuperset(group)]
+            logger.info('pruned %d of %d submodules of %s: %s', len(pruned),
+                        sum(isinstance(entry, dict) for entry in self.module_info), module_name,
+                        self.pruned_sub_modules)
+
+        self.shared_sub_modules = dict()
+        self.sharing_report = dict(evaluations=0, variables=0)
+        connections = []
+        if share_duplicates:
+            duplicates, connections = self._find_duplicate_sub_modules(exclude=self.pruned_sub_modules)
+            num_evaluations = 0
+            num_variables = 0
+            for entries, chain, original_chain in duplicates:
+                entry = entries[-1]
+                path = '.'.join(name for name, _ in chain)
+                self.shared_sub_modules[path] = '.'.join(name for name, _ in original_chain)
+                if len(entries) == 1:
+                    pruned.add(id(entry))
+                else:
+                    # The models of the submodules were assembled by 'add_module'
+                    parent = entries[-2]
+                    position = next(i for i, parent_entry in enumerate(parent['sub_module'].module_info)
+                                    if parent_entry is entry)
+                    parent_model = parent['csdl_model']
+                    parent_model.parameters['skipped'] = parent_model.parameters['skipped'] | {position}
+                entry_modules, entry_variables = count_module_tree(entry['sub_module'])
+                num_evaluations += entry_modules
+                num_variables += entry_variables
+            self.sharing_report = dict(evaluations=num_evaluations, variables=num_variables)
+            logger.info('shared %d duplicate submodules of %s, removing %d module evaluations and %d variables: %s',
+                        len(self.shared_sub_modules), module_name, num_evaluations, num_variables,
+                        self.shared_sub_modules)
+
+        coupled_groups = loops if self.group_coupled_sub_modules else []
+        if coupled_groups and self.coupled_nonlinear_solver is None:
+            raise ValueError(f'Submodules of {module_name} have feedback loops {coupled_groups}, '
+                             'but no coupled_nonlinear_solver is set to converge them')
+        self.coupled_groups = coupled_groups
+        # The model refers to entries by their position in 'module_info', so
+        # its state does not depend on object ids and can be pickled
+        skipped = {i for i, entry in enumerate(self.module_info) if id(entry) in pruned}
+        # Positions of the submodules of each coupled group
+        group_positions = [[] for _ in coupled_groups]
+        if coupled_groups:
+            group_index = {name: k for k, group in enumerate(coupled_groups) for name in group}
+            for i, entry in enumerate(self.module_info):
+                if isinstance(entry, dict):
+                    name = submodule_entry_name(entry)
+                    if name in group_index:
+                        group_positions[group_index[name]].append(i)
+            logger.debug('coupled submodules of %s: %s', module_name, coupled_groups)
         constraints = self.constraints
-        
-        class CSDLModel(Model):
-            def initialize(self): pass
-
-            def define(self):
-                vars = []
-                for entry in module_info: # self.module_info:
-                    
-                    # Inputs
-                    if isinstance(entry, DeclaredVariable):
-                        name = entry.name
-                        val = entry.val
-                        shape = entry.shape
-                        self.declare_variable(name=name, val=val, shape=shape)
-                        vars.append(name)
-
-                    elif isinstance(entry, Input):
-                        name = entry.name
-                        val = entry.val
-                        shape = entry.shape
-                        self.create_input(name=name, val=val, shape=shape)
-                        if name in design_variables:
-                            dv = design_variables[entry.name]
-                            self.add_design_variable(
-                                dv_name=entry.name,
-                                lower=dv['lower'],
-                                upper=dv['upper'],
-                                scaler=dv['scaler'],
-                            )
-                        vars.append(name)
-                        
-                    # Outputs
-                    elif isinstance(entry, Output):
-                        name =  entry.name
-                        self.register_output(name=name, var=entry)
-                        if name in objective.keys():
-                            self.add_objective(
-                                name=name,
-                                # ref=objective[name]['ref'],
-                                ref0=objective[name]['ref0'],
-                                index=objective[name]['index'],
-                                units=objective[name]['units'],
-                                adder=objective[name]['adder'],
-                                scaler=objective[name]['scaler'],
-                                parallel_deriv_color=objective[name]['parallel_deriv_color'],
-                                cache_linear_solution=objective[name]['cache_linear_solution'],
-                            )
-                        vars.append(name)
-
-                    elif isinstance(entry, Concatenation):
-                        name = entry.name
-                        self.register_output(name=name, var=entry)
-                        if name in objective.keys():
-                            self.add_objective(
-                                name=name,
-                                # ref=objective[name]['ref'],
-                                ref0=objective[name]['ref0'],
-                                index=objective[name]['index'],
-                                units=objective[name]['units'],
-                                adder=objective[name]['adder'],
-                                scaler=objective[name]['scaler'],
-                                parallel_deriv_color=objective[name]['parallel_deriv_color'],
-                                cache_linear_solution=objective[name]['cache_linear_solution'],
-                            )
-                        vars.append(name)
-
-                    # Adding submodel
-                    elif isinstance(entry, dict):
-                        csdl_submodel = entry['csdl_model']
-                        submodule = entry['sub_module']
-                        module_inputs = submodule.module_inputs
-                        name = entry['name']
-                        promote = entry['promote']
-                        if promote is None:
-                            promotes=None
-                        else:
-                            promotes = promote + submodule.promoted_vars + [e for e in all_promoted_vars if e in module_inputs]
-                            print('PROMOTES=', promotes)
-                        self.add(csdl_submodel, name, promotes)
-                    
-                    # Implicit operation
-                    elif isinstance(entry, ImplicitOperationFactory):
-                        print('IMPLICIT')
-                        csdl_model = entry.model
-                        self.create_implicit_operation(csdl_model)
-                        pass
-                    
-                    else:
-                        raise NotImplementedError
-
-                    # Adding constraints
-                
-                constraint_vars = list(set(vars).intersection(list(constraints.keys())))
-                
-        
-        print(print('CONSTRAINTS', constraints))
-        csdl_model = CSDLModel()
+
+        logger.debug('CONSTRAINTS %s', constraints)
+        csdl_model = CSDLModel(
+            module_name=module_name,
+            module_info=self.module_info,
+            promoted_vars=self.promoted_vars,
+            design_variables=self.design_variables,
+            objective=self.objective,
+            skipped=skipped,
+            coupled_groups=group_positions,
+            connections=connections,
+            nonlinear_solver=self.coupled_nonlinear_solver,
+            linear_solver=self.coupled_linear_solver,
+        )
         for name in constraints.keys():
             csdl_model.add_constraint(
                 name=name,
@@ -1217,6 +1520,7 @@ class ModuleMaker:
         else:
             return outs[0]
         
+    @traced('create_implicit_operation')
     def create_implicit_operation(self, module): 
         # self_arg = self.assemble_csdl()
         csdl_model = module.assemble_csdl()
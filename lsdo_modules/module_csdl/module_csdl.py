@@ -1,15 +1,26 @@
 from csdl import Model
 import numpy as np
 from csdl import GraphRepresentation
-import warnings
 # from lsdo_modules.utils.make_xdsm import make_xdsm
 from itertools import count
-
-
-def custom_formatwarning(msg, *args, **kwargs):
-    # ignore everything except the message
-    return 'UserWarning: ' + str(msg) + '\n'
-warnings.formatwarning = custom_formatwarning
+import functools
+from lsdo_modules.utils.logger import logger
+from lsdo_modules.utils.trace import traced
+from lsdo_modules.utils.module_stats import module_csdl_stats
+from lsdo_modules.utils.xdsm_index import ModuleTreeIndex, build_xdsm
+from lsdo_modules.utils.dsm_text import generate_dsm_text
+from lsdo_modules.utils.arrays import as_input_array, resolve_input
+from lsdo_modules.utils.dataflow import module_csdl_graph
+
+
+def _sorting_define(define):
+    @functools.wraps(define)
+    def wrapper(self, *args, **kwargs):
+        result = define(self, *args, **kwargs)
+        if self.auto_sort_sub_modules and len(self.sub_modules) > 1:
+            self.sort_sub_modules()
+        return result
+    return wrapper
 
 
 class ModuleCSDL(Model):
@@ -18,6 +29,17 @@ class ModuleCSDL(Model):
     The API mirrors that of the CSDL Model class. 
     """ 
     _ids = count(0)
+
+    # Reorder submodules by their data dependencies after 'define'; off by
+    # default because it changes the order of the submodels in csdl
+    auto_sort_sub_modules = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Record a trace span for every 'define' when tracing is enabled
+        if 'define' in cls.__dict__:
+            cls.define = _sorting_define(traced('define')(cls.__dict__['define']))
+
     def __init__(
             self, 
             module=None, 
@@ -39,6 +61,7 @@ class ModuleCSDL(Model):
         self.sub_modules = dict()
         self._module_output_names = list()
         self._auto_iv = list()
+        self._num_implicit_operations = 0
         
         super().__init__(**kwargs)
 
@@ -149,8 +172,7 @@ class ModuleCSDL(Model):
                         #               (f"nor an output that is computed upstream (all upstream outputs: {self._module_output_names}).")
                         #               (f"This variable will by of type 'DeclaredVariable' with shape {shape} and value {val}"))
 
-                        print(self.module_inputs.keys())
-                        print('\n')
+                        logger.debug('module inputs %s', self.module_inputs.keys())
                         error_message = f"One or more unknown or missing user-defined variable(s) {list(self.module.inputs.keys())}. "\
                                         f"The developer of module '{type(self)}' has specified variable '{name}' as an input to their model, "\
                                         "which requires the user to set this variable with 'set_module_input' or it needs to "\
@@ -159,7 +181,8 @@ class ModuleCSDL(Model):
                 # else: the variable is set by the user via 'set_module_input'
                 else:
                     mod_var = self.module.inputs[name]
-                    mod_var_val = mod_var['val']
+                    # Memory-mapped inputs are mapped here, when the value is needed
+                    mod_var_val = resolve_input(mod_var['val'])
                     
                     # Check whether the sizes of the set module input and the to be 
                     # created/declares CSDL variable match in size
@@ -168,7 +191,8 @@ class ModuleCSDL(Model):
                     elif np.size(mod_var_val) == 1:
                         pass
                     else:
-                        mod_var_val = mod_var_val.reshape(shape)
+                        # View with the new shape, the user's array is not copied
+                        mod_var_val = as_input_array(mod_var_val, shape=shape)
                     
                     # Check whether variable is a float, int or array and assign 
                     # shape accordingly
@@ -214,11 +238,6 @@ class ModuleCSDL(Model):
                     elif mod_var['dv_flag'] is True:
                         
                         if self.prepend:
-                            if 'rpm' in name:
-                                print('prepend')
-                                print(name)
-                                print(f'{self.prepend}_{name}')
-                                # exit()
                             var_name = f'{self.prepend}_{name}'
                             input_variable = self.create_input(
                                 name=var_name,
@@ -231,6 +250,7 @@ class ModuleCSDL(Model):
                             upper = mod_var['upper']
                             scaler = mod_var['scaler']
                             self.add_design_variable(var_name, lower=lower, upper=upper, scaler=scaler)
+                            logger.debug('design variable %s (prepend %s)', var_name, self.prepend)
                             self.module_inputs[var_name] = dict(
                                 shape=shape, 
                                 importance=importance,
@@ -356,6 +376,7 @@ class ModuleCSDL(Model):
         
         return output_variable
     
+    @traced('add_module', label=lambda self, submodule, name, *args, **kwargs: name)
     def add_module(
             self,
             submodule,
@@ -408,8 +429,11 @@ class ModuleCSDL(Model):
                 declared_vars=submodule.module_declared_vars,
                 outputs=submodule.module_outputs,
                 promoted_vars=promotes+submodule.promoted_vars,
+                promotes=promotes+submodule.promoted_vars,
+                prepend=submodule.prepend,
                 submodules=submodule.sub_modules,
                 auto_iv=submodule._auto_iv,
+                implicit_operations=submodule._num_implicit_operations,
             )
         
         # 2) Promote the entire submodel
@@ -426,11 +450,71 @@ class ModuleCSDL(Model):
                 declared_vars=submodule.module_declared_vars,
                 outputs=submodule.module_outputs,
                 promoted_vars=list(submodule.module_declared_vars.keys()) + list(submodule.module_inputs.keys()) + list(submodule.module_outputs.keys()),
+                promotes=None,
+                prepend=submodule.prepend,
                 submodules=submodule.sub_modules,
                 auto_iv=submodule._auto_iv,
+                implicit_operations=submodule._num_implicit_operations,
             )
         # print('sub_module', self.sub_modules)
 
+    @traced('create_implicit_operation')
+    def create_implicit_operation(self, model):
+        """
+        Create an implicit operation whose residuals are defined by `model`.
+
+        Calls the `create_implicit_operation` method of the csdl `Model` class.
+        """
+        self._num_implicit_operations += 1
+        return super().create_implicit_operation(model)
+
+    def stats(self):
+        """
+        Per-module and cumulative counts of inputs, declared variables,
+        outputs, promoted variables, implicit operations and array
+        elements/bytes, plus tree depth and fan-out. See
+        `lsdo_modules.utils.module_stats.format_stats` for a text report.
+        """
+        return module_csdl_stats(self)
+
+    def dataflow_graph(self):
+        """
+        Dataflow graph (`ModuleGraph`) of the submodules, built from their
+        inputs, outputs and the connections made with `connect_modules`.
+        """
+        return module_csdl_graph(self)
+
+    def sort_sub_modules(self):
+        """
+        Reorder the submodules so that each one comes after the modules it
+        depends on. The order is stable and modules in feedback loops are
+        kept together. Called automatically after `define` if
+        `auto_sort_sub_modules` is True.
+
+        Returns the feedback loops (lists of submodule names) that remain.
+        """
+        graph = self.dataflow_graph()
+        components = graph.strongly_connected_components()
+        order = [name for component in components for name in component]
+        if order != list(self.sub_modules):
+            logger.debug('reordering submodules of %s: %s', self.name, order)
+            self.sub_modules = {name: self.sub_modules[name] for name in order}
+            # Submodels added with 'add' are stored by csdl in 'subgraphs'
+            subgraphs = getattr(self, 'subgraphs', None)
+            if isinstance(subgraphs, list):
+                # Permute only the slots of the submodules, other submodels stay in place
+                position = {name: i for i, name in enumerate(order)}
+                slots = [i for i, subgraph in enumerate(subgraphs)
+                         if getattr(subgraph, 'name', None) in position]
+                module_subgraphs = sorted((subgraphs[i] for i in slots),
+                                          key=lambda subgraph: position[subgraph.name])
+                for i, subgraph in zip(slots, module_subgraphs):
+                    subgraphs[i] = subgraph
+        loops = [component for component in components if len(component) > 1]
+        if loops:
+            logger.debug('feedback loops between submodules of %s: %s', self.name, loops)
+        return loops
+
     def connect_modules(self, a: str, b: str):
         """
         Connect variables between modules. 
@@ -441,128 +525,37 @@ class ModuleCSDL(Model):
 
 
     def visualize_implementation(self, importance=0, show_outputs=True):
-        from  pyxdsm.XDSM import (
-            XDSM,
-            OPT,
-            SUBOPT,
-            SOLVER,
-            DOE,
-            IFUNC,
-            FUNC,
-            GROUP,
-            IGROUP,
-            METAMODEL,
-            LEFT,
-            RIGHT,
-        )
-        def find_up_stream_module(list_of_tuples, inputs_from_upstream):
-            modules = []
-            for input_from_upstream in inputs_from_upstream:
-                for module, output in list_of_tuples:
-                    if input_from_upstream == output:
-                        modules.append(module)
-            return modules
-
-        def find_inputs_outputs(dictionary, inp_out_list=[], inp_out='inputs'):
-            for k, v in dictionary.items():
-                if k == inp_out:
-                    for k2, v2 in v.items():
-                        if v2['importance'] <= (importance+1):
-                            inp_out_list.append(k2)
-                        else:
-                            pass
-                    else:
-                        pass
-                elif isinstance(v, dict):
-                    if inp_out_list:
-                        find_inputs_outputs(v, inp_out_list, inp_out=inp_out)
-                    else:
-                        find_inputs_outputs(v, inp_out_list, inp_out=inp_out)
-                else:
-                    pass
-            
-            return inp_out_list
-        # TODO: dsm connections for nesting 
-        def unpack_sub_modules(dictionary, importance_outputs = [], sub_modules = []):
-            for module, module_values in dictionary.items():
-                # Collect all module outputs with importance less than
-                # or equal to the importance specified by the user
-                importance_outputs_copy = importance_outputs.copy()
-                for sub_mod_out, sub_mod_out_par in module_values['outputs'].items():
-                    if sub_mod_out_par['importance'] > 0 and sub_mod_out_par['importance']  <= importance:
-                        importance_outputs.append((module, sub_mod_out))
-                # If there are "important" outputs call 'add_system'
-                if set(importance_outputs) != set(importance_outputs_copy):
-                    x.add_system(module, FUNC, generate_dsm_text(module))
-                    sub_modules.append((module, module_values))
-                    if show_outputs is True:
-                        x.add_output(module, [generate_dsm_text(output) for output in  list(set([t[1] for t in importance_outputs]) & set(list(module_values['outputs'].keys())))], side=RIGHT)
-                    
-                    # Add any inputs defined by the user
-                    inputs_from_user = list(set(user_module_inputs) & set(list(module_values['inputs'].keys()) + list(module_values['declared_vars'].keys())))
-                    if inputs_from_user:
-                        x.add_input(module, [generate_dsm_text(connection) for connection in inputs_from_user], label_width=2)
-                    # inputs_auto_iv = list(set(auto_iv_inputs) & set(list(module_values['inputs'].keys())))
-                    # if inputs_auto_iv:
-                    #     x.add_input(module, [generate_dsm_text(connection) for connection in inputs_auto_iv], faded=True)
-                    
-                    # Check if there are any inputs from upstream modules
-                    inputs_from_upstream = list(set(list(module_values['declared_vars'].keys())) & set([t[1] for t in importance_outputs]))
-                    # print('inputs_from_upstream', inputs_from_upstream)
-                    # print('module', module)
-                    # print('module_outputs', list(module_values['outputs'].keys()))
-                    # print('\n')
-                    if inputs_from_upstream:
-                        upstream_modules = find_up_stream_module(importance_outputs, inputs_from_upstream)
-                        for upstream_module in upstream_modules:
-                            x.connect(upstream_module, module, [generate_dsm_text(connection) for connection in inputs_from_upstream])
-                if module_values['submodules']:
-                    unpack_sub_modules(module_values['submodules'], importance_outputs=importance_outputs)
-            
-            # print('importance_outputs', importance_outputs)
-            if not importance_outputs:
-                raise Exception('All registered outputs have zero importance or have higher importance than specified by user')
+        """
+        Write an XDSM diagram ('<name>_xdsm') of the module tree showing
+        all modules with outputs up to the specified `importance`.
 
-            return module, module_values
+        The `sub_modules` tree is indexed once (see `ModuleTreeIndex`), so
+        the diagram is built in time linear in the number of variables.
+        """
+        index = ModuleTreeIndex(self)
+        x = build_xdsm(index, importance=importance, show_outputs=show_outputs, label=generate_dsm_text)
+        x.write(f'{self.name}_xdsm')
 
+    def visualize_implementations(self, importance_levels, show_outputs=True, build=True):
+        """
+        Write one XDSM diagram ('<name>_xdsm_<importance>') per importance
+        level in `importance_levels`.
 
-        x = XDSM()
-        from examples.viz_test import generate_dsm_text
-        
-        # print(find_inputs_outputs(self.sub_modules, inp_out_list=[], inp_out='inputs'))
-        # print(find_inputs_outputs(self.sub_modules, inp_out_list=[], inp_out='outputs'))
-        # exit()
-        
-        user_module_inputs =  find_inputs_outputs(self.sub_modules, inp_out_list=[], inp_out='inputs') + list(self.module_inputs.keys())
-        # auto_iv_inputs = find_inputs_outputs(self.sub_modules,inp_out_list=[], inp_out='auto_iv')
-        # print('user_module_inputs', user_module_inputs)
-        # exit()
-                                           
-        if importance == 0:
-            # print('NAME', self.module_inputs)
-            x.add_system(self.name, OPT, generate_dsm_text(self.name))
-            parent_module_inputs = list(self.module_inputs.keys())
-            parent_module_outputs = list(self.module_outputs.keys())
-            if not parent_module_inputs:
-                parent_module_inputs = user_module_inputs
-            if not parent_module_outputs:
-                parent_module_outputs = find_inputs_outputs(self.sub_modules[list(self.sub_modules)[-1]], inp_out_list=[],inp_out='outputs')
-
-            # print('inputs_from_user', ",\,".join([generate_dsm_text(connection) for connection in parent_module_inputs]))
-            x.add_input(self.name, [generate_dsm_text(input) for input in parent_module_inputs], label_width=2)
-            x.add_output(self.name, [generate_dsm_text(input) for input in parent_module_outputs], side=RIGHT)
-        
-        else:
-            module, module_values = unpack_sub_modules(self.sub_modules)
-            print(module_values)
-            # for module, module_values in self.sub_modules.items():
-                # pass
-
-            # Lastly, show outputs of last module
-            # x.add_output(module, [generate_dsm_text(output) for output in list(module_values['outputs'].keys())], side=RIGHT)
-            # print(list(module_values['outputs'].keys()))
-        # exit()
-        x.write(f'{self.name}_xdsm')
+        The `sub_modules` tree is traversed once for all levels and LaTeX
+        labels are memoized, which is cheaper than calling
+        `visualize_implementation` for every level. If `build` is False,
+        only the .tex files are written (no pdflatex run).
+
+        Returns the list of written file names (without extension).
+        """
+        index = ModuleTreeIndex(self)
+        file_names = []
+        for importance in importance_levels:
+            x = build_xdsm(index, importance=importance, show_outputs=show_outputs, label=generate_dsm_text)
+            file_name = f'{self.name}_xdsm_{importance}'
+            x.write(file_name, build=build)
+            file_names.append(file_name)
+        return file_names
 
 
     
@@ -0,0 +1,156 @@
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from lsdo_modules.utils.logger import logger
+
+
+def as_input_array(val, shape=None, copy=False, read_only=False):
+    """
+    Prepare a module input value without copying it.
+
+    Scalars are returned unchanged. Arrays are returned as they are or as a
+    view: reshaping sets the shape of a view, which never copies, and
+    `read_only=True` returns a non-writeable view so the module cannot
+    modify the caller's array. Data is only copied if `copy=True`, or if
+    a non-contiguous array has to be reshaped (logged at debug level).
+    Other values (e.g., lists) are converted with `np.asarray`.
+    Memory-mapped sources are kept unmapped unless a copy is requested.
+    """
+    if isinstance(val, (int, float)):
+        return val
+    if isinstance(val, MemmapSource):
+        if copy:
+            return as_input_array(np.array(val.array), shape=shape, read_only=read_only)
+        if shape is None:
+            return val
+        val = val.array
+
+    original = val
+    if not isinstance(val, np.ndarray):
+        val = np.asarray(val)
+    elif copy:
+        val = val.copy()
+
+    if shape is not None and val.shape != tuple(shape):
+        view = val.view()
+        try:
+            view.shape = shape
+        except AttributeError:
+            # The array is not contiguous, so there is no view with this shape
+            logger.debug('copying non-contiguous array of shape %s to reshape to %s', val.shape, shape)
+            view = val.reshape(shape)
+        val = view
+
+    if read_only and val.flags.writeable:
+        if val is original:
+            # Never change the flags of the caller's array
+            val = val.view()
+        val.flags.writeable = False
+
+    return val
+
+
+class MemmapSource:
+    """
+    Module input value that is memory-mapped from a `.npy` file or from an
+    uncompressed member of a `.npz` file (written with `np.savez`).
+
+    The file is only mapped when the value is needed (`array`), and a
+    source is pickled as its file name and key. Worker processes that
+    receive a module with a memory-mapped input therefore share one
+    page-cache copy of the data instead of holding private copies.
+    """
+    def __init__(self, file_name, key=None):
+        self.file_name = os.fspath(file_name)
+        self.key = key
+        self._array = None
+        if self.file_name.endswith('.npz') and key is None:
+            raise ValueError(f"A key is required for members of '{self.file_name}'")
+
+    def __getstate__(self):
+        return dict(file_name=self.file_name, key=self.key)
+
+    def __setstate__(self, state):
+        self.file_name = state['file_name']
+        self.key = state['key']
+        self._array = None
+
+    def __eq__(self, other):
+        if not isinstance(other, MemmapSource):
+            return NotImplemented
+        return (self.file_name, self.key) == (other.file_name, other.key)
+
+    def __hash__(self):
+        return hash((self.file_name, self.key))
+
+    def __repr__(self):
+        if self.key is None:
+            return f"MemmapSource('{self.file_name}')"
+        return f"MemmapSource('{self.file_name}', key='{self.key}')"
+
+    @property
+    def array(self):
+        """
+        Read-only `np.memmap` of the data, mapped on first access.
+        """
+        if self._array is None:
+            if self.key is None:
+                self._array = np.load(self.file_name, mmap_mode='r')
+            else:
+                self._array = self._map_npz_member()
+        return self._array
+
+    @property
+    def shape(self):
+        return self.array.shape
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    @property
+    def size(self):
+        return self.array.size
+
+    def _map_npz_member(self):
+        # np.load does not memory-map .npz members, so the member's data
+        # is mapped at its offset in the zip file
+        member = f'{self.key}.npy'
+        with zipfile.ZipFile(self.file_name) as archive:
+            try:
+                info = archive.getinfo(member)
+            except KeyError:
+                raise KeyError(f"'{self.key}' is not in '{self.file_name}'")
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"'{self.key}' in '{self.file_name}' is compressed and cannot be "
+                             "memory-mapped; save it with np.savez instead of np.savez_compressed")
+
+        with open(self.file_name, 'rb') as f:
+            # The local file header has a fixed size of 30 bytes followed by
+            # the file name and an extra field of variable length
+            f.seek(info.header_offset)
+            local_header = f.read(30)
+            name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+            offset = f.tell()
+
+        return np.memmap(self.file_name, dtype=dtype, mode='r', offset=offset, shape=shape,
+                         order='F' if fortran_order else 'C')
+
+
+def resolve_input(val):
+    """
+    Value of a module input, where memory-mapped sources are mapped.
+    """
+    if isinstance(val, MemmapSource):
+        return val.array
+    return val
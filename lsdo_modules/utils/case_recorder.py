@@ -0,0 +1,343 @@
+import collections
+import fnmatch
+import json
+import os
+
+import numpy as np
+
+from lsdo_modules.utils.logger import logger
+from lsdo_modules.utils.dataflow import module_csdl_chains, module_maker_chains, promoted_path_name
+
+
+# Directory of the variables of the root module, whose path is ''
+_root_directory = '__root__'
+# Directory of the names of the cases in each chunk
+_cases_directory = '__cases__'
+_index_file = 'index.json'
+
+
+def module_variables(module):
+    """
+    Names of the inputs and outputs of every module in the tree of a
+    ModuleCSDL (from its `sub_modules` dictionaries) or of an assembled
+    ModuleMaker (from `module_info`), as `{path: [names]}`, where `path`
+    is the tuple of submodule names from the root module (see
+    `submodule_entry_name` for submodules added without a name).
+    """
+    variables = dict()
+    if isinstance(module.module_outputs, dict):
+        queue = [((), dict(inputs=module.module_inputs, declared_vars=module.module_declared_vars,
+                           outputs=module.module_outputs, submodules=module.sub_modules))]
+        while queue:
+            path, values = queue.pop(0)
+            names = list(values['inputs']) + list(values['declared_vars']) + list(values['outputs'])
+            variables[path] = list(dict.fromkeys(names))
+            queue.extend((path + (name, ), sub_values) for name, sub_values in values['submodules'].items())
+    else:
+        from lsdo_modules.utils.unpack_module import iter_module_records
+
+        for path, section, name, _ in iter_module_records(module.module_info):
+            if section == 'Submodules':
+                variables.setdefault(path, [])
+            elif name not in variables.setdefault(path, []):
+                variables[path].append(name)
+    return variables
+
+
+def _module_chains(module):
+    # Promotions of the modules in the tree, like 'module_variables'
+    if isinstance(module.module_outputs, dict):
+        return module_csdl_chains(module)
+    return module_maker_chains(module.module_info, module.promoted_vars)
+
+
+def _module_directory(path):
+    return path or _root_directory
+
+
+def _write_atomic(file_name, write):
+    # Write to a temporary file first so that readers never see partial files
+    temp_file_name = file_name + '.tmp'
+    with open(temp_file_name, 'wb') as f:
+        write(f)
+    os.replace(temp_file_name, file_name)
+
+
+class CaseRecorder:
+    """
+    Stream the inputs and outputs of a module tree to disk, one case (an
+    optimizer iteration or a sweep sample) per call of `record`.
+
+    Values are grouped by module path: the variables of each module are
+    buffered for `chunk_size` cases and then written as one compressed
+    `.npz` file per module (`<directory>/<module path>/chunk_<k>.npz`,
+    one array with a leading case axis per variable), so memory use is
+    bounded by `chunk_size` cases. The names of the cases of each chunk are
+    written to `<directory>/__cases__/chunk_<k>.json`.
+    `<directory>/index.json` lists the variables, their shapes and the
+    number of recorded cases; it is rewritten with every chunk. A promoted
+    variable shared by several modules is stored once and referenced by
+    the others.
+
+        with CaseRecorder('history', module) as recorder:
+            for x in samples:
+                sim['x'] = x
+                sim.run()
+                recorder.record(sim)
+
+    `module` is a ModuleCSDL or an assembled ModuleMaker, or a dictionary
+    `{path: [names]}` (see `module_variables`). Variables are read from the
+    source passed to `record` (e.g., a Simulator) by the names they are
+    promoted to in the root module (see `promoted_path_name`); the
+    variables of a dictionary are read by `'<path>.<name>'`. Variables
+    that are not found in the first case and variables not matching any of
+    the `includes` patterns (e.g., 'aero.*', matched against
+    '<path>.<name>') are not recorded.
+    """
+    def __init__(self, directory, module, chunk_size=100, includes=None):
+        if chunk_size < 1:
+            raise ValueError(f'chunk_size must be at least 1, got {chunk_size}')
+        self.directory = str(directory)
+        self.chunk_size = chunk_size
+        if os.path.exists(os.path.join(self.directory, _index_file)):
+            raise FileExistsError(f'{self.directory} already contains recorded cases')
+        os.makedirs(self.directory, exist_ok=True)
+
+        if isinstance(module, dict):
+            variables = module
+            chains = dict()
+        else:
+            variables = module_variables(module)
+            chains = _module_chains(module)
+        # Names in the source of the recorded variables, {path: {name: source name}}
+        self._variables = dict()
+        for path, names in variables.items():
+            chain = chains.get(path)
+            path = '.'.join(path) if isinstance(path, tuple) else path
+            source_names = dict()
+            for name in names:
+                full_name = f'{path}.{name}' if path else name
+                if includes is None or any(fnmatch.fnmatchcase(full_name, pattern) for pattern in includes):
+                    source_names[name] = full_name if chain is None else promoted_path_name(name, chain)
+            if source_names:
+                self._variables[path] = source_names
+
+        self.num_cases = 0
+        # Names of the cases in the current chunk
+        self._case_names = []
+        self._num_buffered = 0
+        self._num_chunks = 0
+        self._num_written = 0
+        # Filled on the first case: {path: {name: index entry}} and the
+        # buffers of the stored variables {(path, name): (source name, array)}
+        self._index = None
+        self._buffers = None
+        self._closed = False
+
+    def _resolve(self, source):
+        # Find the name of every variable in the source and allocate the buffers
+        index = dict()
+        buffers = dict()
+        stored = dict()
+        num_stored = collections.Counter()
+        for path, names in self._variables.items():
+            module_index = index.setdefault(path, dict())
+            for name, source_name in names.items():
+                try:
+                    val = np.asarray(source[source_name])
+                except KeyError:
+                    logger.debug('variable %s of module %r not found, not recorded', name, path)
+                    continue
+                if source_name in stored:
+                    module_index[name] = dict(alias=list(stored[source_name]))
+                else:
+                    stored[source_name] = (path, name)
+                    # Arrays are saved positionally ('arr_<k>'), so names
+                    # cannot clash with arguments of np.savez_compressed
+                    key = f'arr_{num_stored[path]}'
+                    num_stored[path] += 1
+                    module_index[name] = dict(shape=list(val.shape), dtype=val.dtype.str, key=key)
+                    buffers[(path, name)] = (source_name, np.empty((self.chunk_size, ) + val.shape, dtype=val.dtype))
+        self._index = index
+        self._buffers = buffers
+
+    def record(self, source, name=None):
+        """
+        Record the values of all variables of the module tree from `source`
+        (e.g., a Simulator or a dictionary of values) as the next case.
+        """
+        if self._closed:
+            raise RuntimeError('CaseRecorder is closed')
+        if self._buffers is None:
+            self._resolve(source)
+        i = self._num_buffered
+        for source_name, buffer in self._buffers.values():
+            buffer[i] = source[source_name]
+        self._num_buffered += 1
+        self.num_cases += 1
+        self._case_names.append(f'case_{self.num_cases - 1}' if name is None else str(name))
+        if self._num_buffered == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered cases to disk and update the index. A partly
+        filled chunk is rewritten when it is flushed again.
+        """
+        if self._buffers is None or self._num_written == self.num_cases:
+            return
+        n = self._num_buffered
+        arrays_by_path = collections.defaultdict(list)
+        for (path, name), (_, buffer) in self._buffers.items():
+            arrays_by_path[path].append(buffer[:n])
+        for path, arrays in arrays_by_path.items():
+            module_directory = os.path.join(self.directory, _module_directory(path))
+            os.makedirs(module_directory, exist_ok=True)
+            file_name = os.path.join(module_directory, f'chunk_{self._num_chunks:06d}.npz')
+            _write_atomic(file_name, lambda f: np.savez_compressed(f, *arrays))
+        cases_directory = os.path.join(self.directory, _cases_directory)
+        os.makedirs(cases_directory, exist_ok=True)
+        case_names = json.dumps(self._case_names).encode()
+        _write_atomic(os.path.join(cases_directory, f'chunk_{self._num_chunks:06d}.json'),
+                      lambda f: f.write(case_names))
+        self._num_written = self.num_cases
+        if n == self.chunk_size:
+            self._num_chunks += 1
+            self._num_buffered = 0
+            self._case_names = []
+        self._write_index()
+        logger.debug('recorded %d cases to %s', self.num_cases, self.directory)
+
+    def _write_index(self):
+        index = dict(
+            chunk_size=self.chunk_size,
+            num_cases=self._num_written,
+            modules=self._index or dict(),
+        )
+        _write_atomic(os.path.join(self.directory, _index_file),
+                      lambda f: f.write(json.dumps(index, separators=(',', ':')).encode()))
+
+    def close(self):
+        """
+        Write the remaining cases and the index.
+        """
+        if self._closed:
+            return
+        self.flush()
+        self._write_index()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CaseReader:
+    """
+    Random access to the cases written by a `CaseRecorder`. Reading a
+    value only decompresses the variable in the chunk that contains the
+    case; the last `cache_size` decompressed chunks of variables are kept.
+    Only cases written to disk (see `CaseRecorder.flush`) are visible.
+    """
+    def __init__(self, directory, cache_size=8):
+        self.directory = str(directory)
+        with open(os.path.join(self.directory, _index_file)) as f:
+            index = json.load(f)
+        self.chunk_size = index['chunk_size']
+        self.num_cases = index['num_cases']
+        self._modules = index['modules']
+        self._case_names = None
+        self._cache = collections.OrderedDict()
+        self._cache_size = cache_size
+
+    @property
+    def case_names(self):
+        """
+        Names of the recorded cases, read from the chunks on first use.
+        """
+        if self._case_names is None:
+            case_names = []
+            for k in range(-(-self.num_cases // self.chunk_size)):
+                with open(os.path.join(self.directory, _cases_directory, f'chunk_{k:06d}.json')) as f:
+                    case_names += json.load(f)
+            self._case_names = case_names[:self.num_cases]
+        return self._case_names
+
+    @property
+    def module_paths(self):
+        """
+        Paths ('' for the root module) of the modules with recorded variables.
+        """
+        return list(self._modules)
+
+    def variables(self, path=''):
+        """
+        Names of the recorded variables of the module at `path`.
+        """
+        return list(self._modules[path])
+
+    def shape(self, path, name):
+        """
+        Shape of the variable `name` of the module at `path` in one case.
+        """
+        path, name = self._stored(path, name)
+        return tuple(self._modules[path][name]['shape'])
+
+    def _stored(self, path, name):
+        try:
+            entry = self._modules[path][name]
+        except KeyError:
+            raise KeyError(f'Variable {name!r} of module {path!r} was not recorded') from None
+        if 'alias' in entry:
+            return tuple(entry['alias'])
+        return path, name
+
+    def _chunk(self, path, name, k):
+        key = (path, name, k)
+        try:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        except KeyError:
+            pass
+        file_name = os.path.join(self.directory, _module_directory(path), f'chunk_{k:06d}.npz')
+        with np.load(file_name) as chunk:
+            values = chunk[self._modules[path][name]['key']]
+        self._cache[key] = values
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return values
+
+    def get(self, case, path, name):
+        """
+        Value of the variable `name` of the module at `path` in case
+        `case` (an index, negative indices count from the last case, or
+        a case name).
+        """
+        if isinstance(case, str):
+            case = self.case_names.index(case)
+        if case < 0:
+            case += self.num_cases
+        if not 0 <= case < self.num_cases:
+            raise IndexError(f'Case {case} out of range for {self.num_cases} recorded cases')
+        path, name = self._stored(path, name)
+        return self._chunk(path, name, case // self.chunk_size)[case % self.chunk_size]
+
+    def case(self, case):
+        """
+        Values of all recorded variables in case `case` as `{path: {name: value}}`.
+        """
+        return {path: {name: self.get(case, path, name) for name in names}
+                for path, names in self._modules.items()}
+
+    def history(self, path, name):
+        """
+        Values of the variable `name` of the module at `path` in all cases,
+        stacked along the first axis.
+        """
+        path, name = self._stored(path, name)
+        num_chunks = -(-self.num_cases // self.chunk_size)
+        if num_chunks == 0:
+            return np.empty((0, ) + self.shape(path, name))
+        return np.concatenate([self._chunk(path, name, k) for k in range(num_chunks)])
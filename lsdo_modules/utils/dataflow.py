@@ -0,0 +1,325 @@
+import heapq
+
+
+class ModuleGraph:
+    """
+    Dataflow graph between the submodules of one module.
+
+    Module `a` precedes module `b` if `b` consumes a variable that `a`
+    produces (variables are matched by their promoted name) or if a
+    connection `('a.<var>', 'b.<var>')` was made explicitly. Orderings are
+    stable: a module is only moved if it runs before a module it depends on.
+    """
+    def __init__(self, names, consumes, produces, connections=()):
+        self.names = list(names)
+        self._position = {name: position for position, name in enumerate(self.names)}
+        self.consumes = {name: set(consumes.get(name, ())) for name in self.names}
+        self.produces = {name: set(produces.get(name, ())) for name in self.names}
+
+        producers = dict()
+        for name in self.names:
+            for var in produces.get(name, ()):
+                producers.setdefault(var, []).append(name)
+
+        # Successors of every module, in insertion order
+        self.successors = {name: dict() for name in self.names}
+        for name in self.names:
+            for var in consumes.get(name, ()):
+                for producer in producers.get(var, ()):
+                    if producer != name:
+                        self.successors[producer][name] = None
+        for connection in connections:
+            source, target = connection[0], connection[1]
+            source_module = source.split('.', 1)[0]
+            target_module = target.split('.', 1)[0]
+            if source_module in self._position and target_module in self._position \
+                    and source_module != target_module:
+                self.successors[source_module][target_module] = None
+
+    def strongly_connected_components(self):
+        """
+        Strongly connected components (Tarjan's algorithm, iterative) in
+        topological order. Modules in a component are in their original order.
+        """
+        index = dict()
+        lowlink = dict()
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+
+        for root in self.names:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self.successors[root]))]
+            while work:
+                node, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(self.successors[successor])))
+                        break
+                    elif successor in on_stack:
+                        lowlink[node] = min(lowlink[node], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node])
+                    if lowlink[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.remove(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        components.append(sorted(component, key=self._position.__getitem__))
+
+        # Tarjan's algorithm finds components in reverse topological order;
+        # reorder them stably (Kahn's algorithm on the condensed graph)
+        components.reverse()
+        return self._stable_order(components)
+
+    def cycles(self):
+        """
+        Feedback loops, i.e., strongly connected components with more than one module.
+        """
+        return [component for component in self.strongly_connected_components() if len(component) > 1]
+
+    def topological_order(self):
+        """
+        Stable topological order of the modules. Raises a ValueError that
+        lists the feedback loops if the graph has cycles.
+        """
+        components = self.strongly_connected_components()
+        cycles = [component for component in components if len(component) > 1]
+        if cycles:
+            raise ValueError(f'Modules have cyclic data dependencies: {cycles}')
+        return [component[0] for component in components]
+
+    def order(self):
+        """
+        Stable order in which every module runs after the modules it depends
+        on, except within feedback loops, whose modules are kept together.
+        """
+        return [name for component in self.strongly_connected_components() for name in component]
+
+    def ancestors(self, names):
+        """
+        Set of the given modules and all modules they depend on, directly or indirectly.
+        """
+        predecessors = {name: [] for name in self.names}
+        for name, name_successors in self.successors.items():
+            for successor in name_successors:
+                predecessors[successor].append(name)
+
+        found = set(names)
+        stack = list(found)
+        while stack:
+            for predecessor in predecessors[stack.pop()]:
+                if predecessor not in found:
+                    found.add(predecessor)
+                    stack.append(predecessor)
+        return found
+
+    def _stable_order(self, components):
+        # Kahn's algorithm on the components, always picking the ready
+        # component whose first module was added first
+        component_of = {name: i for i, component in enumerate(components) for name in component}
+        num_predecessors = [0] * len(components)
+        successors = [set() for _ in components]
+        for name, name_successors in self.successors.items():
+            for successor in name_successors:
+                source, target = component_of[name], component_of[successor]
+                if source != target and target not in successors[source]:
+                    successors[source].add(target)
+                    num_predecessors[target] += 1
+
+        ready = [(self._position[component[0]], i) for i, component in enumerate(components)
+                 if num_predecessors[i] == 0]
+        heapq.heapify(ready)
+        ordered = []
+        while ready:
+            _, i = heapq.heappop(ready)
+            ordered.append(components[i])
+            for j in successors[i]:
+                num_predecessors[j] -= 1
+                if num_predecessors[j] == 0:
+                    heapq.heappush(ready, (self._position[components[j][0]], j))
+        return ordered
+
+
+def _promoted_name(name, promotes, prefix):
+    # Name of a variable of a submodule in its parent: variables that are
+    # not promoted are accessed through the name of the submodule
+    if promotes is None or name in promotes:
+        return name
+    return f'{prefix}.{name}'
+
+
+def promoted_path_name(name, chain):
+    """
+    Name in the top module of a tree of variable `name` of the submodule
+    reached through `chain`, the `(submodule name, promotes)` of each level
+    from the top down, with `promotes` None if all variables are promoted
+    (see `submodule_promotes`). A variable keeps its name only if it is
+    promoted at every level.
+    """
+    for prefix, promotes in reversed(chain):
+        name = _promoted_name(name, promotes, prefix)
+    return name
+
+
+def _csdl_interface(values):
+    # Variables consumed from and produced for the siblings of a ModuleCSDL
+    # submodule, including those of its own submodules, by their names in
+    # the submodule
+    prepend = values.get('prepend')
+    produced = set(values['outputs'])
+    consumed = set()
+    for name in values['declared_vars']:
+        # Declared variables of a module with a prepend are named
+        # '<prepend>_<name>', but may be stored without the prepend
+        if prepend and not name.startswith(f'{prepend}_'):
+            name = f'{prepend}_{name}'
+        consumed.add(name)
+    for sub_name, sub_values in values['submodules'].items():
+        sub_consumed, sub_produced = _csdl_submodule_interface(sub_name, sub_values)
+        consumed |= sub_consumed
+        produced |= sub_produced
+    return consumed - produced, produced
+
+
+def _csdl_submodule_interface(name, values):
+    # Interface of a ModuleCSDL submodule by the names in its parent;
+    # 'promotes' is None (or missing) if all variables are promoted
+    consumed, produced = _csdl_interface(values)
+    promotes = values.get('promotes')
+    return ({_promoted_name(var, promotes, name) for var in consumed},
+            {_promoted_name(var, promotes, name) for var in produced})
+
+
+def module_csdl_chains(module_csdl):
+    """
+    `(name, promotes)` chains (see `promoted_path_name`) of all submodules
+    in the tree of a ModuleCSDL, from its `sub_modules` dictionaries, as
+    `{path: chain}`, where `path` is the tuple of submodule names.
+    """
+    chains = {(): ()}
+    stack = [((), module_csdl.sub_modules)]
+    while stack:
+        path, sub_modules = stack.pop()
+        for name, values in sub_modules.items():
+            sub_path = path + (name, )
+            chains[sub_path] = chains[path] + ((name, values.get('promotes')), )
+            stack.append((sub_path, values['submodules']))
+    return chains
+
+
+def module_csdl_graph(module_csdl):
+    """
+    ModuleGraph of the submodules of a ModuleCSDL, built from the
+    `sub_modules` dictionaries and the connections made with `connect_modules`.
+    Variables are matched by their names in the module, i.e., after
+    promotion and prepending.
+    """
+    consumes = dict()
+    produces = dict()
+    for name, values in module_csdl.sub_modules.items():
+        consumes[name], produces[name] = _csdl_submodule_interface(name, values)
+    return ModuleGraph(module_csdl.sub_modules, consumes, produces,
+                       connections=getattr(module_csdl, 'connections', ()))
+
+
+def submodule_promotes(entry, promoted_vars):
+    """
+    Variables of an `add_module` entry of `module_info` that are promoted
+    to the parent module, whose promoted variables are `promoted_vars`,
+    i.e., the `promotes` passed to csdl's `add`. None if all variables
+    are promoted.
+    """
+    promote = entry['promote']
+    if promote is None:
+        return None
+    submodule = entry['sub_module']
+    return promote + submodule.promoted_vars + [e for e in promoted_vars if e in submodule.module_inputs]
+
+
+def _maker_interface(module_maker):
+    from csdl.lang.declared_variable import DeclaredVariable
+
+    produced = set(module_maker.module_outputs)
+    consumed = set()
+    for entry in module_maker.module_info:
+        if isinstance(entry, DeclaredVariable):
+            consumed.add(entry.name)
+        elif isinstance(entry, dict):
+            sub_consumed, sub_produced = _maker_submodule_interface(entry, module_maker.promoted_vars)
+            consumed |= sub_consumed
+            produced |= sub_produced
+    return consumed - produced, produced
+
+
+def _maker_submodule_interface(entry, promoted_vars):
+    # Interface of an 'add_module' entry by the names in its parent
+    consumed, produced = _maker_interface(entry['sub_module'])
+    promotes = submodule_promotes(entry, promoted_vars)
+    name = submodule_entry_name(entry)
+    return ({_promoted_name(var, promotes, name) for var in consumed},
+            {_promoted_name(var, promotes, name) for var in produced})
+
+
+def submodule_entry_name(entry):
+    """
+    Name of an `add_module` entry of `module_info`; unnamed entries are
+    named after the class and id of the submodule.
+    """
+    if entry['name'] is None:
+        return f"{type(entry['sub_module']).__name__}_{id(entry['sub_module']):x}"
+    return entry['name']
+
+
+def module_maker_chains(module_info, promoted_vars=()):
+    """
+    `(name, promotes)` chains (see `promoted_path_name`) of all submodules
+    in the tree of a ModuleMaker `module_info` list, whose module promotes
+    `promoted_vars`, as `{path: chain}`, where `path` is the tuple of
+    submodule names (see `submodule_entry_name`).
+    """
+    chains = {(): ()}
+    stack = [((), module_info, promoted_vars)]
+    while stack:
+        path, module_info, promoted_vars = stack.pop()
+        for entry in module_info:
+            if isinstance(entry, dict):
+                name = submodule_entry_name(entry)
+                submodule = entry['sub_module']
+                sub_path = path + (name, )
+                chains[sub_path] = chains[path] + ((name, submodule_promotes(entry, promoted_vars)), )
+                stack.append((sub_path, submodule.module_info, submodule.promoted_vars))
+    return chains
+
+
+def module_maker_graph(module_maker):
+    """
+    ModuleGraph of the submodules (`add_module` entries of `module_info`)
+    of a ModuleMaker. Variables are matched by their names in the module,
+    i.e., after promotion.
+    """
+    names = []
+    consumes = dict()
+    produces = dict()
+    for entry in module_maker.module_info:
+        if isinstance(entry, dict):
+            name = submodule_entry_name(entry)
+            names.append(name)
+            consumes[name], produces[name] = _maker_submodule_interface(entry, module_maker.promoted_vars)
+    return ModuleGraph(names, consumes, produces)
@@ -0,0 +1,65 @@
+from functools import lru_cache
+
+
+greek_letters = {
+    "alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta", 
+    "iota", "kappa", "lambda", "mu", "nu", "xi", "omicron", "pi", "rho", 
+    "sigma", "tau", "upsilon", "phi", "chi", "psi", "omega",
+    "Alpha", "Beta", "Gamma", "Delta", "Epsilon", "Zeta", "Eta", "Theta", 
+    "Iota", "Kappa", "Lambda", "Mu", "Nu", "Xi", "Omicron", "Pi", "Rho", 
+    "Sigma", "Tau", "Upsilon", "Phi", "Chi", "Psi", "Omega"
+}
+
+special_characters = {'max', 'min'}
+
+def rlo(string, old_substring, new_substring):
+    last_occurrence_index = string.rfind(old_substring)
+    if last_occurrence_index == -1:
+        return string  # Sub-string not found in string
+    else:
+        return string[:last_occurrence_index] + new_substring + string[last_occurrence_index + len(old_substring):]
+
+
+@lru_cache(maxsize=None)
+def generate_dsm_text(s):
+    """
+    Convert a (snake case) variable or module name into a LaTeX label for
+    XDSM diagrams, e.g., 'alpha_max' -> '\\alpha_{max}'. Results are
+    memoized since the same names appear in many diagrams.
+    """
+    space_split = s.split(" ")
+    return_string = r""
+    for string in space_split:
+        new_string = string.split("_") # Non underscore 
+        if len(new_string) == 1:
+            if string in greek_letters:
+                return_string += f" \\{string}"
+            else: 
+                return_string += r" \text{ " + string + r"}"
+        else:
+            counter = 0
+            for math_string in new_string:
+                if counter == len(new_string)-1:
+                    if math_string in greek_letters:
+                        return_string += f"\\{math_string}" + r"}"*counter
+                    elif len(math_string) == 1 or math_string.isnumeric() is True or math_string in special_characters: 
+                        return_string += math_string + r"}"*counter
+                    else:
+                        return_string = rlo(return_string, "_{", " ") +   math_string
+                    break
+                else:
+                    if math_string in greek_letters:
+                        return_string += f"\\{math_string}" + r"_{"
+                    elif counter == 0:
+                        return_string += math_string + r"_{"
+                    elif len(math_string) == 1 or math_string.isnumeric() is True:
+                        return_string += math_string + r"_{"
+                    else:
+                        return_string += math_string + r" "
+                counter += 1
+
+    if return_string.count('{') != return_string.count('}'):
+        return_string = return_string.replace('{', '')
+        return_string = return_string.replace('}', '')
+        return_string = return_string.replace('_', ' ')
+    return return_string.replace(" ", r"\,")
@@ -0,0 +1,88 @@
+from lsdo_modules.utils.parameters import FrozenParameters
+
+
+def _class_key(cls):
+    # Classes defined in functions cannot be pickled and their names are not
+    # unique (e.g., classes made by factories), so they are compared by identity
+    if '<' in cls.__qualname__:
+        return ('local class', cls.__module__, cls.__qualname__, id(cls))
+    return cls
+
+
+def module_maker_fingerprint(module_maker, _memo=None):
+    """
+    Content-based fingerprint (bytes) of what a ModuleMaker computes.
+
+    The fingerprint covers the class, the parameters, the inputs set on
+    its `module` and the signature of `module_info` (names, shapes and
+    values of the variables, and the fingerprints and promotions of the
+    submodules). Modules with implicit operations are only equal to
+    themselves. Requires `module_info` to be populated, i.e., call after
+    `assemble_csdl`. Raises a TypeError if a parameter cannot be hashed by
+    content (see `FrozenParameters`). Classes defined in functions are
+    compared by identity, so fingerprints of their instances are only
+    valid within the process.
+
+    The operations computing the outputs are not compared, so state of
+    the instance outside of `parameters` (e.g., attributes set in
+    `__init__` and used in `define_module`) is not covered.
+    """
+    from csdl.lang.declared_variable import DeclaredVariable
+    from csdl.lang.input import Input
+
+    if _memo is None:
+        _memo = dict()
+    key = id(module_maker)
+    if key in _memo:
+        return _memo[key]
+
+    signature = []
+    for entry in module_maker.module_info:
+        if isinstance(entry, DeclaredVariable):
+            signature.append(('declared', entry.name, entry.shape))
+        elif isinstance(entry, Input):
+            signature.append(('input', entry.name, entry.shape, entry.val))
+        elif isinstance(entry, dict):
+            signature.append(('submodule', entry['name'], entry['promote'],
+                              module_maker_fingerprint(entry['sub_module'], _memo)))
+        elif hasattr(entry, 'name') and hasattr(entry, 'shape'):
+            # Output or Concatenation
+            signature.append(('output', entry.name, entry.shape))
+        else:
+            # Implicit operations cannot be compared
+            signature.append(('entry', type(entry), id(entry)))
+
+    module_inputs = None
+    if module_maker.module is not None:
+        module_inputs = {name: dict(value) for name, value in module_maker.module.inputs.items()}
+
+    fingerprint = FrozenParameters(dict(
+        cls=_class_key(type(module_maker)),
+        parameters=module_maker.parameters.freeze(),
+        module_inputs=module_inputs,
+        signature=signature,
+        objective=module_maker.objective,
+        constraints=module_maker.constraints,
+        design_variables=module_maker.design_variables,
+    )).digest
+    _memo[key] = fingerprint
+    return fingerprint
+
+
+def count_module_tree(module_maker):
+    """
+    Number of modules and of variables (inputs, declared variables and
+    outputs) in the tree of a ModuleMaker, including itself.
+    """
+    num_modules = 0
+    num_variables = 0
+    stack = [module_maker]
+    while stack:
+        module_maker = stack.pop()
+        num_modules += 1
+        for entry in module_maker.module_info:
+            if isinstance(entry, dict):
+                stack.append(entry['sub_module'])
+            elif hasattr(entry, 'name') and hasattr(entry, 'shape'):
+                num_variables += 1
+    return num_modules, num_variables
@@ -0,0 +1,107 @@
+from html import escape
+
+from lsdo_modules.utils.unpack_module import iter_module_records
+from lsdo_modules.utils.value_report import format_summary
+
+
+_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; font-size: 14px; }}
+details {{ margin-left: 1.5em; }}
+summary {{ cursor: pointer; padding: 2px 0; }}
+table {{ border-collapse: collapse; margin: 4px 0 4px 1.5em; }}
+th, td {{ border: 1px solid #ccc; padding: 2px 8px; text-align: left; }}
+th {{ background: #eee; }}
+.count {{ color: #777; }}
+</style>
+<script>
+// Submodule contents are stored in <template> elements and only
+// instantiated when a submodule is expanded for the first time
+document.addEventListener('toggle', function (event) {{
+    var details = event.target;
+    if (details.tagName !== 'DETAILS' || !details.open || !details.dataset.lazy) {{ return; }}
+    var template = details.querySelector(':scope > template');
+    details.appendChild(template.content.cloneNode(true));
+    delete details.dataset.lazy;
+}}, true);
+</script>
+</head>
+<body>
+"""
+
+_TAIL = """</body>
+</html>
+"""
+
+
+def _write_table(f, title, variables, path, values):
+    if not variables:
+        return
+    if values is None:
+        f.write(f'<table><tr><th>{title}</th><th>type</th><th>shape</th></tr>\n')
+    else:
+        f.write(f'<table><tr><th>{title}</th><th>type</th><th>shape</th><th>value</th></tr>\n')
+    for var in variables:
+        f.write(f'<tr><td>{escape(var.name)}</td><td>{type(var).__name__}</td>'
+                f'<td>{escape(str(var.shape))}</td>')
+        if values is not None:
+            summary = values.get((path, var.name))
+            f.write(f'<td>{escape(format_summary(summary)) if summary else ""}</td>')
+        f.write('</tr>\n')
+    f.write('</table>\n')
+
+
+def _write_module(f, path, name, inputs, outputs, values, root=False):
+    summary = f'<summary><b>{escape(str(name))}</b> <span class="count">' \
+              f'({len(inputs)} inputs, {len(outputs)} outputs)</span></summary>\n'
+    if root:
+        f.write('<details open>' + summary)
+    else:
+        f.write('<details data-lazy="1">' + summary + '<template>\n')
+    _write_table(f, 'Inputs', inputs, path, values)
+    _write_table(f, 'Outputs', outputs, path, values)
+
+
+def write_module_html(module_maker, file_name='module_test.html', title='module', values=None):
+    """
+    Write an HTML report of a ModuleMaker tree to `file_name`. If `values`
+    (see `value_report.fetch_values`) is given, variable values are
+    summarized in an additional column.
+
+    The tree is traversed with `iter_module_records` and written as it is
+    visited, so the report is never held in memory as a whole. Every
+    submodule is a collapsible `<details>` element whose contents are only
+    rendered by the browser when it is expanded.
+    """
+    with open(file_name, 'w') as f:
+        f.write(_HEAD.format(title=escape(title)))
+        # Records arrive module by module: 'name', 'inputs' and 'outputs'
+        # belong to the module being visited, 'open_paths' to the modules
+        # whose closing tags have not been written yet
+        current_path, name, inputs, outputs = (), title, [], []
+        root = True
+        open_paths = [()]
+        for path, section, var_name, item in iter_module_records(module_maker.module_info):
+            if section == 'Submodules':
+                _write_module(f, current_path, name, inputs, outputs, values, root=root)
+                root = False
+                while open_paths[-1] != path[:-1]:
+                    open_paths.pop()
+                    f.write('</template></details>\n')
+                open_paths.append(path)
+                current_path, name, inputs, outputs = path, var_name, [], []
+            elif section == 'Inputs':
+                inputs.append(item)
+            else:
+                outputs.append(item)
+        _write_module(f, current_path, name, inputs, outputs, values, root=root)
+
+        for _ in range(len(open_paths) - 1):
+            f.write('</template></details>\n')
+        f.write('</details>\n')
+        f.write(_TAIL)
+    return file_name
@@ -0,0 +1,29 @@
+import logging
+
+
+# Library-wide logger. A NullHandler keeps lsdo_modules silent unless the
+# application configures logging (e.g., 'logging.basicConfig') or calls
+# 'set_log_level' below.
+logger = logging.getLogger('lsdo_modules')
+logger.addHandler(logging.NullHandler())
+
+
+def set_log_level(level=logging.DEBUG, stream=None):
+    """
+    Enable console output of the lsdo_modules logger.
+
+    Parameters
+    ----------
+    `level : int or str`
+        Logging level, e.g., `logging.DEBUG` or `'INFO'`.
+
+    `stream : file-like`
+        Stream to write to. Defaults to `sys.stderr`.
+    """
+    logger.setLevel(level)
+    if not any(getattr(handler, '_lsdo_modules', False) for handler in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(name)s:%(levelname)s: %(message)s'))
+        handler._lsdo_modules = True
+        logger.addHandler(handler)
+    return logger
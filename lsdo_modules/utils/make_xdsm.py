@@ -1,7 +1,7 @@
-from pytikz.dsm import DSM
-
-
 def make_xdsm(data_dict, name='dsm'):
+    # pytikz is only needed for diagrams
+    from pytikz.dsm import DSM
+
     dsm = DSM()
 
     diagonals = data_dict['diagonals']
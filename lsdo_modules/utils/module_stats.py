@@ -0,0 +1,177 @@
+import numpy as np
+
+
+# csdl stores all variable values as float64 arrays
+BYTES_PER_ELEMENT = 8
+
+COUNT_KEYS = (
+    'inputs',
+    'declared_vars',
+    'outputs',
+    'promoted_vars',
+    'implicit_operations',
+    'elements',
+    'bytes',
+)
+
+
+def _num_elements(shape):
+    if shape is None:
+        return 0
+    return int(np.prod(shape))
+
+
+def _new_record(path, depth):
+    record = dict(path=path, depth=depth, num_submodules=0)
+    record.update({key: 0 for key in COUNT_KEYS})
+    return record
+
+
+def _add_variables(record, shapes, kind):
+    for shape in shapes:
+        record[kind] += 1
+        elements = _num_elements(shape)
+        record['elements'] += elements
+        record['bytes'] += elements * BYTES_PER_ELEMENT
+
+
+def _own_promoted_vars(promoted_vars, sub_promoted_vars):
+    # Number of variables promoted by a module itself; the promoted
+    # variables of a module include those of its submodules, which are
+    # counted in their own records
+    own = set(promoted_vars)
+    for names in sub_promoted_vars:
+        own.difference_update(names)
+    return len(own)
+
+
+def _finalize(records, parents):
+    """
+    Accumulate subtree counts bottom-up and compute tree-level statistics.
+    `records` must be in pre-order, so every child comes after its parent.
+    """
+    for record in records:
+        record['cumulative'] = {key: record[key] for key in COUNT_KEYS}
+    for i in range(len(records) - 1, 0, -1):
+        parent_cumulative = records[parents[i]]['cumulative']
+        for key in COUNT_KEYS:
+            parent_cumulative[key] += records[i]['cumulative'][key]
+
+    fan_outs = [r['num_submodules'] for r in records if r['num_submodules'] > 0]
+    return dict(
+        modules=records,
+        num_modules=len(records),
+        depth=max(r['depth'] for r in records),
+        max_fan_out=max(fan_outs, default=0),
+        mean_fan_out=float(np.mean(fan_outs)) if fan_outs else 0.,
+        totals=records[0]['cumulative'],
+    )
+
+
+def module_csdl_stats(module_csdl):
+    """
+    Statistics of a ModuleCSDL tree, computed from the `sub_modules`
+    dictionaries in a single walk. Call after the model has been defined.
+    """
+    root = _new_record(module_csdl.name, 0)
+    _add_variables(root, [v['shape'] for v in module_csdl.module_inputs.values()], 'inputs')
+    _add_variables(root, [v['shape'] for v in module_csdl.module_declared_vars.values()], 'declared_vars')
+    _add_variables(root, [v['shape'] for v in module_csdl.module_outputs.values()], 'outputs')
+    root['promoted_vars'] = _own_promoted_vars(
+        module_csdl.promoted_vars, [values['promoted_vars'] for values in module_csdl.sub_modules.values()])
+    root['implicit_operations'] = module_csdl._num_implicit_operations
+    root['num_submodules'] = len(module_csdl.sub_modules)
+
+    records = [root]
+    parents = [None]
+    stack = [(name, values, 0) for name, values in reversed(module_csdl.sub_modules.items())]
+    while stack:
+        name, values, parent = stack.pop()
+        path = f"{records[parent]['path']}.{name}"
+        record = _new_record(path, records[parent]['depth'] + 1)
+        _add_variables(record, [v['shape'] for v in values['inputs'].values()], 'inputs')
+        _add_variables(record, [v['shape'] for v in values['declared_vars'].values()], 'declared_vars')
+        _add_variables(record, [v['shape'] for v in values['outputs'].values()], 'outputs')
+        record['promoted_vars'] = _own_promoted_vars(
+            values['promoted_vars'], [sub_values['promoted_vars'] for sub_values in values['submodules'].values()])
+        record['implicit_operations'] = values.get('implicit_operations', 0)
+        record['num_submodules'] = len(values['submodules'])
+        index = len(records)
+        records.append(record)
+        parents.append(parent)
+        stack.extend((sub_name, sub_values, index) for sub_name, sub_values in reversed(values['submodules'].items()))
+
+    return _finalize(records, parents)
+
+
+def module_maker_stats(module_maker, name='module'):
+    """
+    Statistics of a ModuleMaker tree, computed from the `module_info`
+    lists in a single walk. Call after `assemble_csdl`, which populates
+    `module_info`.
+    """
+    from csdl.lang.declared_variable import DeclaredVariable
+    from csdl.lang.input import Input
+    from csdl.lang.output import Output
+    from csdl.lang.implicit_operation import ImplicitOperation
+    from csdl.lang.bracketed_search_operation import BracketedSearchOperation
+
+    records = []
+    parents = []
+    stack = [(name, module_maker, None)]
+    while stack:
+        path, module, parent = stack.pop()
+        depth = 0 if parent is None else records[parent]['depth'] + 1
+        record = _new_record(path, depth)
+        record['promoted_vars'] = _own_promoted_vars(
+            module.promoted_vars,
+            [entry['sub_module'].promoted_vars for entry in module.module_info if isinstance(entry, dict)])
+        index = len(records)
+        records.append(record)
+        parents.append(parent)
+
+        submodules = []
+        # Implicit operations are found through the outputs they compute,
+        # i.e., the states registered by `create_implicit_operation`
+        implicit_operations = set()
+        for entry in module.module_info:
+            if isinstance(entry, dict):
+                submodules.append((f"{path}.{entry['name']}", entry['sub_module'], index))
+            elif isinstance(entry, Input):
+                _add_variables(record, [entry.shape], 'inputs')
+            elif isinstance(entry, DeclaredVariable):
+                _add_variables(record, [entry.shape], 'declared_vars')
+            # Concatenation is a subclass of Output
+            elif isinstance(entry, Output):
+                _add_variables(record, [entry.shape], 'outputs')
+                implicit_operations.update(
+                    id(op) for op in entry.dependencies
+                    if isinstance(op, (ImplicitOperation, BracketedSearchOperation)))
+        record['implicit_operations'] = len(implicit_operations)
+        record['num_submodules'] = len(submodules)
+        stack.extend(reversed(submodules))
+
+    return _finalize(records, parents)
+
+
+def format_stats(stats, sort_by='bytes', max_rows=None):
+    """
+    Text table of per-module and cumulative statistics, sorted by the
+    cumulative value of `sort_by` so that the largest subtrees come first.
+    """
+    header = f"{'module':40s} {'depth':>5s} {'subs':>5s} {'inputs':>7s} {'decl':>7s} {'outputs':>7s} "\
+             f"{'promoted':>8s} {'implicit':>8s} {'elements':>12s} {'MB':>9s} {'cum. MB':>9s}"
+    lines = [header, '-' * len(header)]
+    records = sorted(stats['modules'], key=lambda r: r['cumulative'][sort_by], reverse=True)
+    for record in records[:max_rows]:
+        lines.append(
+            f"{record['path'][-40:]:40s} {record['depth']:5d} {record['num_submodules']:5d} "
+            f"{record['inputs']:7d} {record['declared_vars']:7d} {record['outputs']:7d} "
+            f"{record['promoted_vars']:8d} {record['implicit_operations']:8d} "
+            f"{record['elements']:12d} {record['bytes'] / 1e6:9.3f} {record['cumulative']['bytes'] / 1e6:9.3f}"
+        )
+    lines.append('-' * len(header))
+    lines.append(f"modules: {stats['num_modules']}, depth: {stats['depth']}, "
+                 f"max fan-out: {stats['max_fan_out']}, mean fan-out: {stats['mean_fan_out']:.2f}, "
+                 f"total MB: {stats['totals']['bytes'] / 1e6:.3f}")
+    return '\n'.join(lines)
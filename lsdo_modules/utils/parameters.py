@@ -1,6 +1,12 @@
 """Define the OptionsDictionary class."""
 from __future__ import division, print_function
 
+import hashlib
+import pickle
+from collections.abc import Mapping, MutableMapping
+from types import BuiltinFunctionType, FunctionType
+
+import numpy as np
 from six import iteritems, string_types
 
 
@@ -8,6 +14,351 @@ from six import iteritems, string_types
 _undefined = object()
 
 
+def _quote(value):
+    # Strings are quoted in error messages
+    if isinstance(value, string_types):
+        return "'{}'".format(value)
+    return value
+
+
+def _offending_indices(mask, max_indices=10):
+    # Indices of the True entries of a mask, e.g., '[2, 5]' or '[(0, 1)] and 4 more'
+    indices = np.argwhere(mask)
+    if mask.ndim == 1:
+        listed = indices[:max_indices, 0].tolist()
+    else:
+        listed = [tuple(index) for index in indices[:max_indices].tolist()]
+    if len(indices) > max_indices:
+        return '{} and {} more'.format(listed, len(indices) - max_indices)
+    return '{}'.format(listed)
+
+
+def _check_array_bounds(name, value, upper, lower):
+    """
+    Vectorized bounds check of an array value (or of a value with array bounds).
+
+    Parameters
+    ----------
+    name : str
+        Name of the option.
+    value : ndarray or float
+        Value to check.
+    upper, lower : ndarray or float or None
+        Bounds that broadcast with the value.
+    """
+    value = np.asarray(value)
+    if upper is not None:
+        mask = np.greater(value, upper)
+        if mask.any():
+            raise ValueError("Value of option '{}' exceeds maximum allowed value of {} at "
+                             "indices {}.".format(name, upper, _offending_indices(mask)))
+    if lower is not None:
+        mask = np.less(value, lower)
+        if mask.any():
+            raise ValueError("Value of option '{}' is less than minimum allowed value of {} at "
+                             "indices {}.".format(name, lower, _offending_indices(mask)))
+
+
+def _check_array(name, value, shape, dtype):
+    """
+    Check the type, dtype and shape of an array option.
+
+    Parameters
+    ----------
+    name : str
+        Name of the option.
+    value : object
+        Value to check.
+    shape : tuple or None
+        Declared shape, where None entries match any size.
+    dtype : numpy dtype or None
+        Declared dtype, which may be abstract (e.g., np.floating).
+    """
+    if not isinstance(value, np.ndarray):
+        raise TypeError("Value ({}) of option '{}' has type of ({}), but "
+                        "expected type ({}).".format(_quote(value), name, type(value), np.ndarray))
+    if dtype is not None and not np.issubdtype(value.dtype, dtype):
+        raise TypeError("Value of option '{}' has dtype {}, but expected dtype {}.".format(
+            name, value.dtype, getattr(dtype, '__name__', dtype)))
+    if shape is not None:
+        if len(value.shape) != len(shape) or \
+                any(size is not None and size != actual for size, actual in zip(shape, value.shape)):
+            raise ValueError("Value of option '{}' has shape {}, but expected shape {}.".format(
+                name, value.shape, shape))
+
+
+def _read_only_view(value):
+    # View of an array that cannot be used to modify it
+    view = value.view()
+    view.flags.writeable = False
+    return view
+
+
+def _check_value(checks, value):
+    """
+    Check a value against the declared metadata of an option.
+
+    Parameters
+    ----------
+    checks : tuple
+        Name of the option and its declared values, types, upper, lower, check_valid,
+        allow_none, shape and dtype, see `Parameters.declare`.
+    value : object
+        Value to check.
+    """
+    name, values, types, upper, lower, check_valid, allow_none, shape, dtype = checks
+    if not (value is None and allow_none):
+        # If only values is declared
+        if values is not None:
+            if value not in values:
+                raise ValueError("Value ({}) of option '{}' "
+                                 "is not one of {}.".format(_quote(value), name, values))
+        # If only types is declared
+        elif types is not None:
+            if not isinstance(value, types):
+                raise TypeError("Value ({}) of option '{}' has type of ({}), but "
+                                "expected type ({}).".format(_quote(value), name,
+                                                             type(value), types))
+        if shape is not None or dtype is not None:
+            _check_array(name, value, shape, dtype)
+
+        if upper is not None or lower is not None:
+            above = upper is not None and value > upper
+            below = lower is not None and value < lower
+            # Python scalars compare to bools; array values or bounds are checked element-wise
+            if (above.__class__ is not bool or below.__class__ is not bool) and \
+                    (isinstance(value, np.ndarray) or isinstance(upper, np.ndarray) or
+                     isinstance(lower, np.ndarray)):
+                _check_array_bounds(name, value, upper, lower)
+            elif above:
+                raise ValueError("Value ({}) of option '{}' exceeds maximum allowed "
+                                 "value of {}.".format(value, name, upper))
+            elif below:
+                raise ValueError("Value ({}) of option '{}' is less than minimum "
+                                 "allowed value of {}.".format(value, name, lower))
+
+    # General function test
+    if check_valid is not None:
+        check_valid(name, value)
+
+
+class _ParameterEntry(MutableMapping):
+    """
+    Compact record of one declared option.
+
+    The metadata that values are checked against is bound into the `checks`
+    tuple once, at declaration, so setting an option passes it to
+    `_check_value` without looking up each field again. The record can be
+    used like the dictionary entries of the options, e.g., `entry['value']`
+    or `entry['upper'] = 1.`.
+
+    Attributes
+    ----------
+    value : object
+        Current (or default) value of the option.
+    has_been_set : bool
+        Whether a default was declared or a value has been set.
+    desc, read_only_view
+        Declared metadata, see `Parameters.declare`.
+    checks : tuple
+        Name of the option and the declared metadata in the order of the arguments
+        of `_check_value` (see `_checks`).
+    """
+
+    __slots__ = ('value', 'has_been_set', 'desc', 'read_only_view', 'checks')
+
+    _keys = ('value', 'values', 'types', 'desc', 'upper', 'lower', 'check_valid',
+             'has_been_set', 'allow_none', 'shape', 'dtype', 'read_only_view')
+
+    # Fields of `checks`
+    _checks = ('name', 'values', 'types', 'upper', 'lower', 'check_valid', 'allow_none',
+               'shape', 'dtype')
+
+    # Declared metadata, as stored when pickling
+    _metadata = ('values', 'types', 'desc', 'upper', 'lower', 'check_valid', 'allow_none',
+                 'shape', 'dtype', 'read_only_view')
+
+    def __init__(self, value, has_been_set, checks, desc='', read_only_view=False):
+        self.value = value
+        self.has_been_set = has_been_set
+        self.checks = checks
+        self.desc = desc
+        self.read_only_view = read_only_view
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key in self._checks:
+            return self.checks[self._checks.index(key)]
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key in self._checks:
+            checks = list(self.checks)
+            checks[self._checks.index(key)] = value
+            self.checks = tuple(checks)
+        else:
+            setattr(self, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Entries of declared options cannot be removed; tried to remove '{}'."
+                        .format(key))
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return {key: self[key] for key in self._keys}.__repr__()
+
+
+def _update_hash(hasher, value):
+    """
+    Feed a content-based representation of a value into a hash object.
+
+    Parameters
+    ----------
+    hasher : hashlib hash object
+        Hash object to update.
+    value : object
+        Value to hash. Arrays are hashed by dtype, shape and bytes, containers
+        recursively, and classes and module-level functions by qualified name. Other objects
+        are hashed by their pickle, so digests are the same in every process.
+
+    Raises
+    ------
+    TypeError
+        If the value cannot be pickled, e.g., a lambda or local function.
+    """
+    update = hasher.update
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+        update('{}:{!r};'.format(type(value).__name__, value).encode())
+    elif isinstance(value, (np.ndarray, np.generic)):
+        value = np.asarray(value)
+        update('ndarray:{}:{};'.format(value.dtype.str, value.shape).encode())
+        if value.dtype.hasobject:
+            for item in value.flat:
+                _update_hash(hasher, item)
+        else:
+            update(np.ascontiguousarray(value).data)
+    elif isinstance(value, (tuple, list)):
+        update('{}:{};'.format(type(value).__name__, len(value)).encode())
+        for item in value:
+            _update_hash(hasher, item)
+    elif isinstance(value, (dict, FrozenParameters)):
+        # Order-independent: items are hashed separately and sorted
+        update('{}:{};'.format(type(value).__name__, len(value)).encode())
+        for digest in sorted(_digest((key, item)) for key, item in value.items()):
+            update(digest)
+    elif isinstance(value, (set, frozenset)):
+        update('{}:{};'.format(type(value).__name__, len(value)).encode())
+        for digest in sorted(_digest(item) for item in value):
+            update(digest)
+    elif isinstance(value, Parameters):
+        _update_hash(hasher, value.freeze())
+    elif isinstance(value, (type, FunctionType, BuiltinFunctionType)) and \
+            '<' not in value.__qualname__:
+        # Classes and module-level functions; the names of lambdas and local
+        # functions are not unique and they cannot be pickled
+        update('{}:{}.{};'.format(type(value).__name__, getattr(value, '__module__', None),
+                                  value.__qualname__).encode())
+    else:
+        # hash() and id() differ between processes, the pickle does not
+        try:
+            data = pickle.dumps(value, protocol=4)
+        except Exception as error:
+            raise TypeError('Cannot hash value of type {} by content: {}'.format(
+                type(value).__qualname__, error)) from None
+        update('{}:{};'.format(type(value).__qualname__, len(data)).encode())
+        update(data)
+
+
+def _digest(value):
+    hasher = hashlib.blake2b(digest_size=16)
+    _update_hash(hasher, value)
+    return hasher.digest()
+
+
+class FrozenParameters(Mapping):
+    """
+    Immutable snapshot of the values of a Parameters object.
+
+    The snapshot is hashable with a content-based hash, so it can be used in
+    cache keys such as `(module class, parameters snapshot)`. Arrays are
+    copied into read-only arrays and hashed by dtype, shape and bytes. Other
+    mutable values (e.g., dicts) are not copied and must not be modified after
+    freezing. The hash is computed once, on first use, and is the same in
+    every process, so it can also be used across workers or as a persistent
+    key. Hashing raises a TypeError if a value cannot be hashed by content
+    (see `_update_hash`).
+
+    Attributes
+    ----------
+    _values : dict
+        Option names and values.
+    _digest : bytes or None
+        Content-based digest, computed on first use.
+    """
+
+    __slots__ = ('_values', '_digest')
+
+    def __init__(self, values):
+        """
+        Initialize all attributes.
+
+        Parameters
+        ----------
+        values : dict
+            Option names and values. Arrays are copied.
+        """
+        frozen = {}
+        for name, value in values.items():
+            if isinstance(value, np.ndarray):
+                value = value.copy()
+                value.flags.writeable = False
+            frozen[name] = value
+        self._values = frozen
+        self._digest = None
+
+    @property
+    def digest(self):
+        """
+        Content-based digest of the snapshot.
+
+        Returns
+        -------
+        bytes
+            16-byte digest.
+        """
+        if self._digest is None:
+            self._digest = _digest(self._values)
+        return self._digest
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __hash__(self):
+        return int.from_bytes(self.digest[:8], 'little', signed=True)
+
+    def __eq__(self, other):
+        if not isinstance(other, FrozenParameters):
+            return NotImplemented
+        return self is other or self.digest == other.digest
+
+    def __repr__(self):
+        return 'FrozenParameters({!r})'.format(self._values)
+
+
 class Parameters(object):
     """
     Dictionary with pre-declaration of keys for value-checking and default values.
@@ -19,9 +370,9 @@ class Parameters(object):
 
     Attributes
     ----------
-    _dict : dict of dict
-        Dictionary of entries. Each entry is a dictionary consisting of value, values,
-        types, desc, lower, and upper.
+    _dict : dict of _ParameterEntry
+        Dictionary of entries. Each entry is a record of the value, desc and the values,
+        types, lower and upper that are bound for checking at declaration.
     _read_only : bool
         If True, no options can be set after declaration.
     """
@@ -49,6 +400,46 @@ class Parameters(object):
         """
         return self._dict.__repr__()
 
+    def __getstate__(self):
+        """
+        Return the state for pickling.
+
+        Only the declared metadata, value and has_been_set flag of each option are stored,
+        so the state does not depend on the layout of the entries.
+
+        Returns
+        -------
+        dict
+            Read-only flag and (name, metadata, value, has_been_set) of every option.
+        """
+        entries = []
+        for name, entry in iteritems(self._dict):
+            metadata = tuple(entry[key] for key in _ParameterEntry._metadata)
+            value = entry.value if entry.has_been_set else None
+            entries.append((name, metadata, value, entry.has_been_set))
+        return dict(read_only=self._read_only, entries=entries)
+
+    def __setstate__(self, state):
+        """
+        Restore the options from a pickled state.
+
+        Parameters
+        ----------
+        state : dict
+            State returned by __getstate__.
+        """
+        self._dict = {}
+        self._read_only = state['read_only']
+        for name, metadata, value, has_been_set in state['entries']:
+            metadata = dict(zip(_ParameterEntry._metadata, metadata))
+            checks = (name, ) + tuple(metadata[key] for key in _ParameterEntry._checks[1:])
+            if not has_been_set:
+                value = _undefined
+            elif metadata['read_only_view'] and isinstance(value, np.ndarray):
+                value = _read_only_view(value)
+            self._dict[name] = _ParameterEntry(value, has_been_set, checks, metadata['desc'],
+                                               metadata['read_only_view'])
+
     def __rst__(self):
         """
         Generate reStructuredText view of the options table.
@@ -193,46 +584,11 @@ class Parameters(object):
         value : object
             The default or user-set value to check for value, type, lower, and upper.
         """
-        meta = self._dict[name]
-        values = meta['values']
-        types = meta['types']
-        lower = meta['lower']
-        upper = meta['upper']
-
-        if not (value is None and meta['allow_none']):
-            # If only values is declared
-            if values is not None:
-                if value not in values:
-                    if isinstance(value, string_types):
-                        value = "'{}'".format(value)
-                    raise ValueError("Value ({}) of option '{}' "
-                                     "is not one of {}.".format(value, name, values))
-            # If only types is declared
-            elif types is not None:
-                if not isinstance(value, types):
-                    vtype = type(value)
-                    if isinstance(value, string_types):
-                        value = "'{}'".format(value)
-                    raise TypeError("Value ({}) of option '{}' has type of ({}), but "
-                                    "expected type ({}).".format(value, name, vtype, types))
-
-            if upper is not None:
-                if value > upper:
-                    raise ValueError("Value ({}) of option '{}' "
-                                     "exceeds maximum allowed value of {}.".format(value, name,
-                                                                                   upper))
-            if lower is not None:
-                if value < lower:
-                    raise ValueError("Value ({}) of option '{}' "
-                                     "is less than minimum allowed value of {}.".format(value, name,
-                                                                                        lower))
-
-        # General function test
-        if meta['check_valid'] is not None:
-            meta['check_valid'](name, value)
+        _check_value(self._dict[name].checks, value)
 
     def declare(self, name, default=_undefined, values=None, types=None, desc='',
-                upper=None, lower=None, check_valid=None, allow_none=False):
+                upper=None, lower=None, check_valid=None, allow_none=False, shape=None,
+                dtype=None, read_only_view=False):
         r"""
         Declare an option.
 
@@ -240,6 +596,11 @@ class Parameters(object):
         1. If values only was given when declaring, value must be in values.
         2. If types only was given when declaring, value must satisfy isinstance(value, types).
         3. It is an error if both values and types are given.
+        4. If shape or dtype was given, value must be a numpy array with that shape and dtype.
+
+        Bounds of array values (or array bounds) are checked element-wise and the
+        indices of the offending entries are reported. Array values are stored
+        without copying.
 
         Parameters
         ----------
@@ -261,6 +622,13 @@ class Parameters(object):
             General check function that raises an exception if value is not valid.
         allow_none : bool
             If True, allow None as a value regardless of values or types.
+        shape : int or tuple or None
+            Required shape of an array value. Entries that are None match any size.
+        dtype : numpy dtype or type or None
+            Required dtype of an array value, e.g., float or np.floating.
+        read_only_view : bool
+            If True, array values are stored as read-only views, so the module cannot
+            modify the caller's array.
         """
         if values is not None and not isinstance(values, (set, list, tuple)):
             raise TypeError("In declaration of option '%s', the 'values' arg must be of type None,"
@@ -273,23 +641,34 @@ class Parameters(object):
             raise RuntimeError("'types' and 'values' were both specified for option '%s'." %
                                name)
 
+        if shape is not None:
+            shape = (shape, ) if isinstance(shape, int) else tuple(shape)
+
         default_provided = default is not _undefined
 
-        self._dict[name] = {
-            'value': default,
-            'values': values,
-            'types': types,
-            'desc': desc,
-            'upper': upper,
-            'lower': lower,
-            'check_valid': check_valid,
-            'has_been_set': default_provided,
-            'allow_none': allow_none,
-        }
+        checks = (name, values, types, upper, lower, check_valid, allow_none, shape, dtype)
 
         # If a default is given, check for validity
         if default_provided:
-            self._assert_valid(name, default)
+            _check_value(checks, default)
+            if read_only_view and isinstance(default, np.ndarray):
+                default = _read_only_view(default)
+
+        self._dict[name] = _ParameterEntry(default, default_provided, checks, desc, read_only_view)
+
+    def freeze(self):
+        """
+        Return an immutable, hashable snapshot of the option values.
+
+        Options that are required but have not been set are not included.
+
+        Returns
+        -------
+        FrozenParameters
+            Snapshot of the values that can be used as (part of) a cache key.
+        """
+        return FrozenParameters({name: entry.value for name, entry in iteritems(self._dict)
+                                 if entry.has_been_set})
 
     def undeclare(self, name):
         """
@@ -355,7 +734,7 @@ class Parameters(object):
             value of the option to be value- and type-checked if declared.
         """
         try:
-            meta = self._dict[name]
+            entry = self._dict[name]
         except KeyError:
             # The key must have been declared.
             msg = "Option '{}' cannot be set because it has not been declared."
@@ -364,10 +743,12 @@ class Parameters(object):
         if self._read_only:
             raise KeyError("Tried to set read-only option '{}'.".format(name))
 
-        self._assert_valid(name, value)
+        _check_value(entry.checks, value)
+        if entry.read_only_view and isinstance(value, np.ndarray):
+            value = _read_only_view(value)
 
-        meta['value'] = value
-        meta['has_been_set'] = True
+        entry.value = value
+        entry.has_been_set = True
 
     def __getitem__(self, name):
         """
@@ -385,9 +766,9 @@ class Parameters(object):
         """
         # If the option has been set in this system, return the set value
         try:
-            meta = self._dict[name]
-            if meta['has_been_set']:
-                return meta['value']
+            entry = self._dict[name]
+            if entry.has_been_set:
+                return entry.value
             else:
                 raise RuntimeError("Option '{}' is required but has not been set.".format(name))
         except KeyError:
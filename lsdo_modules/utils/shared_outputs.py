@@ -0,0 +1,180 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from lsdo_modules.utils.logger import logger
+
+
+# Alignment of the arrays of the outputs in the buffer in bytes
+_alignment = 64
+
+
+def _shape(shape):
+    return (shape, ) if isinstance(shape, (int, np.integer)) else tuple(shape)
+
+
+def module_output_shapes(module):
+    """
+    Shapes of the outputs of a ModuleCSDL (from `module_outputs` and the
+    `sub_modules` dictionaries) or of an assembled ModuleMaker (from
+    `module_outputs` and `module_info`), including those of all
+    submodules by their own names. Outputs of a module take precedence
+    over outputs of its submodules with the same name.
+    """
+    shapes = dict()
+    if isinstance(module.module_outputs, dict):
+        queue = [dict(outputs=module.module_outputs, submodules=module.sub_modules)]
+        while queue:
+            values = queue.pop(0)
+            for name, output in values['outputs'].items():
+                shapes.setdefault(name, _shape(output['shape']))
+            queue.extend(values['submodules'].values())
+    else:
+        queue = [module]
+        while queue:
+            module_maker = queue.pop(0)
+            outputs = set(module_maker.module_outputs)
+            for entry in module_maker.module_info:
+                if isinstance(entry, dict):
+                    queue.append(entry['sub_module'])
+                elif getattr(entry, 'name', None) in outputs:
+                    shapes.setdefault(entry.name, _shape(entry.shape))
+    return shapes
+
+
+class _SharedArrayBase:
+    """
+    Base object of an array in a shared memory block (numpy array
+    interface). It references the SharedMemory, so the block stays mapped
+    as long as the array or any view of it exists; it is closed by the
+    SharedMemory itself once the last of them is garbage collected.
+    """
+    __slots__ = ('shm', '__array_interface__')
+
+    def __init__(self, shm, address, shape, dtype):
+        self.shm = shm
+        self.__array_interface__ = dict(data=(address, False), shape=shape, typestr=dtype.str, version=3)
+
+
+class SharedOutputBuffer:
+    """
+    Preallocated `multiprocessing.shared_memory` block for the outputs of
+    a batch of evaluations, so worker processes write their outputs in
+    place instead of pickling them back to the parent.
+
+    The buffer holds one array of shape `(batch_size, *shape)` per output
+    in `output_shapes` (see `module_output_shapes`); `buffer[name]` and
+    `slot(index)` return views, not copies. Views keep the shared memory
+    mapped, so they stay valid after `close`; the memory is freed when
+    the last of them is garbage collected.
+
+    Pickling a buffer only pickles its name and layout; unpickling
+    attaches to the same memory without owning it, i.e., only the buffer
+    that created the memory frees it on `close`.
+    """
+    def __init__(self, output_shapes, batch_size, dtype=np.float64):
+        self.output_shapes = {name: _shape(shape) for name, shape in output_shapes.items()}
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype)
+        self._offsets, self.nbytes = self._layout()
+        self._shm = shared_memory.SharedMemory(create=True, size=max(self.nbytes, 1))
+        self._owner = True
+        self._arrays = self._map()
+        logger.debug('allocated shared output buffer %s of %d bytes', self._shm.name, self.nbytes)
+
+    @property
+    def name(self):
+        """
+        Name of the shared memory block.
+        """
+        return self._shm.name
+
+    def _layout(self):
+        # Offsets of the arrays of the outputs, each aligned to `_alignment` bytes
+        offsets = dict()
+        nbytes = 0
+        for name, shape in self.output_shapes.items():
+            offsets[name] = nbytes
+            size = self.batch_size * int(np.prod(shape, dtype=np.int64)) * self.dtype.itemsize
+            nbytes += -(-size // _alignment) * _alignment
+        return offsets, nbytes
+
+    def _map(self):
+        # Arrays are based on objects holding the SharedMemory instead of
+        # its memoryview, so that they keep it alive and do not export the
+        # memoryview, which would prevent the SharedMemory from closing
+        start = np.frombuffer(self._shm.buf, dtype=np.uint8)
+        address = start.ctypes.data
+        del start
+        return {name: np.asarray(_SharedArrayBase(self._shm, address + self._offsets[name],
+                                                  (self.batch_size, ) + shape, self.dtype))
+                for name, shape in self.output_shapes.items()}
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def slot(self, index):
+        """
+        Dictionary of views of the outputs of evaluation `index` of the batch.
+        """
+        return {name: array[index] for name, array in self._arrays.items()}
+
+    def close(self):
+        """
+        Detach from the shared memory and, if this buffer created it,
+        remove its name so it is freed once no process maps it anymore.
+        The memory is unmapped in this process when the last view of it
+        is garbage collected.
+        """
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        self._arrays = None
+        if self._owner:
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        if self._shm is None:
+            raise ValueError('Cannot pickle a closed SharedOutputBuffer')
+        return dict(name=self._shm.name, output_shapes=self.output_shapes, batch_size=self.batch_size,
+                    dtype=self.dtype)
+
+    def __setstate__(self, state):
+        self.output_shapes = state['output_shapes']
+        self.batch_size = state['batch_size']
+        self.dtype = state['dtype']
+        self._offsets, self.nbytes = self._layout()
+        self._shm = shared_memory.SharedMemory(name=state['name'])
+        self._owner = False
+        self._arrays = self._map()
+
+    @property
+    def descriptor(self):
+        """
+        Name and layout of the buffer, from which `attach` maps it in
+        another process; equal for all buffers of the same memory.
+        """
+        if self._shm is None:
+            raise ValueError('SharedOutputBuffer is closed')
+        return (self._shm.name, tuple(self.output_shapes.items()), self.batch_size, self.dtype.str)
+
+    @classmethod
+    def attach(cls, descriptor):
+        """
+        Buffer attached to the memory of another buffer, without owning it,
+        from that buffer's `descriptor`.
+        """
+        name, output_shapes, batch_size, dtype = descriptor
+        buffer = cls.__new__(cls)
+        buffer.__setstate__(dict(name=name, output_shapes=dict(output_shapes), batch_size=batch_size,
+                                 dtype=np.dtype(dtype)))
+        return buffer
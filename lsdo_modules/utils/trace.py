@@ -0,0 +1,189 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+
+# The tracer that spans are written to; None when tracing is disabled
+_active_tracer = None
+_null_span = nullcontext()
+
+
+class ChromeTracer:
+    """
+    Writer for the Chrome trace-event format (JSON array form), viewable
+    in chrome://tracing or https://ui.perfetto.dev.
+
+    Events are written to disk as soon as a span closes, so memory use is
+    independent of the length of the traced run. Spans are nested by
+    module path: every span pushes its module name onto a per-thread
+    stack and records the dotted path in its arguments.
+    """
+    def __init__(self, file_name='module_trace.json'):
+        self.file_name = file_name
+        self._file = open(file_name, 'w')
+        self._file.write('[\n')
+        self._first_event = True
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter()
+        self.num_events = 0
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _timestamp(self):
+        # Trace-event timestamps are in microseconds
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def write_event(self, event):
+        line = json.dumps(event, separators=(',', ':'), default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            if self._first_event:
+                self._first_event = False
+            else:
+                self._file.write(',\n')
+            self._file.write(line)
+            self.num_events += 1
+
+    @contextmanager
+    def span(self, op, module_name, **args):
+        """
+        Record one complete ('X') event around the body of the `with` block.
+
+        Parameters
+        ----------
+        `op : str`
+            Traced operation, e.g., 'define', 'add_module' or 'assemble_csdl'.
+
+        `module_name : str`
+            Name of the module the operation acts on; appended to the
+            current module path.
+        """
+        stack = self._stack()
+        stack.append(str(module_name))
+        path = '.'.join(stack)
+        start = self._timestamp()
+        try:
+            yield path
+        finally:
+            end = self._timestamp()
+            stack.pop()
+            self.write_event(dict(
+                name=f'{op}: {module_name}',
+                cat=op,
+                ph='X',
+                ts=start,
+                dur=end - start,
+                pid=self._pid,
+                tid=threading.get_ident(),
+                args=dict(path=path, **args),
+            ))
+
+    def close(self):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write('\n]\n')
+            self._file.close()
+            self._file = None
+
+
+def start_trace(file_name='module_trace.json'):
+    """
+    Start streaming module spans to `file_name`. Returns the tracer.
+    """
+    global _active_tracer
+    stop_trace()
+    _active_tracer = ChromeTracer(file_name)
+    return _active_tracer
+
+
+def stop_trace():
+    """
+    Stop tracing and close the trace file.
+    """
+    global _active_tracer
+    tracer, _active_tracer = _active_tracer, None
+    if tracer is not None:
+        tracer.close()
+    return tracer
+
+
+@contextmanager
+def chrome_trace(file_name='module_trace.json'):
+    """
+    Context manager that traces everything within the `with` block, e.g.,
+
+        with chrome_trace('caddee_trace.json'):
+            sim = Simulator(model)
+            sim.run()
+    """
+    tracer = start_trace(file_name)
+    try:
+        yield tracer
+    finally:
+        if _active_tracer is tracer:
+            stop_trace()
+        else:
+            tracer.close()
+
+
+def trace_span(op, module_name, **args):
+    """
+    Span on the active tracer, or a no-op context if tracing is disabled.
+    """
+    tracer = _active_tracer
+    if tracer is None:
+        return _null_span
+    return tracer.span(op, module_name, **args)
+
+
+def traced(op, label=None):
+    """
+    Decorator that records a span around a method call when tracing is
+    enabled. `label(self, *args, **kwargs)` returns the module name of the
+    span; by default the module's `name` attribute or its class name.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if _active_tracer is None:
+                return method(self, *args, **kwargs)
+            if label is None:
+                module_name = getattr(self, 'name', None) or type(self).__name__
+            else:
+                module_name = label(self, *args, **kwargs)
+            with _active_tracer.span(op, module_name):
+                return method(self, *args, **kwargs)
+        wrapper.__wrapped_op__ = op
+        return wrapper
+    return decorator
+
+
+def trace_simulator(sim, name='simulator'):
+    """
+    Record spans for `run`, `compute_totals` and `check_partials` of a csdl
+    Simulator instance. The generated simulator code is flat, so module
+    evaluations inside a run are not visible individually.
+    """
+    for method_name in ('run', 'compute_totals', 'check_partials'):
+        method = getattr(sim, method_name, None)
+        if method is None or hasattr(method, '__wrapped_op__'):
+            continue
+
+        def wrapper(*args, _method=method, _op=method_name, **kwargs):
+            with trace_span(_op, name):
+                return _method(*args, **kwargs)
+        wrapper.__wrapped_op__ = method_name
+        setattr(sim, method_name, wrapper)
+    return sim
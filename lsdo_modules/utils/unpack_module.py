@@ -1,80 +1,101 @@
-import pandas as pd
 from csdl.lang.declared_variable import DeclaredVariable
 from csdl.lang.output import Output
 from csdl.lang.input import Input
 from csdl.lang.concatenation import Concatenation
-from json2html import *
-import os 
-import webbrowser
 
-def Merge(dict1, dict2):
-    res = {**dict1, **dict2}
-    return res
+from lsdo_modules.utils.logger import logger
+from lsdo_modules.utils.dataflow import submodule_entry_name
+
+
+def iter_module_records(lst, compact_print=False):
+    """
+    Iterate over a ModuleMaker `module_info` list and its submodules
+    without recursion, visiting every variable exactly once.
+
+    Yields `(path, section, name, item)` records, where `path` is the
+    tuple of submodule names from the root module (see
+    `submodule_entry_name` for submodules added without a name) and
+    `section` is
+        - 'Submodules' for a submodule (`path` ends with `name` and `item`
+          is the submodule), or
+        - 'Inputs'/'Outputs' for a variable `item` of the module at `path`.
+    Records are yielded module by module in pre-order: a submodule record
+    first, followed by all variables of that submodule, then its submodules.
+
+    Variables of the root module are classified by type, variables of
+    submodules by the names registered by the submodule. If `compact_print`
+    is True, submodules nested within submodules are skipped.
+    """
+    # Stack of (path, submodule); the root module has no submodule object
+    stack = [((), None)]
+    while stack:
+        path, submodule = stack.pop()
+        if submodule is None:
+            module_info = lst
+        else:
+            yield path, 'Submodules', path[-1], submodule
+            module_info = submodule.module_info
+            inputs = set(submodule.module_inputs)
+            outputs = set(submodule.module_outputs)
+
+        children = []
+        for item in module_info:
+            if isinstance(item, dict):
+                if not (compact_print and path):
+                    children.append((path + (submodule_entry_name(item), ), item['sub_module']))
+            elif not isinstance(item, (DeclaredVariable, Input, Output, Concatenation)):
+                # e.g., implicit operations
+                logger.debug('ITEM %s', item)
+            elif submodule is None:
+                if isinstance(item, (DeclaredVariable, Input)):
+                    yield path, 'Inputs', item.name, item
+                else:
+                    yield path, 'Outputs', item.name, item
+            elif item.name in inputs:
+                yield path, 'Inputs', item.name, item
+            elif item.name in outputs:
+                yield path, 'Outputs', item.name, item
+
+        # Reversed so that submodules are visited in the order they were added
+        stack.extend(reversed(children))
+
 
 def unpack_module(lst, compact_print=False, internal_call=False):
-    module_dict_1 = {'module' : {
+    """
+    Nested dictionary of the inputs, outputs and submodules of a
+    ModuleMaker `module_info` list:
+
+        {'module': {'Inputs': {name: {'type': ..., 'shape': ...}},
+                    'Outputs': {...},
+                    'Submodules': {name: {'Inputs': ..., 'Outputs': ...,
+                                          'Submodules': ...}}}}
+
+    Built from `iter_module_records` in a single pass; each module's
+    dictionary is created once and filled in place. If `internal_call` is
+    True, only the 'Submodules' dictionary of the root module is returned.
+    """
+    module_dict = _new_module_dict()
+    # Dictionary of every visited module, keyed by path
+    module_dicts = {(): module_dict}
+    for path, section, name, item in iter_module_records(lst, compact_print=compact_print):
+        if section == 'Submodules':
+            sub_dict = _new_module_dict()
+            module_dicts[path[:-1]]['Submodules'][name] = sub_dict
+            module_dicts[path] = sub_dict
+        else:
+            module_dicts[path][section][name] = {'type' : type(item).__name__, 'shape' : f"{item.shape}"}
+
+    if internal_call is True:
+        return module_dict['Submodules']
+    return {'module': module_dict}
+
+
+def _new_module_dict():
+    return {
         'Inputs': {},
         'Outputs': {},
         'Submodules' : {},
-    }}
-    module_dict_2 = {}
-    
-    for item in lst:
-        if isinstance(item, dict):
-            submodule = item['sub_module']
-            submodule_name = item['name']
-            if internal_call is True:
-                module_dict_2[submodule_name] = {
-                    'Inputs': {},
-                    'Outputs': {},
-                    'Submodules' : {},
-                }
-            else:
-                module_dict_1['module']['Submodules'][submodule_name] = {
-                    'Inputs': {},
-                    'Outputs': {},
-                    'Submodules' : {},
-                }
-            inputs = submodule.module_inputs
-            outputs = submodule.module_outputs
-            for sub_item in submodule.module_info:
-                # print(type(sub_item))
-                if isinstance(sub_item, dict):
-                    if compact_print == True: 
-                        pass
-                    else: 
-                        sub_list = [sub_item]
-                        if internal_call is True:
-                            module_dict_2[submodule_name]['Submodules'].update(unpack_module(sub_list, internal_call=True))
-                        else:   
-                            module_dict_1['module']['Submodules'][submodule_name]['Submodules'].update(unpack_module(sub_list, internal_call=True))
-                    #module_dict.update(unpack_list(item, key_func, value_func))
-                else:
-                    var_name = sub_item.name
-                    var_shape = sub_item.shape
-                    if internal_call is True: 
-                        if var_name in inputs:
-                            module_dict_2[submodule_name]['Inputs'][var_name] = {'type' : type(sub_item).__name__, 'shape' : f"{var_shape}"}
-                        elif var_name in outputs:
-                            module_dict_2[submodule_name]['Outputs'][var_name] = {'type' : type(sub_item).__name__, 'shape' : f"{var_shape}"}
-                    else:
-                        if var_name in inputs:
-                            module_dict_1['module']['Submodules'][submodule_name]['Inputs'][var_name] = {'type' : type(sub_item).__name__, 'shape' : f"{var_shape}"}
-                        elif var_name in outputs:
-                            module_dict_1['module']['Submodules'][submodule_name]['Outputs'][var_name] = {'type' : type(sub_item).__name__, 'shape' : f"{var_shape}"}
-        else:
-            print('ITEM', item)
-            if isinstance(item, DeclaredVariable) or isinstance(item, Input):
-                var_name = item.name
-                var_shape = item.shape
-                module_dict_1['module']['Inputs'][var_name] = {'type' : type(item).__name__, 'shape' : f"{var_shape}"}
-           
-            elif isinstance(item, Output) or isinstance(item, Concatenation):
-                var_name = item.name
-                var_shape = item.shape
-                module_dict_1['module']['Outputs'][var_name] = {'type' : type(item).__name__, 'shape' : f"{var_shape}"}
-
-    return Merge(module_dict_2, module_dict_1)
+    }
 
 
 # exit()
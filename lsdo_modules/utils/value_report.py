@@ -0,0 +1,79 @@
+import json
+
+import numpy as np
+
+from lsdo_modules.utils.unpack_module import iter_module_records
+from lsdo_modules.utils.dataflow import module_maker_chains, promoted_path_name
+
+
+def summarize_value(val, max_elements=10):
+    """
+    JSON-serializable summary of a variable value. Arrays with more than
+    `max_elements` entries are summarized by shape, min, max and norm
+    instead of being written in full.
+    """
+    val = np.asarray(val)
+    if val.size <= max_elements:
+        return dict(shape=list(val.shape), value=val.tolist())
+    return dict(
+        shape=list(val.shape),
+        min=float(np.min(val)),
+        max=float(np.max(val)),
+        norm=float(np.linalg.norm(val.ravel())),
+    )
+
+
+def format_summary(summary):
+    """
+    Short text version of a `summarize_value` summary for HTML tables.
+    """
+    if 'value' in summary:
+        value = np.asarray(summary['value'])
+        return np.array2string(value, precision=4, threshold=10) if value.ndim else f'{float(value):.6g}'
+    return f"min={summary['min']:.4g}, max={summary['max']:.4g}, norm={summary['norm']:.4g}"
+
+
+def fetch_values(sim, module_info, max_elements=10, promoted_vars=()):
+    """
+    Fetch and summarize the values of all variables of a ModuleMaker tree
+    while walking the tree once.
+
+    Variables are read by their names in the simulator, i.e., after the
+    promotions at every level of the tree (see `promoted_path_name`), with
+    `promoted_vars` the promoted variables of the root module. Values are
+    read one at a time with `sim[name]`, as Simulators have no bulk read,
+    but every simulator variable is read at most once (promoted variables
+    are shared by several modules) and summarized right away, so no copies
+    of large arrays are kept. Returns `{(path, name): summary}` for all
+    variables that were found in the simulator.
+    """
+    chains = module_maker_chains(module_info, promoted_vars)
+    summaries = dict()
+    # Summaries keyed by the simulator name they were read from
+    fetched = dict()
+    for path, section, name, item in iter_module_records(module_info):
+        if section == 'Submodules':
+            continue
+        sim_name = promoted_path_name(name, chains[path])
+        if sim_name not in fetched:
+            try:
+                val = sim[sim_name]
+            except KeyError:
+                continue
+            fetched[sim_name] = summarize_value(val, max_elements=max_elements)
+        summaries[(path, name)] = fetched[sim_name]
+    return summaries
+
+
+def write_value_sidecar(summaries, file_name):
+    """
+    Write `fetch_values` summaries to a compact JSON file of the form
+    `{"<module path>": {"<variable name>": summary}}`, where the root
+    module has the path "".
+    """
+    report = dict()
+    for (path, name), summary in summaries.items():
+        report.setdefault('.'.join(path), dict())[name] = summary
+    with open(file_name, 'w') as f:
+        json.dump(report, f, separators=(',', ':'))
+    return file_name
@@ -0,0 +1,422 @@
+import asyncio
+import collections
+import multiprocessing
+import multiprocessing.connection
+import os
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from lsdo_modules.utils.arrays import resolve_input
+from lsdo_modules.utils.logger import logger
+from lsdo_modules.utils.shared_outputs import SharedOutputBuffer
+
+
+def build_simulator(model_source, simulator_factory=None):
+    """
+    Simulator of the model described by `model_source`, which is a csdl
+    `Model`, a ModuleMaker, or a callable (e.g., a ModuleMaker subclass or
+    a `functools.partial`) that returns either of them. ModuleMakers are
+    assembled with `assemble_csdl`. `simulator_factory` defaults to the
+    Simulator of python_csdl_backend.
+    """
+    model = model_source() if callable(model_source) else model_source
+    if hasattr(model, 'assemble_csdl'):
+        model = model.assemble_csdl()
+    if simulator_factory is None:
+        from python_csdl_backend import Simulator
+        simulator_factory = Simulator
+    return simulator_factory(model)
+
+
+def evaluate_simulator(sim, inputs, outputs, of=None, wrt=None, out=None):
+    """
+    Set `inputs` (dict of values) on a Simulator, run it and return a
+    dictionary with the values of the `outputs` and, if `wrt` is given,
+    the total derivatives of `of` (default: `outputs`) with respect to `wrt`.
+
+    If `out` (dict of arrays) is given, the values of the outputs are
+    written to its arrays instead and not returned.
+    """
+    for name, val in inputs.items():
+        sim[name] = resolve_input(val)
+    sim.run()
+    if out is None:
+        values = {name: np.array(sim[name]) for name in outputs}
+    else:
+        values = None
+        for name in outputs:
+            out[name][...] = np.reshape(sim[name], out[name].shape)
+    result = dict(outputs=values, derivatives=None)
+    if wrt is not None:
+        result['derivatives'] = sim.compute_totals(of=list(outputs) if of is None else of, wrt=wrt)
+    return result
+
+
+# Shared output buffers attached by a worker process, by descriptor; the
+# oldest are closed when more than `_max_attached_buffers` are attached
+_attached_buffers = collections.OrderedDict()
+_max_attached_buffers = 4
+
+
+def _attached_buffer(descriptor):
+    # Attach to a shared output buffer once per worker
+    try:
+        _attached_buffers.move_to_end(descriptor)
+        return _attached_buffers[descriptor]
+    except KeyError:
+        pass
+    output_buffer = _attached_buffers[descriptor] = SharedOutputBuffer.attach(descriptor)
+    if len(_attached_buffers) > _max_attached_buffers:
+        _, oldest = _attached_buffers.popitem(last=False)
+        oldest.close()
+    return output_buffer
+
+
+def _evaluate_into(sim, descriptor, index, inputs, outputs, of, wrt):
+    # Evaluate and write the outputs to slot `index` of a shared buffer
+    output_buffer = _attached_buffer(descriptor)
+    return evaluate_simulator(sim, inputs, outputs, of=of, wrt=wrt, out=output_buffer.slot(index))
+
+
+def _output_shapes(sim, outputs):
+    return {name: np.shape(sim[name]) for name in outputs}
+
+
+def _worker_main(conn, model_source, simulator_factory):
+    # Build the simulator once, then evaluate tasks until the pool sends None
+    try:
+        sim = build_simulator(model_source, simulator_factory)
+    except BaseException:
+        conn.send(('error', traceback.format_exc()))
+        conn.close()
+        return
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, function, args = task
+        try:
+            conn.send((task_id, 'ok', function(sim, *args)))
+        except Exception:
+            conn.send((task_id, 'error', traceback.format_exc()))
+    conn.close()
+
+
+class SimulatorExecutor:
+    """
+    Runs the evaluations of one Simulator in a background thread, one at a
+    time since a Simulator holds the state of a single evaluation. Has the
+    `submit` method of `ModuleWorkerPool`, so both can be used as the
+    evaluator of a Module (see `Module.set_evaluator`).
+    """
+    def __init__(self, sim):
+        self.sim = sim
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='SimulatorExecutor')
+        # Futures of the evaluations that are not done, so they can be
+        # cancelled on 'close' ('shutdown(cancel_futures=True)' needs Python 3.9)
+        self._lock = threading.Lock()
+        self._futures = set()
+
+    def submit(self, inputs, outputs, of=None, wrt=None):
+        """
+        Schedule one evaluation (see `evaluate_simulator`) and return a
+        `concurrent.futures.Future` of its result.
+        """
+        with self._lock:
+            future = self._executor.submit(evaluate_simulator, self.sim, inputs, outputs, of=of, wrt=wrt)
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def close(self):
+        """
+        Cancel the evaluations that have not started and stop the thread.
+        """
+        with self._lock:
+            futures = list(self._futures)
+        # Running evaluations cannot be cancelled and are waited for
+        for future in futures:
+            future.cancel()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _Worker:
+    __slots__ = ('process', 'conn', 'task')
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        # (task id, future) of the evaluation the worker is running
+        self.task = None
+
+
+class ModuleWorkerPool:
+    """
+    Pool of local worker processes that evaluate the same model.
+
+    Every worker builds the Simulator once at start-up (see
+    `build_simulator`), so `model_source` and `simulator_factory` must be
+    picklable, e.g., a ModuleMaker subclass defined at module level or an
+    assembled model. Input values are sent to the workers and outputs and
+    derivatives returned over pipes; each worker runs one evaluation at a
+    time and receives the next one as soon as it is done. With an
+    `output_buffer` (see `output_buffer`), `evaluate_batch` has the
+    workers write the outputs to shared memory instead.
+
+    `evaluate_batch` is the synchronous batch API; `evaluate_async` and
+    `evaluate_batch_async` can be awaited in an asyncio event loop and
+    `submit` returns a `concurrent.futures.Future`. Use the pool as a
+    context manager or call `close` to stop the workers.
+
+        with ModuleWorkerPool(Wing, num_workers=4) as pool:
+            results = pool.evaluate_batch([{'span': s} for s in spans], outputs=['lift'])
+    """
+    def __init__(self, model_source, num_workers=None, simulator_factory=None, start_method='spawn'):
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        if num_workers < 1:
+            raise ValueError(f'num_workers must be at least 1, got {num_workers}')
+
+        self._lock = threading.Lock()
+        self._pending = collections.deque()
+        self._idle = []
+        self._workers = []
+        self._task_ids = iter(range(1 << 62))
+        self._closed = False
+
+        context = multiprocessing.get_context(start_method)
+        for _ in range(num_workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, args=(child_conn, model_source, simulator_factory),
+                                      daemon=True)
+            process.start()
+            child_conn.close()
+            self._workers.append(_Worker(process, parent_conn))
+        self._all_workers = list(self._workers)
+
+        # Wait until all simulators are built
+        errors = []
+        for worker in self._workers:
+            try:
+                status, message = worker.conn.recv()
+            except EOFError:
+                status, message = 'error', f'worker {worker.process.pid} exited during start-up'
+            if status == 'error':
+                errors.append(message)
+        if errors:
+            self._closed = True
+            for worker in self._workers:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            self._stop_workers()
+            raise RuntimeError(f'Worker failed to build the model:\n{errors[0]}')
+        self._idle = list(self._workers)
+        logger.debug('started %d module workers', num_workers)
+
+        self._receiver = threading.Thread(target=self._receive, name='ModuleWorkerPool', daemon=True)
+        self._receiver.start()
+
+    @property
+    def num_workers(self):
+        """
+        Number of running workers.
+        """
+        return len(self._workers)
+
+    def submit(self, inputs, outputs, of=None, wrt=None):
+        """
+        Schedule one evaluation (see `evaluate_simulator` for the arguments)
+        and return a `concurrent.futures.Future` of its result. Evaluations
+        that have not started yet can be cancelled.
+        """
+        return self._submit(evaluate_simulator, (inputs, outputs, of, wrt))
+
+    def output_shapes(self, outputs):
+        """
+        Shapes of the `outputs`, as reported by the Simulator of a worker.
+        """
+        return self._submit(_output_shapes, (list(outputs), )).result()
+
+    def output_buffer(self, outputs, batch_size, dtype=np.float64):
+        """
+        `SharedOutputBuffer` for the `outputs` of `batch_size` evaluations,
+        laid out from the shapes reported by the workers. Buffers can also
+        be created from the shapes of a module (see `module_output_shapes`).
+        """
+        return SharedOutputBuffer(self.output_shapes(outputs), batch_size, dtype=dtype)
+
+    def _submit(self, function, args):
+        # Schedule 'function(sim, *args)' on a worker
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('ModuleWorkerPool is closed')
+            if not self._workers:
+                raise RuntimeError('All workers of the ModuleWorkerPool have exited')
+            self._pending.append((next(self._task_ids), future, (function, args)))
+            self._dispatch()
+        return future
+
+    def evaluate(self, inputs, outputs, of=None, wrt=None):
+        """
+        Run one evaluation on a worker and return its result.
+        """
+        return self.submit(inputs, outputs, of=of, wrt=wrt).result()
+
+    def evaluate_batch(self, inputs_list, outputs, of=None, wrt=None, output_buffer=None):
+        """
+        Evaluate every dictionary of inputs in `inputs_list` on the workers
+        and return the results in the same order.
+
+        If a `SharedOutputBuffer` with at least `len(inputs_list)` slots is
+        given, the workers write the outputs of evaluation `i` to slot `i`
+        of the buffer and the outputs of the results are views of the
+        buffer, so no output arrays are pickled. Each worker maps a buffer
+        once and keeps the most recently used buffers mapped, so the memory
+        of a closed buffer is freed once the workers have used other
+        buffers or exited.
+        """
+        if output_buffer is None:
+            futures = [self.submit(inputs, outputs, of=of, wrt=wrt) for inputs in inputs_list]
+            return [future.result() for future in futures]
+
+        if len(inputs_list) > output_buffer.batch_size:
+            raise ValueError(f'Batch of {len(inputs_list)} evaluations does not fit in an output buffer '
+                             f'with {output_buffer.batch_size} slots')
+        missing = [name for name in outputs if name not in output_buffer]
+        if missing:
+            raise KeyError(f'Outputs {missing} are not in the output buffer')
+        descriptor = output_buffer.descriptor
+        futures = [self._submit(_evaluate_into, (descriptor, i, inputs, outputs, of, wrt))
+                   for i, inputs in enumerate(inputs_list)]
+        results = []
+        for i, future in enumerate(futures):
+            result = future.result()
+            result['outputs'] = {name: output_buffer[name][i] for name in outputs}
+            results.append(result)
+        return results
+
+    async def evaluate_async(self, inputs, outputs, of=None, wrt=None):
+        """
+        Awaitable version of `evaluate`. Cancelling the awaiting task
+        cancels the evaluation if it has not started yet.
+        """
+        return await asyncio.wrap_future(self.submit(inputs, outputs, of=of, wrt=wrt))
+
+    async def evaluate_batch_async(self, inputs_list, outputs, of=None, wrt=None):
+        """
+        Awaitable version of `evaluate_batch`.
+        """
+        futures = [asyncio.wrap_future(self.submit(inputs, outputs, of=of, wrt=wrt)) for inputs in inputs_list]
+        return list(await asyncio.gather(*futures))
+
+    def close(self):
+        """
+        Cancel the evaluations that have not started, wait for the running
+        ones and stop the workers.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            while self._pending:
+                self._pending.popleft()[1].cancel()
+            for worker in self._idle:
+                worker.conn.send(None)
+            self._idle = []
+        self._receiver.join()
+        self._stop_workers()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _dispatch(self):
+        # Send pending evaluations to idle workers; called with the lock held
+        while self._pending and self._idle:
+            task_id, future, (function, args) = self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            worker = self._idle.pop()
+            worker.task = (task_id, future)
+            try:
+                worker.conn.send((task_id, function, args))
+            except Exception as error:
+                # E.g., inputs that cannot be pickled
+                worker.task = None
+                self._idle.append(worker)
+                future.set_exception(error)
+
+    def _receive(self):
+        # Resolve the futures of finished evaluations and give the workers
+        # their next evaluation; exits when all workers have stopped
+        connections = {worker.conn: worker for worker in self._workers}
+        while connections:
+            for conn in multiprocessing.connection.wait(list(connections)):
+                worker = connections[conn]
+                try:
+                    task_id, status, result = conn.recv()
+                except (EOFError, OSError):
+                    del connections[conn]
+                    self._remove_worker(worker)
+                    continue
+
+                _, future = worker.task
+                worker.task = None
+                if status == 'ok':
+                    future.set_result(result)
+                else:
+                    future.set_exception(RuntimeError(f'Module evaluation failed in worker:\n{result}'))
+
+                with self._lock:
+                    if self._closed:
+                        conn.send(None)
+                    else:
+                        self._idle.append(worker)
+                        self._dispatch()
+
+    def _remove_worker(self, worker):
+        with self._lock:
+            if worker in self._idle:
+                self._idle.remove(worker)
+            self._workers.remove(worker)
+            if worker.task is not None:
+                worker.task[1].set_exception(RuntimeError(f'Worker {worker.process.pid} exited during an evaluation'))
+                worker.task = None
+            if not self._closed:
+                logger.warning('module worker %d exited, %d workers left', worker.process.pid, len(self._workers))
+            if not self._workers:
+                while self._pending:
+                    _, future, _ = self._pending.popleft()
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(RuntimeError('All workers of the ModuleWorkerPool have exited'))
+
+    def _stop_workers(self):
+        for worker in self._all_workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+            worker.conn.close()
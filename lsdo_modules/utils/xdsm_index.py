@@ -0,0 +1,123 @@
+class ModuleTreeIndex:
+    """
+    Flat index of a ModuleCSDL tree for building XDSM diagrams.
+
+    The `sub_modules` dictionaries are walked once, iteratively, in
+    pre-order (a module before its submodules, submodules in the order
+    they were added). For every module the index stores its outputs and
+    input names with their importance, and a producer index maps each
+    output name to the modules that compute it. Diagrams for any
+    importance level are then built from the index without walking the
+    tree again.
+    """
+    def __init__(self, module_csdl):
+        self.name = module_csdl.name
+        self.root_inputs = list(module_csdl.module_inputs)
+        self.root_outputs = list(module_csdl.module_outputs)
+        # Pre-order list of module names
+        self.modules = []
+        # Per module (same order as 'modules')
+        self.outputs = []
+        self.user_inputs = []
+        self.declared_vars = []
+        # Output name -> list of (position, importance) of its producers
+        self.producers = dict()
+        # Position of the last top-level submodule
+        self.last_top_level = None
+
+        stack = [(name, values, True) for name, values in reversed(module_csdl.sub_modules.items())]
+        while stack:
+            name, values, top_level = stack.pop()
+            position = len(self.modules)
+            if top_level:
+                self.last_top_level = position
+            self.modules.append(name)
+            self.user_inputs.append([(k, v['importance']) for k, v in values['inputs'].items()])
+            self.declared_vars.append(list(values['declared_vars']))
+            outputs = [(k, v['importance']) for k, v in values['outputs'].items()]
+            self.outputs.append(outputs)
+            for output, output_importance in outputs:
+                self.producers.setdefault(output, []).append((position, output_importance))
+            stack.extend((sub_name, sub_values, False) for sub_name, sub_values in reversed(values['submodules'].items()))
+
+    def user_module_inputs(self, importance):
+        """
+        Inputs set by the user (over the whole tree) that are shown at
+        the given importance level, followed by the inputs of the root module.
+        """
+        inputs = [name for module_inputs in self.user_inputs
+                  for name, input_importance in module_inputs if input_importance <= importance + 1]
+        return inputs + self.root_inputs
+
+    def important_outputs(self, position, importance):
+        return [name for name, output_importance in self.outputs[position]
+                if 0 < output_importance <= importance]
+
+    def upstream_connections(self, position, importance):
+        """
+        Map from producer module to the declared variables of the module
+        at `position` that it computes. Only producers visited before (or
+        at) `position` with outputs up to `importance` are considered.
+        """
+        connections = dict()
+        for name in self.declared_vars[position]:
+            for producer_position, output_importance in self.producers.get(name, ()):
+                if producer_position <= position and 0 < output_importance <= importance:
+                    connections.setdefault(self.modules[producer_position], []).append(name)
+        return connections
+
+
+def build_xdsm(index, importance=0, show_outputs=True, label=str):
+    """
+    Build a pyxdsm `XDSM` object from a `ModuleTreeIndex`.
+
+    With `importance=0`, the diagram shows the top-level module with its
+    inputs and outputs. Otherwise every module with at least one output of
+    importance in `(0, importance]` is shown with its important outputs,
+    user-defined inputs and connections from upstream modules.
+    `label` converts variable and module names into LaTeX labels.
+    """
+    from pyxdsm.XDSM import XDSM, OPT, FUNC, RIGHT
+
+    x = XDSM()
+    user_module_inputs = index.user_module_inputs(importance)
+
+    if importance == 0:
+        x.add_system(index.name, OPT, label(index.name))
+        parent_module_inputs = index.root_inputs or user_module_inputs
+        parent_module_outputs = index.root_outputs
+        if not parent_module_outputs and index.last_top_level is not None:
+            # All outputs of the subtree of the last top-level submodule
+            parent_module_outputs = [name
+                for module_outputs in index.outputs[index.last_top_level:]
+                for name, output_importance in module_outputs if output_importance <= importance + 1]
+        x.add_input(index.name, [label(input) for input in parent_module_inputs], label_width=2)
+        x.add_output(index.name, [label(output) for output in parent_module_outputs], side=RIGHT)
+        return x
+
+    user_input_set = set(user_module_inputs)
+    found_outputs = False
+    for position, module in enumerate(index.modules):
+        outputs = index.important_outputs(position, importance)
+        if not outputs:
+            continue
+        found_outputs = True
+
+        x.add_system(module, FUNC, label(module))
+        if show_outputs is True:
+            x.add_output(module, [label(output) for output in dict.fromkeys(outputs)], side=RIGHT)
+
+        # Any inputs defined by the user
+        module_inputs = [name for name, _ in index.user_inputs[position]] + index.declared_vars[position]
+        inputs_from_user = [name for name in dict.fromkeys(module_inputs) if name in user_input_set]
+        if inputs_from_user:
+            x.add_input(module, [label(connection) for connection in inputs_from_user], label_width=2)
+
+        # Any inputs from upstream modules
+        for upstream_module, connections in index.upstream_connections(position, importance).items():
+            x.connect(upstream_module, module, [label(connection) for connection in connections])
+
+    if not found_outputs:
+        raise Exception('All registered outputs have zero importance or have higher importance than specified by user')
+
+    return x
@@ -0,0 +1,133 @@
+"""
+Generators for synthetic ModuleCSDL and ModuleMaker trees used by the
+scaling benchmarks.
+
+Every tree is controlled by the same knobs:
+    - `depth`: number of nested levels below the root
+    - `fan_out`: number of submodules added by each non-leaf module
+    - `num_vars`: number of input/output pairs registered per module
+    - `promotion`: 'all' (promote everything), 'subset' (promote half of
+      the outputs) or 'none' (promote nothing)
+    - `num_implicit`: number of implicit operations per module
+
+Variable names are prefixed with the path of the module in the tree so
+that promoting everything to the root never produces name clashes.
+"""
+from csdl import Model, NewtonSolver, ScipyKrylov
+
+from lsdo_modules.module_csdl.module_csdl import ModuleCSDL
+from lsdo_modules.module.module_maker import ModuleMaker
+
+
+PROMOTION_PATTERNS = ('all', 'subset', 'none')
+
+
+def _declare_tree_parameters(parameters):
+    parameters.declare('prefix', default='m', types=str)
+    parameters.declare('depth', default=2, types=int, lower=0)
+    parameters.declare('fan_out', default=2, types=int, lower=0)
+    parameters.declare('num_vars', default=4, types=int, lower=1)
+    parameters.declare('var_size', default=10, types=int, lower=1)
+    parameters.declare('promotion', default='all', values=PROMOTION_PATTERNS)
+    parameters.declare('num_implicit', default=0, types=int, lower=0)
+
+
+def _child_kwargs(parameters, i):
+    return dict(
+        prefix=f"{parameters['prefix']}_{i}",
+        depth=parameters['depth'] - 1,
+        fan_out=parameters['fan_out'],
+        num_vars=parameters['num_vars'],
+        var_size=parameters['var_size'],
+        promotion=parameters['promotion'],
+        num_implicit=parameters['num_implicit'],
+    )
+
+
+def _promoted_subset(prefix, num_vars):
+    return [f'{prefix}_out_{i}' for i in range(0, num_vars, 2)]
+
+
+class SyntheticModuleCSDL(ModuleCSDL):
+    def initialize(self):
+        _declare_tree_parameters(self.parameters)
+
+    def define(self):
+        prefix = self.parameters['prefix']
+        num_vars = self.parameters['num_vars']
+        var_size = self.parameters['var_size']
+        promotion = self.parameters['promotion']
+
+        for i in range(num_vars):
+            x = self.register_module_input(f'{prefix}_in_{i}', shape=(var_size, ))
+            self.register_module_output(f'{prefix}_out_{i}', 2 * x + 1, importance=i + 1)
+
+        for j in range(self.parameters['num_implicit']):
+            a = self.register_module_input(f'{prefix}_a_{j}', val=2.)
+            residual_model = Model()
+            y = residual_model.declare_variable(f'{prefix}_y_{j}')
+            a_res = residual_model.declare_variable(f'{prefix}_a_{j}')
+            residual_model.register_output(f'{prefix}_r_{j}', y**2 - a_res)
+            solve = self.create_implicit_operation(residual_model)
+            solve.declare_state(f'{prefix}_y_{j}', residual=f'{prefix}_r_{j}')
+            solve.nonlinear_solver = NewtonSolver(solve_subsystems=False, maxiter=20, iprint=False)
+            solve.linear_solver = ScipyKrylov()
+            solve(a)
+
+        if self.parameters['depth'] > 0:
+            for i in range(self.parameters['fan_out']):
+                child_kwargs = _child_kwargs(self.parameters, i)
+                child = SyntheticModuleCSDL(name=child_kwargs['prefix'], **child_kwargs)
+                if promotion == 'all':
+                    self.add_module(child, child_kwargs['prefix'])
+                elif promotion == 'subset':
+                    self.add_module(child, child_kwargs['prefix'],
+                                    promotes=_promoted_subset(child_kwargs['prefix'], num_vars))
+                else:
+                    self.add_module(child, child_kwargs['prefix'], promotes=[])
+
+
+class SyntheticModuleMaker(ModuleMaker):
+    def initialize_module(self):
+        _declare_tree_parameters(self.parameters)
+
+    def define_module(self):
+        prefix = self.parameters['prefix']
+        num_vars = self.parameters['num_vars']
+        var_size = self.parameters['var_size']
+        promotion = self.parameters['promotion']
+
+        for i in range(num_vars):
+            x = self.register_module_input(f'{prefix}_in_{i}', shape=(var_size, ))
+            self.register_module_output(f'{prefix}_out_{i}', 2 * x + 1)
+
+        for j in range(self.parameters['num_implicit']):
+            a = self.register_module_input(f'{prefix}_a_{j}')
+            implicit_module = ModuleMaker()
+            y = implicit_module.register_module_input(f'{prefix}_y_{j}')
+            a_res = implicit_module.register_module_input(f'{prefix}_a_{j}')
+            implicit_module.register_module_output(f'{prefix}_r_{j}', y**2 - a_res)
+            solve = self.create_implicit_operation(implicit_module)
+            solve.declare_state(f'{prefix}_y_{j}', residual=f'{prefix}_r_{j}')
+            solve.nonlinear_solver = NewtonSolver(solve_subsystems=False, maxiter=20, iprint=False)
+            solve.linear_solver = ScipyKrylov()
+            solve(a)
+
+        if self.parameters['depth'] > 0:
+            for i in range(self.parameters['fan_out']):
+                child_kwargs = _child_kwargs(self.parameters, i)
+                child = SyntheticModuleMaker(**child_kwargs)
+                if promotion == 'all':
+                    self.add_module(child, child_kwargs['prefix'])
+                elif promotion == 'subset':
+                    self.add_module(child, child_kwargs['prefix'],
+                                    promote=_promoted_subset(child_kwargs['prefix'], num_vars))
+                else:
+                    self.add_module(child, child_kwargs['prefix'], promote=[])
+
+
+def count_modules(depth, fan_out):
+    """
+    Number of modules (including the root) in a synthetic tree.
+    """
+    return sum(fan_out**level for level in range(depth + 1))
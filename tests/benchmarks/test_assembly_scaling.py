@@ -0,0 +1,162 @@
+"""
+Scaling benchmarks for module assembly.
+
+Each case builds a synthetic ModuleCSDL or ModuleMaker tree (see
+`synthetic_modules.py`) and measures
+    - `assembly_time`: `define()` of a ModuleCSDL tree or
+      `assemble_csdl()` of a ModuleMaker tree
+    - `graph_time`: construction of the csdl `GraphRepresentation`
+    - `peak_memory`: peak traced allocation (bytes) during both steps,
+      measured in a separate run so that tracing does not slow down the
+      timed runs
+
+The measurements are compared against the committed `baseline.json`. A
+case fails if any metric exceeds its baseline by more than the relative
+threshold; cases without an entry in the baseline are skipped. Baselines
+are recorded on the reference machine with `LSDO_MODULES_BENCH_UPDATE=1`
+and committed.
+
+The benchmarks are slow and therefore opt-in:
+
+    LSDO_MODULES_BENCHMARK=1 pytest tests/benchmarks
+
+Environment variables:
+    - `LSDO_MODULES_BENCH_THRESHOLD`: allowed relative regression (default 0.25)
+    - `LSDO_MODULES_BENCH_UPDATE=1`: overwrite the stored baseline with the
+      current measurements instead of comparing
+"""
+import json
+import os
+import time
+import tracemalloc
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get('LSDO_MODULES_BENCHMARK') != '1',
+    reason='set LSDO_MODULES_BENCHMARK=1 to run the scaling benchmarks',
+)
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+THRESHOLD = float(os.environ.get('LSDO_MODULES_BENCH_THRESHOLD', 0.25))
+UPDATE_BASELINE = os.environ.get('LSDO_MODULES_BENCH_UPDATE') == '1'
+# Absolute slack so that sub-millisecond timings do not fail on noise
+TIME_SLACK = 5e-3
+MEMORY_SLACK = 256 * 1024
+REPEATS = 3
+
+BASE_CASE = dict(depth=2, fan_out=2, num_vars=4, promotion='all', num_implicit=0)
+SCALED_DIMENSIONS = {
+    'depth': [1, 2, 3, 4],
+    'fan_out': [1, 2, 4, 8],
+    'num_vars': [4, 16, 64],
+    'promotion': ['all', 'subset', 'none'],
+    'num_implicit': [0, 2, 4],
+}
+
+
+def _cases():
+    cases = []
+    for kind in ('module_csdl', 'module_maker'):
+        for dimension, values in SCALED_DIMENSIONS.items():
+            for value in values:
+                tree = dict(BASE_CASE, **{dimension: value})
+                cases.append((f'{kind}-{dimension}-{value}', kind, tree))
+    return cases
+
+
+def _load_baseline():
+    if not os.path.isfile(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE) as f:
+        return json.load(f)
+
+
+def _store_baseline(case_id, metrics):
+    baseline = _load_baseline()
+    baseline[case_id] = metrics
+    with open(BASELINE_FILE, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def _run(kind, tree):
+    # Assemble one synthetic tree and build its GraphRepresentation;
+    # returns the times of both steps
+    from csdl import GraphRepresentation
+    from synthetic_modules import SyntheticModuleCSDL, SyntheticModuleMaker
+
+    if kind == 'module_csdl':
+        # 'define' is timed on one instance; GraphRepresentation defines
+        # a fresh instance itself, so it is timed separately
+        t0 = time.perf_counter()
+        SyntheticModuleCSDL(**tree).define()
+        t1 = time.perf_counter()
+        GraphRepresentation(SyntheticModuleCSDL(**tree))
+        t2 = time.perf_counter()
+    else:
+        t0 = time.perf_counter()
+        csdl_model = SyntheticModuleMaker(**tree).assemble_csdl()
+        t1 = time.perf_counter()
+        GraphRepresentation(csdl_model)
+        t2 = time.perf_counter()
+    return t1 - t0, t2 - t1
+
+
+def measure(kind, tree):
+    """
+    Measure assembly time, GraphRepresentation time and peak memory of
+    one synthetic tree. Times are the best of `REPEATS` untraced runs;
+    the peak memory is traced in one additional run.
+    """
+    times = [_run(kind, tree) for _ in range(REPEATS)]
+
+    tracemalloc.start()
+    try:
+        _run(kind, tree)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return dict(
+        assembly_time=min(assembly_time for assembly_time, _ in times),
+        graph_time=min(graph_time for _, graph_time in times),
+        peak_memory=peak_memory,
+    )
+
+
+@pytest.mark.parametrize('case_id, kind, tree', _cases(), ids=[c[0] for c in _cases()])
+def test_assembly_scaling(case_id, kind, tree):
+    '''
+    Test description: assembly time, GraphRepresentation time and peak
+    memory must not regress beyond the threshold relative to the baseline.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    metrics = measure(kind, tree)
+    if UPDATE_BASELINE:
+        _store_baseline(case_id, metrics)
+        return
+
+    baseline = _load_baseline().get(case_id)
+    if baseline is None:
+        pytest.skip(f'{case_id} has no entry in {BASELINE_FILE}; record it with LSDO_MODULES_BENCH_UPDATE=1')
+
+    regressions = []
+    for metric, value in metrics.items():
+        slack = MEMORY_SLACK if metric == 'peak_memory' else TIME_SLACK
+        allowed = baseline[metric] * (1 + THRESHOLD) + slack
+        if value > allowed:
+            regressions.append(f'{metric}: {value:.6g} > {allowed:.6g} (baseline {baseline[metric]:.6g})')
+
+    assert not regressions, f'{case_id} regressed:\n' + '\n'.join(regressions)
+
+
+if __name__ == '__main__':
+    from synthetic_modules import count_modules
+    print(f"{'case':36s} {'modules':>8s} {'assembly [s]':>13s} {'graph [s]':>10s} {'peak [MB]':>10s}")
+    for case_id, kind, tree in _cases():
+        metrics = measure(kind, tree)
+        print(f"{case_id:36s} {count_modules(tree['depth'], tree['fan_out']):8d} "
+              f"{metrics['assembly_time']:13.4f} {metrics['graph_time']:10.4f} "
+              f"{metrics['peak_memory'] / 1e6:10.2f}")
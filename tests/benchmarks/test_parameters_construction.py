@@ -0,0 +1,166 @@
+"""
+Microbenchmark of the per-instance cost of `Parameters`.
+
+Every ModuleMaker/Module instance declares its options and calls
+`parameters.update(kwargs)`, so sweeps that create tens of thousands of
+module instances pay this cost each time. The benchmark compares the
+current implementation (__slots__ entries whose checked metadata is bound
+into one tuple at declaration) with the previous dict-based
+implementation, which is reproduced below, and fails if the current one
+is not cheaper per instance.
+
+    LSDO_MODULES_BENCHMARK=1 pytest -s tests/benchmarks/test_parameters_construction.py
+    python tests/benchmarks/test_parameters_construction.py
+"""
+import os
+import timeit
+
+import pytest
+
+
+pytestmark = pytest.mark.skipif(
+    os.environ.get('LSDO_MODULES_BENCHMARK') != '1',
+    reason='set LSDO_MODULES_BENCHMARK=1 to run the benchmarks',
+)
+
+NUM_INSTANCES = 20000
+REPEATS = 10
+
+_undefined = object()
+
+
+class DictParameters(object):
+    """
+    Previous implementation: one 9-key dict per option and a full metadata
+    lookup in `_assert_valid` on every set (error messages shortened).
+    """
+    def __init__(self, read_only=False):
+        self._dict = {}
+        self._read_only = read_only
+
+    def _assert_valid(self, name, value):
+        meta = self._dict[name]
+        values = meta['values']
+        types = meta['types']
+        lower = meta['lower']
+        upper = meta['upper']
+
+        if not (value is None and meta['allow_none']):
+            if values is not None:
+                if value not in values:
+                    raise ValueError(name)
+            elif types is not None:
+                if not isinstance(value, types):
+                    raise TypeError(name)
+            if upper is not None:
+                if value > upper:
+                    raise ValueError(name)
+            if lower is not None:
+                if value < lower:
+                    raise ValueError(name)
+
+        if meta['check_valid'] is not None:
+            meta['check_valid'](name, value)
+
+    def declare(self, name, default=_undefined, values=None, types=None, desc='',
+                upper=None, lower=None, check_valid=None, allow_none=False):
+        if values is not None and not isinstance(values, (set, list, tuple)):
+            raise TypeError(name)
+        if types is not None and not isinstance(types, (type, set, list, tuple)):
+            raise TypeError(name)
+        if types is not None and values is not None:
+            raise RuntimeError(name)
+
+        default_provided = default is not _undefined
+        self._dict[name] = {
+            'value': default,
+            'values': values,
+            'types': types,
+            'desc': desc,
+            'upper': upper,
+            'lower': lower,
+            'check_valid': check_valid,
+            'has_been_set': default_provided,
+            'allow_none': allow_none,
+        }
+        if default_provided:
+            self._assert_valid(name, default)
+
+    def update(self, in_dict):
+        for name in in_dict:
+            self[name] = in_dict[name]
+
+    def __setitem__(self, name, value):
+        try:
+            meta = self._dict[name]
+        except KeyError:
+            raise KeyError(name)
+        if self._read_only:
+            raise KeyError(name)
+        self._assert_valid(name, value)
+        meta['value'] = value
+        meta['has_been_set'] = True
+
+    def __getitem__(self, name):
+        try:
+            meta = self._dict[name]
+            if meta['has_been_set']:
+                return meta['value']
+            else:
+                raise RuntimeError(name)
+        except KeyError:
+            raise KeyError(name)
+
+
+KWARGS = dict(num_nodes=10, mach_number=0.3, solver='newton')
+
+
+def construct_module_parameters(parameters_class):
+    """
+    What a typical module instance does: declare, update with kwargs, read.
+    """
+    parameters = parameters_class()
+    parameters.declare('num_nodes', default=1, types=int, lower=1)
+    parameters.declare('mach_number', default=0.5, types=float, lower=0., upper=1.)
+    parameters.declare('solver', default='newton', values=('newton', 'nlbgs'))
+    parameters.declare('name', default='module', types=str)
+    parameters.declare('mesh', default=None, allow_none=True)
+    parameters.declare('scaling_factor', default=1.)
+    parameters.update(KWARGS)
+    return parameters['num_nodes'], parameters['mach_number'], parameters['solver']
+
+
+def measure():
+    """
+    Best per-instance time of both implementations. Runs of the two are
+    interleaved so that drifts of the machine load affect both equally.
+    """
+    from lsdo_modules.utils.parameters import Parameters
+
+    implementations = (('dict entries', DictParameters), ('compiled', Parameters))
+    timings = {label: float('inf') for label, _ in implementations}
+    for _ in range(REPEATS):
+        for label, parameters_class in implementations:
+            t = timeit.timeit(lambda: construct_module_parameters(parameters_class), number=NUM_INSTANCES)
+            timings[label] = min(timings[label], t / NUM_INSTANCES)
+    return timings
+
+
+def report(timings):
+    for label, t in timings.items():
+        print(f'{label:14s}: {t * 1e6:.2f} us per module instance')
+    print(f"cost relative to dict entries: {timings['compiled'] / timings['dict entries']:.2f}x")
+
+
+def test_parameters_construction_cost():
+    '''
+    Test description: per-instance declare/update/get cost is lower than with the dict-based implementation.
+    '''
+    timings = measure()
+    report(timings)
+
+    assert timings['compiled'] < timings['dict entries']
+
+
+if __name__ == '__main__':
+    report(measure())
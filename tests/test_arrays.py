@@ -0,0 +1,120 @@
+import tracemalloc
+
+import numpy as np
+
+
+'''
+Test to make sure module inputs are reshaped without copying
+'''
+def test_as_input_array():
+    '''
+    Test description: contiguous arrays are reshaped as views, read-only views leave the caller's array writeable and copies are only made on request.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.arrays import as_input_array
+
+    # Run test scenario
+    mesh = np.arange(12.).reshape(4, 3)
+    flat = as_input_array(mesh, shape=(12, ))
+    read_only = as_input_array(mesh, shape=(2, 6), read_only=True)
+    copied = as_input_array(mesh, copy=True)
+    transposed = as_input_array(mesh.T, shape=(12, ))
+
+    # Check to make sure values are correct
+    assert as_input_array(2.) == 2.
+    assert as_input_array(mesh) is mesh
+    assert flat.shape == (12, ) and np.shares_memory(flat, mesh)
+    assert read_only.shape == (2, 6) and np.shares_memory(read_only, mesh)
+    assert not read_only.flags.writeable
+    assert mesh.flags.writeable
+    assert not np.shares_memory(copied, mesh)
+    np.testing.assert_array_equal(transposed, mesh.T.ravel())
+
+
+'''
+Test to make sure referencing a mesh from many modules does not copy it
+'''
+def test_module_input_memory():
+    '''
+    Test description: peak traced memory does not scale with the number of modules that reference the same mesh.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.module.module import Module
+    from lsdo_modules.utils.arrays import as_input_array
+
+    class MeshModule(Module):
+        def initialize(self, kwargs):
+            pass
+
+    # Run test scenario
+    mesh = np.ones((1000, 500, 3))
+    num_modules = 20
+
+    tracemalloc.start()
+    try:
+        modules = []
+        for i in range(num_modules):
+            module = MeshModule()
+            module.set_module_input('mesh', mesh, read_only=i % 2 == 0)
+            # What ModuleCSDL does with the value of a registered input
+            as_input_array(module.inputs['mesh']['val'], shape=(1000 * 500, 3))
+            modules.append(module)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Check to make sure values are correct
+    assert peak < mesh.nbytes / 4
+    assert all(np.shares_memory(module.inputs['mesh']['val'], mesh) for module in modules)
+
+
+'''
+Test to make sure module inputs can be memory-mapped from files
+'''
+def test_memmap_source(tmp_path):
+    '''
+    Test description: .npy files and uncompressed .npz members are memory-mapped lazily and pickled by file name.
+    '''
+    import pickle
+    import pytest
+
+    # Import class/function to test
+    from lsdo_modules.module.module import Module
+    from lsdo_modules.utils.arrays import MemmapSource, as_input_array, resolve_input
+
+    class MeshModule(Module):
+        def initialize(self, kwargs):
+            pass
+
+    # Run test scenario
+    mesh = np.arange(3000.).reshape(100, 10, 3)
+    np.save(tmp_path / 'mesh.npy', mesh)
+    np.savez(tmp_path / 'geometry.npz', mesh=mesh, twist=np.asfortranarray(mesh[:, :, 0]))
+    np.savez_compressed(tmp_path / 'compressed.npz', mesh=mesh)
+
+    module = MeshModule()
+    module.set_module_input('mesh', MemmapSource(tmp_path / 'geometry.npz', key='mesh'))
+    source = module.inputs['mesh']['val']
+    unmapped = source._array is None
+    restored = pickle.loads(pickle.dumps(module.inputs))
+    twist = MemmapSource(tmp_path / 'geometry.npz', key='twist')
+
+    # Check to make sure values are correct
+    assert unmapped
+    assert len(pickle.dumps(source)) < 500
+    assert isinstance(resolve_input(source), np.memmap)
+    np.testing.assert_array_equal(resolve_input(restored['mesh']['val']), mesh)
+    np.testing.assert_array_equal(MemmapSource(tmp_path / 'mesh.npy').array, mesh)
+    np.testing.assert_array_equal(twist.array, mesh[:, :, 0])
+    assert twist.shape == (100, 10)
+    flat = as_input_array(source, shape=(1000, 3))
+    assert np.shares_memory(flat, source.array)
+    assert not flat.flags.writeable
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError):
+        MemmapSource(tmp_path / 'compressed.npz', key='mesh').array
+    with pytest.raises(KeyError):
+        MemmapSource(tmp_path / 'geometry.npz', key='chord').array
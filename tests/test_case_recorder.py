@@ -0,0 +1,181 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+
+def _module_csdl():
+    # ModuleCSDL-like tree: 'density' is promoted from 'atmosphere' to 'aero'
+    def values(inputs=(), declared_vars=(), outputs=(), submodules=None, promotes=None):
+        return dict(
+            inputs={name: dict(shape=(1, )) for name in inputs},
+            declared_vars={name: dict(shape=(1, )) for name in declared_vars},
+            outputs={name: dict(shape=(1, )) for name in outputs},
+            submodules=submodules or dict(),
+            promotes=promotes,
+        )
+
+    return SimpleNamespace(
+        module_inputs={'altitude': dict(shape=(1, ))},
+        module_declared_vars={},
+        module_outputs={},
+        sub_modules={
+            'atmosphere': values(declared_vars=['altitude'], outputs=['density']),
+            'aero': values(declared_vars=['density'], outputs=['cp'], promotes=['density', 'cp'],
+                           submodules={'vlm': values(outputs=['circulation'], promotes=[])}),
+        },
+    )
+
+
+def _case(i):
+    # Simulator values of case i; 'circulation' is not promoted
+    return {
+        'altitude': np.array([1000. * i]),
+        'density': np.array([1.2 - 0.01 * i]),
+        'cp': np.full((40, 20), float(i)),
+        'aero.vlm.circulation': np.arange(10.) * i,
+    }
+
+
+'''
+Test to make sure cases are streamed to chunks per module
+'''
+def test_case_recorder(tmp_path):
+    '''
+    Test description: cases are written in chunks per module path, promoted variables are stored once and any case can be read back.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.case_recorder import CaseRecorder, CaseReader, module_variables
+
+    # Run test scenario
+    module = _module_csdl()
+    with CaseRecorder(tmp_path / 'history', module, chunk_size=4) as recorder:
+        for i in range(10):
+            recorder.record(_case(i), name=f'iteration_{i}')
+    reader = CaseReader(tmp_path / 'history')
+
+    # Check to make sure values are correct
+    assert module_variables(module) == {
+        (): ['altitude'],
+        ('atmosphere', ): ['altitude', 'density'],
+        ('aero', ): ['density', 'cp'],
+        ('aero', 'vlm'): ['circulation'],
+    }
+    assert reader.num_cases == 10
+    assert reader.module_paths == ['', 'atmosphere', 'aero', 'aero.vlm']
+    assert sorted(os.listdir(tmp_path / 'history' / 'aero')) == [
+        'chunk_000000.npz', 'chunk_000001.npz', 'chunk_000002.npz']
+    # 'altitude' and 'density' are stored with the first module that has them
+    assert sorted(os.listdir(tmp_path / 'history' / 'atmosphere')) == ['chunk_000000.npz', 'chunk_000001.npz',
+                                                                       'chunk_000002.npz']
+    np.testing.assert_array_equal(reader.get(6, 'aero', 'cp'), np.full((40, 20), 6.))
+    np.testing.assert_array_equal(reader.get('iteration_9', 'aero.vlm', 'circulation'), np.arange(10.) * 9)
+    np.testing.assert_array_equal(reader.get(-1, 'aero', 'density'), [1.2 - 0.09])
+    np.testing.assert_array_equal(reader.history('', 'altitude')[:, 0], 1000. * np.arange(10))
+    assert reader.shape('aero', 'cp') == (40, 20)
+    assert set(reader.case(3)['aero']) == {'density', 'cp'}
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(IndexError):
+        reader.get(10, 'aero', 'cp')
+    with pytest.raises(KeyError):
+        reader.get(0, 'aero', 'lift')
+    with pytest.raises(FileExistsError):
+        CaseRecorder(tmp_path / 'history', module)
+
+
+'''
+Test to make sure partly written chunks and filters are handled
+'''
+def test_case_recorder_flush(tmp_path):
+    '''
+    Test description: flushed cases are visible before the recorder is closed and only included variables are recorded.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.case_recorder import CaseRecorder, CaseReader
+
+    # Run test scenario
+    recorder = CaseRecorder(tmp_path / 'history', _module_csdl(), chunk_size=4, includes=['aero.*'])
+    for i in range(3):
+        recorder.record(_case(i))
+    recorder.flush()
+    partial = CaseReader(tmp_path / 'history')
+    for i in range(3, 6):
+        recorder.record(_case(i))
+    recorder.close()
+    reader = CaseReader(tmp_path / 'history')
+
+    # Check to make sure values are correct
+    assert partial.num_cases == 3
+    assert reader.num_cases == 6
+    assert reader.module_paths == ['aero', 'aero.vlm']
+    np.testing.assert_array_equal(reader.history('aero', 'cp')[:, 0, 0], np.arange(6.))
+    assert partial.case_names == ['case_0', 'case_1', 'case_2']
+    assert reader.case_names == [f'case_{i}' for i in range(6)]
+    # Case names are written per chunk, not to the index
+    with open(tmp_path / 'history' / 'index.json') as f:
+        assert 'case_names' not in json.load(f)
+    assert sorted(os.listdir(tmp_path / 'history' / '__cases__')) == ['chunk_000000.json', 'chunk_000001.json']
+
+
+'''
+Test to make sure submodules added without a name are recorded
+'''
+def test_case_recorder_unnamed_submodule(tmp_path):
+    '''
+    Test description: variables of a ModuleMaker submodule added with name=None are recorded under its generated entry name.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl.lang.output import Output
+    from lsdo_modules.utils.case_recorder import CaseRecorder, CaseReader
+    from lsdo_modules.utils.dataflow import submodule_entry_name
+
+    sub = SimpleNamespace(module_info=[Output('lift', shape=(1, ))], module_inputs=[], module_outputs=['lift'],
+                          promoted_vars=[])
+    entry = dict(name=None, sub_module=sub, promote=None)
+    module = SimpleNamespace(module_info=[entry], module_inputs=[], module_outputs=[], promoted_vars=[])
+
+    # Run test scenario
+    with CaseRecorder(tmp_path / 'history', module) as recorder:
+        recorder.record({'lift': np.array([2.])})
+    reader = CaseReader(tmp_path / 'history')
+
+    # Check to make sure values are correct
+    path = submodule_entry_name(entry)
+    assert reader.module_paths == [path]
+    np.testing.assert_array_equal(reader.get(0, path, 'lift'), [2.])
+
+
+'''
+Test to make sure unpromoted variables are not recorded from promoted ones of the same name
+'''
+def test_case_recorder_unpromoted_variable(tmp_path):
+    '''
+    Test description: an unpromoted submodule variable named like a root variable is stored with its own value.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl.lang.output import Output
+    from lsdo_modules.utils.case_recorder import CaseRecorder, CaseReader, module_variables
+
+    tail = SimpleNamespace(module_info=[Output('lift', shape=(1, ))], module_inputs=[], module_outputs=['lift'],
+                           promoted_vars=[])
+    module = SimpleNamespace(module_info=[Output('lift', shape=(1, )), dict(name='tail', sub_module=tail, promote=[])],
+                             module_inputs=[], module_outputs=['lift'], promoted_vars=[])
+
+    # Run test scenario
+    with CaseRecorder(tmp_path / 'history', module) as recorder:
+        recorder.record({'lift': np.array([1.]), 'tail.lift': np.array([2.])})
+    reader = CaseReader(tmp_path / 'history')
+
+    # Check to make sure values are correct
+    assert module_variables(module) == {(): ['lift'], ('tail', ): ['lift']}
+    np.testing.assert_array_equal(reader.get(0, '', 'lift'), [1.])
+    np.testing.assert_array_equal(reader.get(0, 'tail', 'lift'), [2.])
@@ -0,0 +1,438 @@
+from types import SimpleNamespace
+import pytest
+
+
+def _module_values(declared_vars=(), outputs=(), submodules=None, **kwargs):
+    return dict(
+        inputs={},
+        declared_vars={name: dict(shape=(1, ), importance=0) for name in declared_vars},
+        outputs={name: dict(shape=(1, ), importance=0) for name in outputs},
+        promoted_vars=[],
+        submodules=submodules or dict(),
+        auto_iv=[],
+        **kwargs,
+    )
+
+
+'''
+Test to make sure submodules are ordered by their data dependencies
+'''
+def test_module_graph_order():
+    '''
+    Test description: modules that run before their producers are moved after them; other modules keep their order.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dataflow import module_csdl_graph
+
+    # Run test scenario
+    # 'aero' is added before 'atmosphere' although it needs the density;
+    # 'propulsion' needs the drag computed by a submodule of 'aero'
+    module = SimpleNamespace(
+        sub_modules={
+            'propulsion': _module_values(declared_vars=['drag'], outputs=['thrust']),
+            'aero': _module_values(
+                declared_vars=['density'],
+                outputs=['lift'],
+                submodules={'vlm': _module_values(declared_vars=['density'], outputs=['drag'])},
+            ),
+            'geometry': _module_values(outputs=['area']),
+            'atmosphere': _module_values(outputs=['density']),
+        },
+        connections=[('geometry.area', 'propulsion.disk_area')],
+    )
+    graph = module_csdl_graph(module)
+
+    # Check to make sure values are correct
+    assert graph.topological_order() == ['geometry', 'atmosphere', 'aero', 'propulsion']
+    assert graph.cycles() == []
+
+
+'''
+Test to make sure variables are matched by their promoted names
+'''
+def test_module_graph_promotion():
+    '''
+    Test description: unpromoted variables with the same names as promoted ones do not create edges; prepended names do.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dataflow import module_csdl_graph
+
+    # Run test scenario
+    # 'wing' and 'tail' do not promote 'lift' and 'twist', so they are not
+    # coupled with 'structures'; 'cruise' declares 'mach' as 'cruise_mach'
+    module = SimpleNamespace(
+        sub_modules={
+            'wing': _module_values(declared_vars=['twist'], outputs=['lift'], promotes=[]),
+            'structures': _module_values(declared_vars=['lift'], outputs=['twist']),
+            'tail': _module_values(declared_vars=['density'], outputs=['lift'], promotes=['density']),
+            'cruise': _module_values(declared_vars=['mach'], outputs=['range'], prepend='cruise'),
+            'atmosphere': _module_values(outputs=['density', 'cruise_mach']),
+        },
+    )
+    graph = module_csdl_graph(module)
+
+    # Check to make sure values are correct
+    assert graph.cycles() == []
+    assert graph.consumes['wing'] == {'wing.twist'}
+    assert graph.produces['tail'] == {'tail.lift'}
+    assert graph.topological_order() == ['wing', 'structures', 'atmosphere', 'tail', 'cruise']
+
+
+'''
+Test to make sure feedback loops are reported
+'''
+def test_module_graph_cycles():
+    '''
+    Test description: strongly connected components are found and kept together; topological_order raises.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dataflow import ModuleGraph
+
+    # Run test scenario
+    graph = ModuleGraph(
+        ['structures', 'mission', 'aero', 'weights'],
+        consumes=dict(structures=['lift'], aero=['twist', 'weight'], weights=['mass'], mission=['weight']),
+        produces=dict(structures=['twist', 'mass'], aero=['lift'], weights=['weight']),
+    )
+
+    # Check to make sure values are correct
+    assert graph.strongly_connected_components() == [['structures', 'aero', 'weights'], ['mission']]
+    assert graph.cycles() == [['structures', 'aero', 'weights']]
+    assert graph.order() == ['structures', 'aero', 'weights', 'mission']
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError) as exc_info:
+        graph.topological_order()
+    assert 'cyclic' in str(exc_info.value)
+
+
+'''
+Test to make sure large chains do not hit the recursion limit
+'''
+def test_module_graph_long_chain():
+    '''
+    Test description: a reversed chain of 5000 modules is ordered iteratively.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dataflow import ModuleGraph
+
+    # Run test scenario
+    num_modules = 5000
+    names = [f'm{i}' for i in reversed(range(num_modules))]
+    graph = ModuleGraph(
+        names,
+        consumes={f'm{i}': [f'x{i - 1}'] for i in range(1, num_modules)},
+        produces={f'm{i}': [f'x{i}'] for i in range(num_modules)},
+    )
+
+    # Check to make sure values are correct
+    assert graph.topological_order() == names[::-1]
+
+
+def _coupled_system(group_coupled_sub_modules, solver, auto_sort_sub_modules=True):
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    class Aero(ModuleMaker):
+        def define_module(self):
+            twist = self.register_module_input('twist', shape=(1, ))
+            self.register_module_output('lift', twist * 2.)
+            self.register_module_output('drag', twist * 0.1)
+
+    class Structures(ModuleMaker):
+        def define_module(self):
+            lift = self.register_module_input('lift', shape=(1, ))
+            self.register_module_output('twist', lift * 0.1)
+
+    class Mission(ModuleMaker):
+        def define_module(self):
+            lift = self.register_module_input('lift', shape=(1, ))
+            self.register_module_output('range', lift * 3.)
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(Mission(), 'mission')
+            self.add_module(Aero(), 'aero', promote=['twist', 'lift'])
+            self.add_module(Structures(), 'structures')
+
+    system = System()
+    system.auto_sort_sub_modules = auto_sort_sub_modules
+    system.group_coupled_sub_modules = group_coupled_sub_modules
+    system.coupled_nonlinear_solver = solver
+    return system
+
+
+'''
+Test to make sure coupled submodules are ordered and optionally grouped at assembly
+'''
+def test_assemble_coupled_groups():
+    '''
+    Test description: submodules are only reordered when sorting is enabled; submodules in a feedback loop are then ordered before their consumers and only grouped, with the coupled solver, when enabled.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl import NonlinearBlockGS
+
+    # Run test scenario
+    system = _coupled_system(False, None)
+    csdl_model = system.assemble_csdl()
+    csdl_model.define()
+    solver = NonlinearBlockGS(maxiter=50)
+    grouped_system = _coupled_system(True, solver)
+    grouped_model = grouped_system.assemble_csdl()
+    grouped_model.define()
+    unsorted_system = _coupled_system(False, None, auto_sort_sub_modules=False)
+    unsorted_model = unsorted_system.assemble_csdl()
+    unsorted_model.define()
+
+    # Check to make sure values are correct
+    # By default, submodules are added directly and keep their variable paths
+    assert system.coupled_groups == []
+    assert [entry['name'] for entry in system.module_info if isinstance(entry, dict)] == ['aero', 'structures', 'mission']
+    assert [subgraph.name for subgraph in csdl_model.subgraphs] == ['aero', 'structures', 'mission']
+    # Without sorting, submodules stay in the order they were added
+    assert [subgraph.name for subgraph in unsorted_model.subgraphs] == ['mission', 'aero', 'structures']
+    assert grouped_system.coupled_groups == [['aero', 'structures']]
+    assert [subgraph.name for subgraph in grouped_model.subgraphs] == ['coupled_group_0', 'mission']
+    group = grouped_model.subgraphs[0].submodel
+    assert group.nonlinear_solver is solver
+    assert [subgraph.name for subgraph in group.subgraphs] == ['aero', 'structures']
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError) as exc_info:
+        _coupled_system(True, None).assemble_csdl()
+    assert 'coupled_nonlinear_solver' in str(exc_info.value)
+
+
+'''
+Test to make sure unpromoted submodule variables are not matched by name
+'''
+def test_module_maker_graph_promotion():
+    '''
+    Test description: a submodule added with promote=[] is not coupled to siblings using the same variable names.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    class Aero(ModuleMaker):
+        def define_module(self):
+            twist = self.register_module_input('twist', shape=(1, ))
+            self.register_module_output('lift', twist * 2.)
+
+    class Structures(ModuleMaker):
+        def define_module(self):
+            lift = self.register_module_input('lift', shape=(1, ))
+            self.register_module_output('twist', lift * 0.1)
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(Aero(), 'aero', promote=[])
+            self.add_module(Structures(), 'structures')
+
+    # Run test scenario
+    system = System()
+    system.assemble_csdl()
+    graph = system.dataflow_graph()
+
+    # Check to make sure values are correct
+    assert graph.cycles() == []
+    assert graph.consumes['aero'] == {'aero.twist'}
+    assert graph.produces['aero'] == {'aero.lift'}
+
+
+'''
+Test to make sure unused submodules are pruned
+'''
+def test_assemble_prune():
+    '''
+    Test description: with prune=True, only submodules that the objective, constraints or kept outputs depend on are added.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    def make_module(input_name, output_name):
+        class Discipline(ModuleMaker):
+            def define_module(self):
+                x = self.register_module_input(input_name, shape=(1, ))
+                self.register_module_output(output_name, x * 2.)
+        return Discipline()
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(make_module('altitude', 'density'), 'atmosphere')
+            self.add_module(make_module('density', 'lift'), 'aero')
+            self.add_module(make_module('lift', 'lift_plot_data'), 'diagnostics')
+            self.add_module(make_module('density', 'noise'), 'acoustics')
+            self.register_objective('lift')
+
+    # Run test scenario
+    system = System()
+    system.assemble_csdl(prune=True, keep_outputs=['noise'])
+    pruned = system.pruned_sub_modules
+    system = System()
+    system.assemble_csdl(prune=True)
+
+    # Check to make sure values are correct
+    assert pruned == ['diagnostics']
+    assert system.pruned_sub_modules == ['diagnostics', 'acoustics']
+
+
+'''
+Test to make sure ancestors are found through feedback loops
+'''
+def test_module_graph_ancestors():
+    '''
+    Test description: ancestors include all modules the given modules depend on, including loops.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dataflow import ModuleGraph
+
+    # Run test scenario
+    graph = ModuleGraph(
+        ['a', 'b', 'c', 'd'],
+        consumes=dict(b=['x', 'z'], c=['y'], d=['x']),
+        produces=dict(a=['x'], b=['y'], c=['z'], d=['w']),
+    )
+
+    # Check to make sure values are correct
+    assert graph.ancestors(['c']) == {'a', 'b', 'c'}
+    assert graph.ancestors(['d']) == {'a', 'd'}
+
+
+'''
+Test to make sure reduced models only compute important outputs
+'''
+def test_assemble_importance():
+    '''
+    Test description: with importance=k, only submodules needed for outputs of importance up to k are added.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    def make_module(input_name, output_name, importance):
+        class Discipline(ModuleMaker):
+            def define_module(self):
+                x = self.register_module_input(input_name, shape=(1, ))
+                self.register_module_output(output_name, x * 2., importance=importance)
+        return Discipline()
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(make_module('altitude', 'density', 0), 'atmosphere')
+            self.add_module(make_module('density', 'lift', 1), 'aero')
+            self.add_module(make_module('lift', 'lift_distribution', 3), 'diagnostics')
+
+    # Run test scenario
+    quick_look = System()
+    quick_look.assemble_csdl(importance=1)
+    full = System()
+    full.assemble_csdl(importance=3)
+
+    # Check to make sure values are correct
+    assert quick_look.important_outputs(1) == ['lift']
+    assert quick_look.pruned_sub_modules == ['diagnostics']
+    assert full.pruned_sub_modules == []
+
+
+'''
+Test to make sure duplicate submodules are shared
+'''
+def test_assemble_share_duplicates():
+    '''
+    Test description: a submodule with the same class, parameters and promoted input sources as an earlier one is not added.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    class Atmosphere(ModuleMaker):
+        def initialize_module(self):
+            self.parameters.declare('model', default='isa', types=str)
+
+        def define_module(self):
+            altitude = self.register_module_input('altitude', shape=(1, ))
+            self.register_module_output('density', altitude * 1e-4)
+
+    class Aero(ModuleMaker):
+        def define_module(self):
+            density = self.register_module_input('density', shape=(1, ))
+            self.register_module_output('lift', density * 2.)
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(Atmosphere(), 'atmosphere')
+            self.add_module(Aero(), 'aero')
+            self.add_module(Atmosphere(), 'propulsion_atmosphere', promote=['altitude'])
+            # Reads its own, unpromoted 'noise_atmosphere.altitude'
+            self.add_module(Atmosphere(), 'noise_atmosphere', promote=[])
+            self.add_module(Atmosphere(model='ussa'), 'acoustics_atmosphere', promote=['altitude'])
+
+    # Run test scenario
+    system = System()
+    system.assemble_csdl(share_duplicates=True)
+
+    # Check to make sure values are correct
+    assert system.shared_sub_modules == {'propulsion_atmosphere': 'atmosphere'}
+    assert system.sharing_report == dict(evaluations=1, variables=2)
+
+
+'''
+Test to make sure consumers of a shared duplicate read the outputs of the original
+'''
+def test_assemble_share_nested_duplicates():
+    '''
+    Test description: duplicates nested in different submodules are shared and their consumers are connected to the outputs of the original.
+    '''
+    pytest.importorskip('csdl.lang')
+    python_csdl_backend = pytest.importorskip('python_csdl_backend')
+
+    # Import class/function to test
+    import numpy as np
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    class Atmosphere(ModuleMaker):
+        def define_module(self):
+            altitude = self.register_module_input('altitude', shape=(1, ))
+            self.register_module_output('density', altitude * 1e-4)
+
+    class Discipline(ModuleMaker):
+        def initialize_module(self):
+            self.parameters.declare('output_name', types=str)
+            self.parameters.declare('factor', types=float)
+
+        def define_module(self):
+            self.add_module(Atmosphere(), 'atmosphere')
+            density = self.register_module_input('density', shape=(1, ))
+            self.register_module_output(self.parameters['output_name'], density * self.parameters['factor'])
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.register_module_input('altitude', val=1000., shape=(1, ))
+            self.add_module(Discipline(output_name='lift', factor=2.), 'aero', promote=['altitude', 'lift'])
+            self.add_module(Discipline(output_name='thrust', factor=3.), 'propulsion', promote=['altitude', 'thrust'])
+
+    # Run test scenario
+    system = System()
+    csdl_model = system.assemble_csdl(share_duplicates=True)
+    sim = python_csdl_backend.Simulator(csdl_model)
+    sim.run()
+
+    # Check to make sure values are correct
+    assert system.shared_sub_modules == {'propulsion.atmosphere': 'aero.atmosphere'}
+    assert system.sharing_report == dict(evaluations=1, variables=2)
+    assert csdl_model.parameters['connections'] == [('aero.density', 'propulsion.density')]
+    np.testing.assert_allclose(sim['propulsion.density'], [0.1])
+    np.testing.assert_allclose(sim['thrust'], [0.3])
+    np.testing.assert_allclose(sim['lift'], [0.2])
@@ -0,0 +1,37 @@
+'''
+Test to make sure LaTeX labels are correct
+'''
+def test_generate_dsm_text():
+    '''
+    Test description: greek letters, subscripts and plain words are converted to LaTeX.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dsm_text import generate_dsm_text
+
+    # Check to make sure values are correct
+    assert generate_dsm_text('alpha_max') == r'\alpha_{max}'
+    assert generate_dsm_text('C_L') == r'C_{L}'
+    assert generate_dsm_text('lift') == r'\,\text{\,lift}'
+
+
+'''
+Test to make sure labels are memoized
+'''
+def test_generate_dsm_text_cache():
+    '''
+    Test description: repeated names are served from the cache.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.dsm_text import generate_dsm_text
+
+    # Run test scenario
+    generate_dsm_text.cache_clear()
+    for _ in range(3):
+        generate_dsm_text('rotor_1_rpm')
+
+    # Check to make sure values are correct
+    info = generate_dsm_text.cache_info()
+    assert info.misses == 1
+    assert info.hits == 2
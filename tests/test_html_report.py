@@ -0,0 +1,77 @@
+import json
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+
+'''
+Test to make sure the html report is written without opening a browser
+'''
+def test_generate_html_headless(tmp_path, monkeypatch):
+    '''
+    Test description: with headless=True the report and value sidecar are written, submodules are lazily rendered and the browser is not opened.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    import webbrowser
+    from csdl.lang.declared_variable import DeclaredVariable
+    from csdl.lang.output import Output
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    def open_new_tab(url):
+        raise AssertionError(f'browser opened for {url}')
+    monkeypatch.setattr(webbrowser, 'open_new_tab', open_new_tab)
+
+    vlm = SimpleNamespace(
+        module_info=[DeclaredVariable('mesh', shape=(2, 3)), Output('circulation', shape=(4, ))],
+        module_inputs=['mesh'],
+        module_outputs=['circulation'],
+        promoted_vars=[],
+    )
+    aero = SimpleNamespace(
+        module_info=[DeclaredVariable('density', shape=(1, )), Output('cp', shape=(40, 20)),
+                     dict(name='vlm', sub_module=vlm, promote=[])],
+        module_inputs=['density'],
+        module_outputs=['cp'],
+        promoted_vars=[],
+    )
+    module = SimpleNamespace(module_info=[DeclaredVariable('altitude', shape=(1, )), Output('lift', shape=(1, )),
+                                          dict(name='aero', sub_module=aero, promote=['density', 'cp'])],
+                             promoted_vars=[])
+    sim = {
+        'altitude': np.array([1000.]),
+        'lift': np.array([2.5]),
+        'density': np.array([1.2]),
+        'cp': np.ones((40, 20)),
+        'aero.vlm.mesh': np.zeros((2, 3)),
+        'aero.vlm.circulation': np.arange(4.),
+    }
+
+    # Run test scenario
+    file_name = str(tmp_path / 'report.html')
+    returned = ModuleMaker.generate_html(module, sim=sim, file_name=file_name, headless=True)
+    with open(file_name) as f:
+        html = f.read()
+    with open(str(tmp_path / 'report_values.json')) as f:
+        sidecar = json.load(f)
+
+    # Check to make sure values are correct
+    assert returned == file_name
+    assert html.startswith('<!DOCTYPE html>') and html.rstrip().endswith('</html>')
+    assert '<details open><summary><b>module</b> <span class="count">(1 inputs, 1 outputs)</span>' in html
+    assert '<details data-lazy="1"><summary><b>aero</b> <span class="count">(1 inputs, 1 outputs)</span>' in html
+    assert '<details data-lazy="1"><summary><b>vlm</b>' in html
+    # vlm is nested inside the template of aero
+    assert html.index('<b>aero</b>') < html.index('<b>vlm</b>') < html.rindex('</template></details>')
+    # The script of the report also mentions <template> in a comment
+    assert html.count('<template>\n') == html.count('</template></details>') == 2
+    assert html.count('<details') == html.count('</details>') == 3
+    for name in ['altitude', 'lift', 'density', 'cp', 'mesh', 'circulation']:
+        assert f'<td>{name}</td>' in html
+    assert '<td>DeclaredVariable</td><td>(2, 3)</td>' in html
+    assert '<th>value</th>' in html
+    assert '<td>lift</td><td>Output</td><td>(1,)</td><td>[2.5]</td>' in html
+    assert 'min=1, max=1, norm=28.28' in html
+    assert sidecar['aero.vlm'] == {'mesh': {'shape': [2, 3], 'value': [[0., 0., 0.], [0., 0., 0.]]},
+                                   'circulation': {'shape': [4], 'value': [0., 1., 2., 3.]}}
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+# Modules only needed for reports and diagrams
+REPORT_MODULES = ['pandas', 'json2html', 'pyxdsm', 'pytikz', 'webbrowser', 'matplotlib']
+
+# Budget for the modules of this package (excluding numpy, csdl, ...) in seconds
+IMPORT_BUDGET = float(os.environ.get('LSDO_MODULES_IMPORT_BUDGET', '0.1'))
+
+_SCRIPT = '''
+import json, sys, time, warnings
+import numpy
+formatwarning = warnings.formatwarning
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+print(json.dumps(dict(
+    elapsed=elapsed,
+    loaded=[name for name in {report_modules!r} if name in sys.modules],
+    formatwarning_unchanged=warnings.formatwarning is formatwarning,
+)))
+'''
+
+
+def _import_in_subprocess(modules):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = _SCRIPT.format(modules=modules, report_modules=REPORT_MODULES)
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+'''
+Test to make sure report-only dependencies are not imported with the module layer
+'''
+def test_import_module_layer():
+    '''
+    Test description: importing Module and Parameters loads no report modules and stays within the import budget.
+    '''
+
+    # Run test scenario
+    result = _import_in_subprocess([
+        'lsdo_modules.module.module',
+        'lsdo_modules.utils.parameters',
+        'lsdo_modules.utils.dataflow',
+    ])
+
+    # Check to make sure values are correct
+    assert result['loaded'] == []
+    assert result['elapsed'] < IMPORT_BUDGET
+
+
+'''
+Test to make sure report-only dependencies are not imported with ModuleMaker/ModuleCSDL
+'''
+def test_import_module_maker():
+    '''
+    Test description: importing ModuleMaker and ModuleCSDL loads no report modules and does not change warnings.formatwarning.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Run test scenario
+    result = _import_in_subprocess([
+        'lsdo_modules.module.module_maker',
+        'lsdo_modules.module_csdl.module_csdl',
+    ])
+
+    # Check to make sure values are correct
+    assert result['loaded'] == []
+    assert result['formatwarning_unchanged']
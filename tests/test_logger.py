@@ -0,0 +1,52 @@
+import io
+import logging
+
+
+'''
+Test to make sure the library logger is silent by default
+'''
+def test_logger_silent_by_default():
+    '''
+    Test description: debug messages must not be formatted unless debugging is enabled.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.logger import logger
+
+    class ExpensiveRepr:
+        formatted = False
+        def __repr__(self):
+            ExpensiveRepr.formatted = True
+            return 'expensive'
+
+    # Run test scenario
+    logger.debug('ITEM %s', ExpensiveRepr())
+
+    # Check to make sure the message was never formatted
+    assert ExpensiveRepr.formatted is False
+
+
+'''
+Test to make sure set_log_level enables output
+'''
+def test_set_log_level():
+    '''
+    Test description: after calling set_log_level, debug messages reach the stream.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.logger import logger, set_log_level
+
+    # Run test scenario
+    stream = io.StringIO()
+    set_log_level(logging.DEBUG, stream=stream)
+    try:
+        logger.debug('objective %s', {'d': None})
+    finally:
+        logger.setLevel(logging.NOTSET)
+        for handler in list(logger.handlers):
+            if getattr(handler, '_lsdo_modules', False):
+                logger.removeHandler(handler)
+
+    # Check to make sure the message was written
+    assert 'objective' in stream.getvalue()
@@ -0,0 +1,143 @@
+import asyncio
+import pickle
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from lsdo_modules.module.module import Module
+
+
+class WingModule(Module):
+    def initialize(self, kwargs):
+        pass
+
+
+class SlowSimulator(dict):
+    '''Simulator computing lift = 2 * span after a delay, standing in for a csdl Simulator.'''
+    def run(self):
+        time.sleep(0.05)
+        self['lift'] = 2. * self['span']
+
+
+class CountingEvaluator:
+    '''Evaluator that records how many evaluations run at the same time.'''
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=8)
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.num_submitted = 0
+
+    def _evaluate(self, inputs, outputs):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return dict(outputs={name: 2. * inputs['span'] for name in outputs}, derivatives=None)
+
+    def submit(self, inputs, outputs, of=None, wrt=None):
+        self.num_submitted += 1
+        return self.executor.submit(self._evaluate, inputs, outputs)
+
+
+'''
+Test to make sure modules are evaluated without blocking the event loop
+'''
+def test_module_evaluate_simulator():
+    '''
+    Test description: a Simulator is run in a background thread with the module inputs updated by the given inputs.
+    '''
+
+    # Run test scenario
+    module = WingModule()
+    module.set_module_input('span', np.array([10.]))
+    module.set_evaluator(SlowSimulator())
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.005)
+
+    async def timed_evaluate():
+        result = await module.evaluate(outputs=['lift'])
+        return result, time.perf_counter()
+
+    async def scenario():
+        (default, end), _ = await asyncio.gather(timed_evaluate(), ticker())
+        ticks.append(end)
+        updated = await module.evaluate(dict(span=np.array([12.])), outputs=['lift'])
+        return default, updated
+
+    default, updated = asyncio.run(scenario())
+    module.evaluator.close()
+
+    # Check to make sure values are correct
+    np.testing.assert_array_equal(default['outputs']['lift'], [20.])
+    np.testing.assert_array_equal(updated['outputs']['lift'], [24.])
+    # The event loop kept running while the simulator ran
+    assert ticks[1] < ticks[-1]
+    restored = pickle.loads(pickle.dumps(module))
+    assert restored.evaluator is None
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(RuntimeError):
+        asyncio.run(restored.evaluate(outputs=['lift']))
+
+
+'''
+Test to make sure concurrent evaluations are limited and can be cancelled
+'''
+def test_module_evaluate_concurrency():
+    '''
+    Test description: at most max_concurrent evaluations are submitted at a time; cancelled requests are never submitted.
+    '''
+
+    # Run test scenario
+    module = WingModule()
+    evaluator = CountingEvaluator()
+    module.set_evaluator(evaluator, max_concurrent=2)
+
+    async def scenario():
+        tasks = [asyncio.create_task(module.evaluate(dict(span=float(i)), outputs=['lift'])) for i in range(8)]
+        await asyncio.sleep(0)
+        tasks[-1].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    results = asyncio.run(scenario())
+    evaluator.executor.shutdown()
+
+    # Check to make sure values are correct
+    assert evaluator.max_running == 2
+    assert evaluator.num_submitted == 7
+    assert isinstance(results[-1], asyncio.CancelledError)
+    assert [result['outputs']['lift'] for result in results[:-1]] == [2. * i for i in range(7)]
+
+
+'''
+Test to make sure closing a simulator executor cancels queued evaluations
+'''
+def test_simulator_executor_close():
+    '''
+    Test description: close waits for the running evaluation and cancels the evaluations that have not started.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.worker_pool import SimulatorExecutor
+
+    # Run test scenario
+    executor = SimulatorExecutor(SlowSimulator(span=np.array([10.])))
+    futures = [executor.submit(dict(span=np.array([float(i)])), outputs=['lift']) for i in range(4)]
+    time.sleep(0.01)
+    executor.close()
+
+    # Check to make sure values are correct
+    np.testing.assert_array_equal(futures[0].result()['outputs']['lift'], [0.])
+    assert all(future.cancelled() for future in futures[1:])
+    assert executor._futures == set()
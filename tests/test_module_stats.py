@@ -0,0 +1,111 @@
+from types import SimpleNamespace
+import pytest
+
+
+'''
+Test to make sure per-module and cumulative statistics are correct
+'''
+def test_module_csdl_stats():
+    '''
+    Test description: counts and bytes of a two-level sub_modules tree are accumulated bottom-up.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.module_stats import module_csdl_stats, format_stats
+
+    leaf = dict(
+        inputs={},
+        declared_vars={'mesh': dict(shape=(100, 3), importance=0)},
+        outputs={'force': dict(shape=(3, ), importance=1)},
+        promoted_vars=['mesh', 'force'],
+        submodules={},
+        auto_iv=[],
+        implicit_operations=1,
+    )
+    middle = dict(
+        inputs={'mach': dict(shape=(1, ), importance=0)},
+        declared_vars={},
+        outputs={'lift': dict(shape=(1, ), importance=1)},
+        # Promoted variables of a module include those of its submodules
+        promoted_vars=['mach', 'lift', 'mesh', 'force'],
+        submodules={'vlm': leaf},
+        auto_iv=[],
+    )
+    root = SimpleNamespace(
+        name='system',
+        module_inputs={},
+        module_declared_vars={},
+        module_outputs={},
+        promoted_vars=['mach', 'lift', 'mesh', 'force', 'mach', 'lift'],
+        sub_modules={'aero': middle, 'structures': dict(middle, promoted_vars=['mach', 'lift'], submodules={})},
+        _num_implicit_operations=0,
+    )
+
+    # Run test scenario
+    stats = module_csdl_stats(root)
+
+    # Check to make sure values are correct
+    paths = [r['path'] for r in stats['modules']]
+    assert paths == ['system', 'system.aero', 'system.aero.vlm', 'system.structures']
+    assert stats['depth'] == 2
+    assert stats['max_fan_out'] == 2
+    assert stats['totals']['declared_vars'] == 1
+    assert stats['totals']['implicit_operations'] == 1
+    assert stats['totals']['elements'] == 300 + 3 + 2 * 2
+    assert stats['modules'][1]['cumulative']['bytes'] == (300 + 3 + 2) * 8
+    assert [r['promoted_vars'] for r in stats['modules']] == [0, 2, 2, 2]
+    assert stats['modules'][1]['cumulative']['promoted_vars'] == 4
+    assert stats['totals']['promoted_vars'] == 6
+    assert 'system.aero.vlm' in format_stats(stats)
+
+
+'''
+Test to make sure ModuleMaker statistics count promotions and implicit operations once
+'''
+def test_module_maker_stats():
+    '''
+    Test description: promoted variables are counted by the module promoting them and implicit operations are found through their outputs.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl import NewtonSolver, ScipyKrylov
+    from lsdo_modules.module.module_maker import ModuleMaker
+
+    class Residual(ModuleMaker):
+        def define_module(self):
+            x = self.register_module_input('x', shape=(1, ))
+            y = self.register_module_input('y', shape=(1, ))
+            self.register_module_output('r', y - 0.5 * x)
+
+    class Leaf(ModuleMaker):
+        def define_module(self):
+            x = self.register_module_input('x', shape=(1, ))
+            solve = self.create_implicit_operation(Residual())
+            solve.declare_state('y', residual='r')
+            solve.nonlinear_solver = NewtonSolver(solve_subsystems=False)
+            solve.linear_solver = ScipyKrylov()
+            y = solve(x)
+            self.register_module_output('force', y * 2., promotes=True)
+
+    class Middle(ModuleMaker):
+        def define_module(self):
+            self.add_module(Leaf(), 'leaf')
+            force = self.register_module_input('force', shape=(1, ))
+            self.register_module_output('lift', force * 3., promotes=True)
+
+    class System(ModuleMaker):
+        def define_module(self):
+            self.add_module(Middle(), 'middle')
+
+    # Run test scenario
+    system = System()
+    system.assemble_csdl()
+    stats = system.stats(name='system')
+
+    # Check to make sure values are correct
+    assert [r['path'] for r in stats['modules']] == ['system', 'system.middle', 'system.middle.leaf']
+    assert [r['promoted_vars'] for r in stats['modules']] == [0, 1, 1]
+    assert stats['totals']['promoted_vars'] == 2
+    assert stats['modules'][2]['implicit_operations'] == 1
+    assert stats['totals']['implicit_operations'] == 1
@@ -0,0 +1,269 @@
+import numpy as np
+import pytest
+
+
+'''
+Test to make sure declared options are validated with the original messages
+'''
+def test_parameters_validation():
+    '''
+    Test description: values, types, upper and lower are checked when setting an option.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.parameters import Parameters
+
+    # Run test scenario
+    parameters = Parameters()
+    parameters.declare('num_nodes', default=1, types=int, lower=1)
+    parameters.declare('mach_number', default=0.5, types=float, lower=0., upper=1.)
+    parameters.declare('solver', default='newton', values=('newton', 'nlbgs'))
+    parameters.declare('mesh', default=None, types=list, allow_none=True)
+    parameters.update(dict(num_nodes=10, solver='nlbgs'))
+
+    # Check to make sure values are correct
+    assert parameters['num_nodes'] == 10
+    assert parameters['mach_number'] == 0.5
+    assert parameters['solver'] == 'nlbgs'
+    assert parameters['mesh'] is None
+    assert parameters._dict['num_nodes']['value'] == 10
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(TypeError) as exc_info:
+        parameters['num_nodes'] = 'ten'
+    assert str(exc_info.value) == "Value ('ten') of option 'num_nodes' has type of " \
+        "(<class 'str'>), but expected type (<class 'int'>)."
+    with pytest.raises(ValueError) as exc_info:
+        parameters['solver'] = 'gauss'
+    assert str(exc_info.value) == "Value ('gauss') of option 'solver' is not one of ('newton', 'nlbgs')."
+    with pytest.raises(ValueError) as exc_info:
+        parameters['mach_number'] = 1.5
+    assert str(exc_info.value) == "Value (1.5) of option 'mach_number' exceeds maximum allowed value of 1.0."
+    with pytest.raises(ValueError) as exc_info:
+        parameters['num_nodes'] = 0
+    assert str(exc_info.value) == "Value (0) of option 'num_nodes' is less than minimum allowed value of 1."
+    with pytest.raises(KeyError):
+        parameters['altitude'] = 1000.
+
+    # Failed sets must not change the value
+    assert parameters['num_nodes'] == 10
+
+
+'''
+Test to make sure option entries can be used like the previous dictionary entries
+'''
+def test_parameters_entries():
+    '''
+    Test description: entries support item reads and writes; writing metadata changes the checks of later values.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.parameters import Parameters
+
+    # Run test scenario
+    calls = []
+    def check_positive(name, value):
+        calls.append(value)
+        if value <= 0:
+            raise ValueError(name)
+
+    parameters = Parameters()
+    parameters.declare('span', default=10., types=float, lower=0.)
+    parameters.declare('area', default=1., check_valid=check_positive)
+    entry = parameters._dict['span']
+    entry['value'] = 12.
+    entry['upper'] = 20.
+
+    # Check to make sure values are correct
+    assert parameters['span'] == 12.
+    assert entry['upper'] == 20. and entry['lower'] == 0.
+    assert dict(entry)['types'] is float
+    assert 'has_been_set' in entry
+    assert calls == [1.]
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError):
+        parameters['span'] = 25.
+    # numpy scalars are checked like Python scalars
+    with pytest.raises(ValueError) as exc_info:
+        parameters['span'] = np.float64(-1.)
+    assert str(exc_info.value) == "Value (-1.0) of option 'span' is less than minimum allowed value of 0.0."
+    with pytest.raises(KeyError):
+        entry['unit'] = 'm'
+    with pytest.raises(ValueError):
+        Parameters().declare('span', default=-1., types=float, lower=0.)
+    with pytest.raises(RuntimeError):
+        Parameters().declare('span', types=float, values=(1., 2.))
+
+
+'''
+Test to make sure frozen snapshots have a content-based hash
+'''
+def test_parameters_freeze():
+    '''
+    Test description: snapshots with equal values (including arrays) are equal and hash equally; snapshots are immutable.
+    '''
+
+    # Import class/function to test
+    import numpy as np
+    from lsdo_modules.utils.parameters import Parameters
+
+    def make_parameters(mesh):
+        parameters = Parameters()
+        parameters.declare('num_nodes', default=1, types=int)
+        parameters.declare('mesh', types=np.ndarray)
+        parameters.declare('options', default=dict(solver='newton', tol=1e-8), types=dict)
+        parameters.declare('required', types=str)
+        parameters['mesh'] = mesh
+        return parameters
+
+    # Run test scenario
+    mesh = np.linspace(0., 1., 12).reshape(3, 4)
+    parameters = make_parameters(mesh)
+    frozen = parameters.freeze()
+    cache = {(dict, frozen): 'cached'}
+
+    # Check to make sure values are correct
+    assert set(frozen) == {'num_nodes', 'mesh', 'options'}
+    assert frozen == make_parameters(mesh.copy()).freeze()
+    assert cache[(dict, make_parameters(mesh.copy()).freeze())] == 'cached'
+    assert frozen != make_parameters(mesh.T.copy()).freeze()
+    assert frozen != make_parameters(mesh.astype(np.float32)).freeze()
+
+    # The snapshot does not change with the original parameters
+    mesh[0, 0] = 10.
+    parameters['num_nodes'] = 2
+    assert frozen['mesh'][0, 0] == 0.
+    assert frozen['num_nodes'] == 1
+    assert frozen != parameters.freeze()
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError):
+        frozen['mesh'][0, 0] = 1.
+    with pytest.raises(TypeError):
+        frozen['num_nodes'] = 3
+
+
+'''
+Test to make sure snapshot digests are the same in every process
+'''
+def test_parameters_freeze_deterministic():
+    '''
+    Test description: digests of values without a content-based hash do not depend on the process or PYTHONHASHSEED; values that cannot be pickled are not hashable.
+    '''
+
+    # Import class/function to test
+    import os
+    import subprocess
+    import sys
+    from lsdo_modules.utils.parameters import FrozenParameters
+
+    script = (
+        'import datetime, types\n'
+        'from lsdo_modules.utils.parameters import FrozenParameters\n'
+        'frozen = FrozenParameters(dict(date=datetime.date(2020, 1, 1), '
+        'options=types.SimpleNamespace(solver="newton")))\n'
+        'print(frozen.digest.hex())\n'
+    )
+
+    # Run test scenario
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digests = set()
+    for seed in ('1', '2'):
+        env = dict(os.environ, PYTHONHASHSEED=seed,
+                   PYTHONPATH=root + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        result = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                                capture_output=True, text=True)
+        digests.add(result.stdout.strip())
+
+    # Check to make sure values are correct
+    assert len(digests) == 1
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(TypeError):
+        hash(FrozenParameters(dict(function=lambda x: x)))
+
+
+'''
+Test to make sure array options are checked element-wise
+'''
+def test_parameters_arrays():
+    '''
+    Test description: shape, dtype and vectorized bounds are checked; arrays are stored without copying or as read-only views.
+    '''
+
+    # Import class/function to test
+    import numpy as np
+    from lsdo_modules.utils.parameters import Parameters
+
+    # Run test scenario
+    parameters = Parameters()
+    parameters.declare('chord', shape=(None, ), dtype=np.floating, lower=0., upper=np.full(5, 2.))
+    parameters.declare('mesh', shape=(2, 3), dtype=float, lower=-1., read_only_view=True)
+    chord = np.linspace(0.5, 1.5, 5)
+    mesh = np.zeros((2, 3))
+    parameters['chord'] = chord
+    parameters['mesh'] = mesh
+
+    # Check to make sure values are correct
+    assert parameters['chord'] is chord
+    assert np.shares_memory(parameters['mesh'], mesh)
+    assert not parameters['mesh'].flags.writeable
+    assert mesh.flags.writeable
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(ValueError) as exc_info:
+        parameters['chord'] = np.array([1., 3., 1., 4., 1.])
+    assert str(exc_info.value) == "Value of option 'chord' exceeds maximum allowed value of " \
+        "[2. 2. 2. 2. 2.] at indices [1, 3]."
+    bad_mesh = np.zeros((2, 3))
+    bad_mesh[1, 2] = -5.
+    with pytest.raises(ValueError) as exc_info:
+        parameters['mesh'] = bad_mesh
+    assert str(exc_info.value) == "Value of option 'mesh' is less than minimum allowed value of " \
+        "-1.0 at indices [(1, 2)]."
+    with pytest.raises(ValueError) as exc_info:
+        parameters['mesh'] = np.zeros((3, 2))
+    assert 'expected shape (2, 3)' in str(exc_info.value)
+    with pytest.raises(TypeError) as exc_info:
+        parameters['mesh'] = np.zeros((2, 3), dtype=int)
+    assert 'expected dtype float' in str(exc_info.value)
+    with pytest.raises(TypeError):
+        parameters['chord'] = [1., 1.]
+
+
+'''
+Test to make sure parameters can be pickled
+'''
+def test_parameters_pickle():
+    '''
+    Test description: values, defaults, required options and validation survive pickling; read-only views stay read-only.
+    '''
+    import pickle
+
+    # Import class/function to test
+    import numpy as np
+    from lsdo_modules.utils.parameters import Parameters
+
+    # Run test scenario
+    parameters = Parameters()
+    parameters.declare('num_nodes', default=1, types=int, lower=1)
+    parameters.declare('mesh', shape=(2, 3), dtype=float, read_only_view=True)
+    parameters.declare('name', types=str)
+    parameters['mesh'] = np.ones((2, 3))
+    restored = pickle.loads(pickle.dumps(parameters))
+
+    # Check to make sure values are correct
+    assert restored['num_nodes'] == 1
+    np.testing.assert_array_equal(restored['mesh'], np.ones((2, 3)))
+    assert not restored['mesh'].flags.writeable
+    assert restored.freeze() == parameters.freeze()
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(RuntimeError):
+        restored['name']
+    with pytest.raises(ValueError):
+        restored['num_nodes'] = 0
+    with pytest.raises(ValueError):
+        restored['mesh'] = np.ones((3, 2))
+    restored['name'] = 'wing'
@@ -0,0 +1,110 @@
+import pickle
+
+import numpy as np
+import pytest
+
+pytest.importorskip('csdl.lang')
+
+from lsdo_modules.module.module_maker import ModuleMaker, CSDLModel
+from lsdo_modules.module_csdl.module_csdl import ModuleCSDL
+
+
+# Modules are defined at module level so that they can be pickled
+class Aero(ModuleMaker):
+    def initialize_module(self):
+        self.parameters.declare('cl_alpha', default=2. * np.pi, types=float)
+
+    def define_module(self):
+        alpha = self.register_module_input('alpha', shape=(1, ))
+        self.register_module_output('lift', alpha * self.parameters['cl_alpha'])
+
+
+class Structures(ModuleMaker):
+    def define_module(self):
+        lift = self.register_module_input('lift', shape=(1, ))
+        self.register_module_output('alpha', lift * 0.01)
+
+
+class Mission(ModuleMaker):
+    def define_module(self):
+        lift = self.register_module_input('lift', shape=(1, ))
+        self.register_module_output('range', lift * 3.)
+
+
+def coupled_solver():
+    from csdl import NonlinearBlockGS
+    return NonlinearBlockGS(maxiter=50)
+
+
+class System(ModuleMaker):
+    group_coupled_sub_modules = True
+
+    def define_module(self):
+        self.coupled_nonlinear_solver = coupled_solver
+        self.add_module(Mission(), 'mission')
+        self.add_module(Aero(cl_alpha=6.), 'aero')
+        self.add_module(Structures(), 'structures')
+        self.register_objective('range')
+
+
+class WingCSDL(ModuleCSDL):
+    def define(self):
+        alpha = self.register_module_input('alpha', shape=(1, ))
+        self.register_module_output('lift', alpha * 2. * np.pi)
+
+
+class AircraftCSDL(ModuleCSDL):
+    def define(self):
+        self.register_module_input('alpha', shape=(1, ))
+        self.add_module(WingCSDL(), 'wing')
+        lift = self.register_module_input('lift', shape=(1, ))
+        self.register_module_output('range', lift * 3.)
+
+
+'''
+Test to make sure assembled models can be pickled
+'''
+def test_pickle_assembled_model():
+    '''
+    Test description: a ModuleMaker and its assembled model, including coupled groups, survive pickling.
+    '''
+
+    # Run test scenario
+    system = System()
+    csdl_model = system.assemble_csdl()
+    restored_system, restored_model = pickle.loads(pickle.dumps((system, csdl_model)))
+
+    # Check to make sure values are correct
+    assert isinstance(restored_model, CSDLModel)
+    assert restored_model.parameters['module_info'] is restored_system.module_info
+    assert restored_model.parameters['coupled_groups'] == [[1, 2]]
+    assert restored_system.coupled_groups == [['aero', 'structures']]
+    aero = restored_system.module_info[1]['sub_module']
+    assert aero.parameters['cl_alpha'] == 6.
+    with pytest.raises(TypeError):
+        aero.parameters['cl_alpha'] = 'six'
+
+
+'''
+Test to make sure ModuleCSDL instances can be pickled
+'''
+def test_pickle_module_csdl():
+    '''
+    Test description: ModuleCSDL instances, whose 'define' is wrapped on every subclass, survive pickling before and after 'define'.
+    '''
+
+    # Run test scenario
+    fresh = pickle.loads(pickle.dumps(AircraftCSDL()))
+    aircraft = AircraftCSDL()
+    aircraft.define()
+    restored = pickle.loads(pickle.dumps(aircraft))
+    fresh.define()
+
+    # Check to make sure values are correct
+    assert type(restored).define is AircraftCSDL.define
+    assert list(restored.sub_modules) == ['wing']
+    assert restored.sub_modules['wing']['outputs'] == aircraft.sub_modules['wing']['outputs']
+    assert list(restored.module_outputs) == ['range']
+    # An unpickled instance is defined like a new one
+    assert list(fresh.sub_modules) == list(aircraft.sub_modules)
+    assert fresh.module_declared_vars.keys() == aircraft.module_declared_vars.keys()
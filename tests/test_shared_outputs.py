@@ -0,0 +1,96 @@
+import gc
+import pickle
+import weakref
+from types import SimpleNamespace
+
+import numpy as np
+
+
+'''
+Test to make sure output buffers are laid out from module outputs
+'''
+def test_module_output_shapes():
+    '''
+    Test description: shapes are collected from ModuleCSDL dictionaries and ModuleMaker module_info, including submodules.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.shared_outputs import module_output_shapes
+
+    # Run test scenario
+    module_csdl = SimpleNamespace(
+        module_outputs={'lift': dict(shape=(1, ))},
+        sub_modules={'vlm': dict(outputs={'cp': dict(shape=(40, 20))}, submodules={})},
+    )
+    vlm = SimpleNamespace(
+        module_outputs=['cp'],
+        module_info=[SimpleNamespace(name='mesh', shape=(40, 20, 3)), SimpleNamespace(name='cp', shape=(40, 20))],
+    )
+    module_maker = SimpleNamespace(
+        module_outputs=['lift'],
+        module_info=[dict(sub_module=vlm, name='vlm'), SimpleNamespace(name='lift', shape=1)],
+    )
+
+    # Check to make sure values are correct
+    assert module_output_shapes(module_csdl) == {'lift': (1, ), 'cp': (40, 20)}
+    assert module_output_shapes(module_maker) == {'lift': (1, ), 'cp': (40, 20)}
+
+
+'''
+Test to make sure output buffers are shared between processes without copies
+'''
+def test_shared_output_buffer():
+    '''
+    Test description: outputs are aligned views of one shared memory block, attached by name when unpickled and valid after close.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.shared_outputs import SharedOutputBuffer
+
+    # Run test scenario
+    buffer = SharedOutputBuffer({'cp': (40, 20), 'lift': 1}, batch_size=8)
+    attached = pickle.loads(pickle.dumps(buffer))
+    attached.slot(3)['cp'][...] = 1.
+    attached['lift'][5] = 2.
+    attached.close()
+    cp = buffer['cp']
+    lift = buffer['lift']
+    aligned = lift.ctypes.data % 64 == 0
+    buffer.close()
+
+    # Check to make sure values are correct
+    assert aligned
+    assert cp.shape == (8, 40, 20) and lift.shape == (8, 1)
+    assert cp[3].sum() == 800. and cp.sum() == 800.
+    assert lift[5, 0] == 2. and lift.sum() == 2.
+
+
+'''
+Test to make sure views keep the shared memory mapped
+'''
+def test_shared_output_buffer_lifetime():
+    '''
+    Test description: the shared memory stays alive while views exist and is released with the last view; buffers attach by descriptor.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.shared_outputs import SharedOutputBuffer
+
+    # Run test scenario
+    buffer = SharedOutputBuffer({'lift': 3}, batch_size=4)
+    attached = SharedOutputBuffer.attach(buffer.descriptor)
+    attached.slot(1)['lift'][...] = 5.
+    attached.close()
+    shm = weakref.ref(buffer._shm)
+    view = buffer.slot(1)['lift']
+    buffer.close()
+    gc.collect()
+    alive_with_view = shm() is not None
+    value = view.copy()
+    del view
+    gc.collect()
+
+    # Check to make sure values are correct
+    assert alive_with_view
+    assert shm() is None
+    np.testing.assert_array_equal(value, [5., 5., 5.])
@@ -0,0 +1,38 @@
+import json
+
+
+'''
+Test to make sure nested spans are streamed as valid Chrome trace events
+'''
+def test_chrome_trace_nesting(tmp_path):
+    '''
+    Test description: spans record the dotted module path and the file is valid JSON.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.trace import chrome_trace, trace_span, traced
+
+    class Dummy:
+        name = 'child'
+
+        @traced('define')
+        def define(self):
+            return 3
+
+    # Run test scenario
+    file_name = str(tmp_path / 'trace.json')
+    with chrome_trace(file_name) as tracer:
+        with trace_span('assemble_csdl', 'parent'):
+            actual_val = Dummy().define()
+    # Tracing is disabled after the with block
+    Dummy().define()
+
+    with open(file_name) as f:
+        events = json.load(f)
+
+    # Check to make sure values are correct
+    assert actual_val == 3
+    assert tracer.num_events == 2
+    assert [e['args']['path'] for e in events] == ['parent.child', 'parent']
+    assert all(e['ph'] == 'X' for e in events)
+    assert events[1]['dur'] >= events[0]['dur']
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+import pytest
+
+
+def _make_module(i, children=()):
+    from csdl.lang.declared_variable import DeclaredVariable
+    from csdl.lang.output import Output
+    module_info = [DeclaredVariable(f'in_{i}', shape=(1, )), Output(f'out_{i}', shape=(3, ))]
+    module_info += [dict(name=f'sub_{i}_{k}', sub_module=c) for k, c in enumerate(children)]
+    return SimpleNamespace(
+        module_info=module_info,
+        module_inputs=[f'in_{i}'],
+        module_outputs=[f'out_{i}'],
+    )
+
+
+'''
+Test to make sure the nested dictionary is correct
+'''
+def test_unpack_module_nesting():
+    '''
+    Test description: variables are classified per submodule and nested submodules are nested dictionaries.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.utils.unpack_module import unpack_module
+
+    # Run test scenario
+    mid = _make_module(1, [_make_module(2), _make_module(3)])
+    module_dict = unpack_module([dict(name='mid', sub_module=mid)])
+
+    # Check to make sure values are correct
+    mid_dict = module_dict['module']['Submodules']['mid']
+    assert list(mid_dict['Inputs']) == ['in_1']
+    assert list(mid_dict['Outputs']) == ['out_1']
+    assert list(mid_dict['Submodules']) == ['sub_1_0', 'sub_1_1']
+    assert mid_dict['Submodules']['sub_1_1']['Outputs']['out_3'] == {'type': 'Output', 'shape': '(3,)'}
+
+
+'''
+Test to make sure deep trees do not hit the recursion limit
+'''
+def test_iter_module_records_deep_tree():
+    '''
+    Test description: a chain deeper than the recursion limit visits every variable exactly once.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.utils.unpack_module import iter_module_records
+
+    # Run test scenario
+    depth = 5000
+    module = _make_module(0)
+    for i in range(1, depth):
+        module = _make_module(i, [module])
+    records = list(iter_module_records([dict(name='top', sub_module=module)]))
+
+    # Check to make sure values are correct
+    assert len(records) == 3 * depth
+    assert len(set((r[1], r[2]) for r in records if r[1] != 'Submodules')) == 2 * depth
@@ -0,0 +1,135 @@
+import json
+from types import SimpleNamespace
+import numpy as np
+import pytest
+
+
+class CountingSim(dict):
+    '''Mapping that counts reads, standing in for a Simulator.'''
+    reads = 0
+    def __getitem__(self, key):
+        val = super().__getitem__(key)
+        CountingSim.reads += 1
+        return val
+
+
+'''
+Test to make sure large arrays are summarized
+'''
+def test_summarize_value():
+    '''
+    Test description: small arrays are stored in full, large arrays by shape, min, max and norm.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from lsdo_modules.utils.value_report import summarize_value
+
+    # Run test scenario
+    small = summarize_value(np.array([1., 2.]))
+    large = summarize_value(np.arange(100.).reshape(10, 10))
+
+    # Check to make sure values are correct
+    assert small == {'shape': [2], 'value': [1., 2.]}
+    assert large['shape'] == [10, 10]
+    assert large['max'] == 99.
+    np.testing.assert_almost_equal(large['norm'], np.linalg.norm(np.arange(100.)))
+
+
+'''
+Test to make sure every simulator variable is read once
+'''
+def test_fetch_values(tmp_path):
+    '''
+    Test description: promoted variables shared by modules are fetched once; unpromoted ones by path.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl.lang.declared_variable import DeclaredVariable
+    from csdl.lang.output import Output
+    from lsdo_modules.utils.value_report import fetch_values, write_value_sidecar
+
+    sub = SimpleNamespace(
+        module_info=[DeclaredVariable('x', shape=(1, )), Output('y', shape=(1, ))],
+        module_inputs=['x'],
+        module_outputs=['y'],
+        promoted_vars=[],
+    )
+    module_info = [Output('x', shape=(1, )), dict(name='sub', sub_module=sub, promote=['x'])]
+    sim = CountingSim({'x': np.array([2.]), 'sub.y': np.array([3.])})
+
+    # Run test scenario
+    CountingSim.reads = 0
+    values = fetch_values(sim, module_info)
+    file_name = write_value_sidecar(values, str(tmp_path / 'values.json'))
+
+    # Check to make sure values are correct
+    assert CountingSim.reads == 2
+    assert values[(('sub', ), 'y')]['value'] == [3.]
+    with open(file_name) as f:
+        assert json.load(f) == {'': {'x': {'shape': [1], 'value': [2.]}},
+                                'sub': {'x': {'shape': [1], 'value': [2.]},
+                                        'y': {'shape': [1], 'value': [3.]}}}
+
+
+'''
+Test to make sure submodules added without a name are reported
+'''
+def test_fetch_values_unnamed_submodule(tmp_path):
+    '''
+    Test description: values of a submodule added with name=None are keyed by its generated entry name.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl.lang.output import Output
+    from lsdo_modules.utils.dataflow import submodule_entry_name
+    from lsdo_modules.utils.value_report import fetch_values, write_value_sidecar
+
+    sub = SimpleNamespace(module_info=[Output('y', shape=(1, ))], module_inputs=[], module_outputs=['y'],
+                          promoted_vars=[])
+    entry = dict(name=None, sub_module=sub, promote=None)
+    sim = CountingSim({'y': np.array([3.])})
+
+    # Run test scenario
+    values = fetch_values(sim, [entry])
+    file_name = write_value_sidecar(values, str(tmp_path / 'values.json'))
+
+    # Check to make sure values are correct
+    name = submodule_entry_name(entry)
+    assert values == {((name, ), 'y'): {'shape': [1], 'value': [3.]}}
+    with open(file_name) as f:
+        assert json.load(f) == {name: {'y': {'shape': [1], 'value': [3.]}}}
+
+
+'''
+Test to make sure values are read by the names they are promoted to
+'''
+def test_fetch_values_promotion():
+    '''
+    Test description: an unpromoted submodule variable is not read from a root variable of the same name and promotions at intermediate levels are followed.
+    '''
+    pytest.importorskip('csdl.lang')
+
+    # Import class/function to test
+    from csdl.lang.output import Output
+    from lsdo_modules.utils.value_report import fetch_values
+
+    def namespace(module_info, outputs):
+        return SimpleNamespace(module_info=module_info, module_inputs=[], module_outputs=outputs, promoted_vars=[])
+
+    vlm = namespace([Output('circulation', shape=(1, ))], ['circulation'])
+    # 'circulation' is promoted to 'tail', but 'tail' promotes nothing
+    tail = namespace([Output('lift', shape=(1, )), dict(name='vlm', sub_module=vlm, promote=None)], ['lift'])
+    module_info = [Output('lift', shape=(1, )), dict(name='tail', sub_module=tail, promote=[])]
+    sim = CountingSim({'lift': np.array([1.]), 'circulation': np.array([5.]),
+                       'tail.lift': np.array([2.]), 'tail.circulation': np.array([3.])})
+
+    # Run test scenario
+    values = fetch_values(sim, module_info)
+
+    # Check to make sure values are correct
+    assert values[((), 'lift')]['value'] == [1.]
+    assert values[(('tail', ), 'lift')]['value'] == [2.]
+    assert values[(('tail', 'vlm'), 'circulation')]['value'] == [3.]
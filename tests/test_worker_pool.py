@@ -0,0 +1,132 @@
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+
+# Number of simulators built in this process
+NUM_BUILDS = 0
+
+
+class FakeSimulator(dict):
+    '''Simulator computing y = scale * x, standing in for a csdl Simulator.'''
+    def __init__(self, scale):
+        global NUM_BUILDS
+        NUM_BUILDS += 1
+        super().__init__(x=np.zeros(3), y=np.zeros(3))
+        self.scale = scale
+
+    def run(self):
+        if np.any(self['x'] < 0.):
+            raise ValueError('x must be non-negative')
+        self['y'] = self.scale * self['x']
+        self['pid'] = np.array(os.getpid())
+        self['num_builds'] = np.array(NUM_BUILDS)
+
+    def compute_totals(self, of, wrt):
+        return {(name, var): self.scale * np.eye(3) for name in of for var in wrt}
+
+
+def build_model():
+    return 2.
+
+
+def attached_buffers(sim):
+    from lsdo_modules.utils import worker_pool
+    return list(worker_pool._attached_buffers)
+
+
+'''
+Test to make sure evaluations are distributed over persistent workers
+'''
+def test_worker_pool_batch():
+    '''
+    Test description: batch results are returned in order, with derivatives, and each worker builds its simulator once.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.worker_pool import ModuleWorkerPool
+
+    # Run test scenario
+    inputs_list = [dict(x=np.full(3, float(i))) for i in range(20)]
+    with ModuleWorkerPool(build_model, num_workers=2, simulator_factory=FakeSimulator) as pool:
+        results = pool.evaluate_batch(inputs_list, outputs=['y', 'pid', 'num_builds'])
+        result = pool.evaluate(dict(x=np.ones(3)), outputs=['y'], wrt=['x'])
+
+    # Check to make sure values are correct
+    for i, batch_result in enumerate(results):
+        np.testing.assert_array_equal(batch_result['outputs']['y'], np.full(3, 2. * i))
+        assert batch_result['outputs']['num_builds'] == 1
+        assert batch_result['derivatives'] is None
+    assert os.getpid() not in {int(batch_result['outputs']['pid']) for batch_result in results}
+    np.testing.assert_array_equal(result['derivatives'][('y', 'x')], 2. * np.eye(3))
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(RuntimeError):
+        pool.submit(dict(x=np.ones(3)), outputs=['y'])
+
+
+'''
+Test to make sure evaluations can be awaited
+'''
+def test_worker_pool_async():
+    '''
+    Test description: evaluations are awaited concurrently and failures in a worker are raised in the caller.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.worker_pool import ModuleWorkerPool
+
+    async def sweep(pool):
+        single = await pool.evaluate_async(dict(x=np.ones(3)), outputs=['y'])
+        batch = await pool.evaluate_batch_async([dict(x=np.full(3, 3.)), dict(x=np.full(3, 4.))], outputs=['y'])
+        return single, batch
+
+    # Run test scenario
+    with ModuleWorkerPool(build_model, num_workers=2, simulator_factory=FakeSimulator) as pool:
+        single, batch = asyncio.run(sweep(pool))
+
+        # Check to make sure exceptions are raised
+        with pytest.raises(RuntimeError) as exc_info:
+            pool.evaluate(dict(x=-np.ones(3)), outputs=['y'])
+        assert 'x must be non-negative' in str(exc_info.value)
+
+    # Check to make sure values are correct
+    np.testing.assert_array_equal(single['outputs']['y'], np.full(3, 2.))
+    np.testing.assert_array_equal(batch[1]['outputs']['y'], np.full(3, 8.))
+
+
+'''
+Test to make sure workers write batch outputs to shared memory
+'''
+def test_worker_pool_output_buffer():
+    '''
+    Test description: outputs are written to a shared buffer laid out from the worker's shapes and returned as views of it.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.worker_pool import ModuleWorkerPool
+
+    # Run test scenario
+    inputs_list = [dict(x=np.full(3, float(i))) for i in range(6)]
+    with ModuleWorkerPool(build_model, num_workers=2, simulator_factory=FakeSimulator) as pool:
+        with pool.output_buffer(['y'], len(inputs_list)) as buffer:
+            pool.evaluate_batch(inputs_list, outputs=['y'], output_buffer=buffer)
+            results = pool.evaluate_batch(inputs_list, outputs=['y'], output_buffer=buffer)
+            lift = buffer['y']
+            attached = [pool._submit(attached_buffers, ()).result() for _ in range(4)]
+            descriptor = buffer.descriptor
+
+            # Check to make sure exceptions are raised
+            with pytest.raises(ValueError):
+                pool.evaluate_batch(inputs_list * 2, outputs=['y'], output_buffer=buffer)
+            with pytest.raises(KeyError):
+                pool.evaluate_batch(inputs_list, outputs=['pid'], output_buffer=buffer)
+
+    # Check to make sure values are correct
+    assert buffer.output_shapes == {'y': (3, )}
+    np.testing.assert_array_equal(lift, np.repeat(2. * np.arange(6.), 3).reshape(6, 3))
+    assert all(np.shares_memory(result['outputs']['y'], lift) for result in results)
+    # Workers keep the buffer attached instead of attaching per evaluation
+    assert any(attached) and all(names in ([], [descriptor]) for names in attached)
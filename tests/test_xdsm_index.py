@@ -0,0 +1,78 @@
+from types import SimpleNamespace
+import pytest
+
+
+def _module_values(inputs=(), declared_vars=(), outputs=(), submodules=None):
+    return dict(
+        inputs={name: dict(shape=(1, ), importance=0) for name in inputs},
+        declared_vars={name: dict(shape=(1, ), importance=0) for name in declared_vars},
+        outputs={name: dict(shape=(1, ), importance=importance) for name, importance in outputs},
+        promoted_vars=[],
+        submodules=submodules or dict(),
+        auto_iv=[],
+    )
+
+
+def _module_tree():
+    atmosphere = _module_values(inputs=['altitude'], outputs=[('density', 1), ('temperature', 3)])
+    aero = _module_values(
+        declared_vars=['density'],
+        outputs=[('lift', 1), ('drag', 2)],
+        submodules={'vlm': _module_values(declared_vars=['density', 'mesh'], outputs=[('circulation', 2)])},
+    )
+    return SimpleNamespace(
+        name='system',
+        module_inputs={},
+        module_outputs={},
+        sub_modules={'atmosphere': atmosphere, 'aero': aero},
+    )
+
+
+'''
+Test to make sure the index is built in pre-order with correct producers
+'''
+def test_module_tree_index():
+    '''
+    Test description: modules are indexed in pre-order and upstream connections are grouped by producer.
+    '''
+
+    # Import class/function to test
+    from lsdo_modules.utils.xdsm_index import ModuleTreeIndex
+
+    # Run test scenario
+    index = ModuleTreeIndex(_module_tree())
+
+    # Check to make sure values are correct
+    assert index.modules == ['atmosphere', 'aero', 'vlm']
+    assert index.last_top_level == 1
+    assert index.important_outputs(1, importance=1) == ['lift']
+    assert index.upstream_connections(2, importance=2) == {'atmosphere': ['density']}
+    assert index.upstream_connections(2, importance=0) == {}
+    assert index.user_module_inputs(importance=0) == ['altitude']
+
+
+'''
+Test to make sure an exception is raised without important outputs
+'''
+def test_build_xdsm_exception():
+    '''
+    Test description: if no output has an importance in (0, importance], an exception is raised.
+    '''
+    pytest.importorskip('pyxdsm')
+
+    # Import class/function to test
+    from lsdo_modules.utils.xdsm_index import ModuleTreeIndex, build_xdsm
+
+    tree = _module_tree()
+    modules = list(tree.sub_modules.values())
+    while modules:
+        values = modules.pop()
+        modules.extend(values['submodules'].values())
+        for output in values['outputs'].values():
+            output['importance'] = 5
+
+    # Check to make sure exceptions are raised
+    with pytest.raises(Exception) as exc_info:
+        build_xdsm(ModuleTreeIndex(tree), importance=2)
+
+    assert 'zero importance' in str(exc_info.value)